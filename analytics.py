@@ -0,0 +1,444 @@
+# analytics.py
+"""
+Columnar analytics snapshots and an embedded query mode for reporting.
+
+export_snapshot() copies the reporting tables from MySQL to Parquet files under a directory:
+  observation/obs_month=YYYY-MM/part-<first>-<last>.parquet
+  water_quality/part-<first>-<last>.parquet
+               fact tables, appended incrementally: only rows above the obs_id / quality_id
+               high-water mark are read, in keyset chunks
+  species/, location/, conservation_action/
+               small dimension tables, rewritten in full on every export
+High-water marks live in _state.json and only move after a chunk's files are written, so an
+interrupted export resumes where it stopped. AUTO_INCREMENT ids are handed out when a row is
+written, not when it commits, so a long transaction (a bulk import chunk, an ingest batch) can
+commit a row below the mark after it moved on. Ids skipped below the mark are therefore kept as
+holes in the state and looked up again on every export for HOLE_GRACE_SECONDS; rows that turn
+up are exported then. Fact rows changed or deleted after they were exported are not picked up
+incrementally; run a full export (--full) to rebuild the snapshot.
+
+AnalyticsEngine answers the dashboard and report queries from those files with DuckDB, so
+heavy scans stay off the MySQL server. pyarrow (export) and duckdb (queries) are optional.
+
+Command line:
+    python analytics.py export [--full]
+    python analytics.py report above_average_pollution_species
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import threading
+import time
+
+import change_feed
+import lazy_import
+import storage
+
+pd = lazy_import.module("pandas")
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "analytics")
+DEFAULT_CHUNK_SIZE = 50000
+STATE_FILE = "_state.json"
+HOLE_GRACE_SECONDS = change_feed.MAX_TRANSACTION_SECONDS   # skipped ids are looked up again this long
+
+# name -> (MySQL table, high-water-mark key or None for a full copy, hive partition column or None, columns)
+# Column types: int, string, datetime, date or decimal(p,s)
+TABLES = {
+    "species": ("Species", None, None, [
+        ("species_id", "int"), ("common_name", "string"), ("scientific_name", "string"),
+        ("conservation_status", "string")]),
+    "location": ("Location", None, None, [
+        ("location_id", "int"), ("location_name", "string"), ("region", "string"), ("water_type", "string")]),
+    "conservation_action": ("Conservation_Action", None, None, [
+        ("action_id", "int"), ("species_id", "int"), ("action_type", "string"), ("description", "string"),
+        ("start_date", "date"), ("end_date", "date")]),
+    "observation": ("Observation", "obs_id", "obs_month", [
+        ("obs_id", "int"), ("species_id", "int"), ("location_id", "int"), ("observer_id", "int"),
+        ("quality_id", "int"), ("obs_date", "datetime"), ("count_observed", "int"), ("remarks", "string")]),
+    "water_quality": ("Water_Quality", "quality_id", None, [
+        ("quality_id", "int"), ("location_id", "int"), ("temperature", "decimal(5,2)"), ("pH", "decimal(4,2)"),
+        ("salinity", "decimal(6,2)"), ("pollution_index", "decimal(5,2)"), ("measured_at", "datetime")]),
+}
+
+# Reports from the project's example queries. Views carry the MySQL table names, so every
+# query runs unchanged on MySQL and on the snapshot.
+REPORTS = {
+    "above_average_pollution_species": ("Species seen where pollution is above average", """
+        SELECT DISTINCT s.common_name
+        FROM Species s
+        JOIN Observation o ON s.species_id = o.species_id
+        JOIN Water_Quality wq ON o.quality_id = wq.quality_id
+        WHERE wq.pollution_index > (SELECT AVG(pollution_index) FROM Water_Quality)
+        ORDER BY s.common_name
+    """),
+    "warm_regions": ("Regions warmer than the overall average", """
+        SELECT l.region, AVG(wq.temperature) AS avg_temp
+        FROM Location l
+        JOIN Water_Quality wq ON l.location_id = wq.location_id
+        GROUP BY l.region
+        HAVING AVG(wq.temperature) > (SELECT AVG(temperature) FROM Water_Quality)
+        ORDER BY avg_temp DESC
+    """),
+    "region_temperature": ("Average water temperature per region", """
+        SELECT l.region, AVG(wq.temperature) AS avg_temp
+        FROM Location l JOIN Water_Quality wq ON l.location_id = wq.location_id
+        GROUP BY l.region
+        ORDER BY l.region
+    """),
+    "species_observations": ("Observations per species and location (Species_Observation_View)", """
+        SELECT s.common_name, l.location_name, COUNT(*) AS observations,
+               SUM(o.count_observed) AS total_count, MIN(o.obs_date) AS first_seen, MAX(o.obs_date) AS last_seen
+        FROM Observation o
+        JOIN Species s ON o.species_id = s.species_id
+        JOIN Location l ON o.location_id = l.location_id
+        GROUP BY s.common_name, l.location_name
+        ORDER BY total_count DESC
+    """),
+}
+
+_PART_RE = re.compile(r"^part-(\d+)-(\d+)\.parquet$")
+_DECIMAL_RE = re.compile(r"^decimal\((\d+),(\d+)\)$")
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Analytics export requires pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+def _arrow_type(pa, kind):
+    m = _DECIMAL_RE.match(kind)
+    if m:
+        return pa.decimal128(int(m.group(1)), int(m.group(2)))
+    return {"int": pa.int64(), "string": pa.string(), "datetime": pa.timestamp("us"), "date": pa.date32()}[kind]
+
+
+def _duckdb_type(kind):
+    return kind.upper() if _DECIMAL_RE.match(kind) else {
+        "int": "BIGINT", "string": "VARCHAR", "datetime": "TIMESTAMP", "date": "DATE"}[kind]
+
+
+# ---------- STATE ----------
+def load_state(directory=DEFAULT_DIR):
+    """
+    {'high_water': {table: key}, 'holes': {table: [[first, last, unix time first missed]]},
+    'exported_at': {table: unix time}} from the last export.
+    """
+    path = os.path.join(directory, STATE_FILE)
+    if not os.path.exists(path):
+        return {"high_water": {}, "holes": {}, "exported_at": {}}
+    with open(path) as f:
+        state = json.load(f)
+    state.setdefault("holes", {})
+    return state
+
+
+def _save_state(directory, state):
+    tmp = os.path.join(directory, STATE_FILE + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, os.path.join(directory, STATE_FILE))
+
+
+# ---------- EXPORT ----------
+def _write_parquet(pa, rows, columns, path):
+    """Write rows atomically: readers only ever see complete files."""
+    import pyarrow.parquet as pq
+    schema = pa.schema([(name, _arrow_type(pa, kind)) for name, kind in columns])
+    table = pa.Table.from_pylist(rows, schema=schema)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    pq.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, path)
+
+
+def _drop_parts_above(table_dir, high_water):
+    """Remove part files left by an interrupted export (they start above the high-water mark)."""
+    for path in glob.glob(os.path.join(table_dir, "**", "part-*.parquet"), recursive=True):
+        m = _PART_RE.match(os.path.basename(path))
+        if m and int(m.group(1)) > high_water:
+            os.remove(path)
+
+
+def _export_full(pa, conn, directory, name):
+    source, _, _, columns = TABLES[name]
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(f"SELECT {', '.join(c for c, _ in columns)} FROM {source}")
+    rows = cursor.fetchall()
+    cursor.close()
+    _write_parquet(pa, rows, columns, os.path.join(directory, name, f"{name}.parquet"))
+    return len(rows)
+
+
+def _write_part(pa, rows, name, directory):
+    """Write one chunk of fact rows (in key order) as part files named after its key range."""
+    _, key, partition, columns = TABLES[name]
+    table_dir = os.path.join(directory, name)
+    filename = f"part-{rows[0][key]:010d}-{rows[-1][key]:010d}.parquet"
+    if partition == "obs_month":
+        groups = {}
+        for row in rows:
+            month = row["obs_date"].strftime("%Y-%m") if row["obs_date"] else "unknown"
+            groups.setdefault(month, []).append(row)
+        for month, group in groups.items():
+            _write_parquet(pa, group, columns, os.path.join(table_dir, f"obs_month={month}", filename))
+    else:
+        _write_parquet(pa, rows, columns, os.path.join(table_dir, filename))
+
+
+def _export_late_rows(pa, cursor, directory, name, state, batch=100):
+    """Export rows that committed inside earlier holes and forget holes older than HOLE_GRACE_SECONDS."""
+    source, key, _, columns = TABLES[name]
+    holes = state["holes"].get(name, [])
+    if not holes:
+        return 0
+    found = []
+    for i in range(0, len(holes), batch):
+        chunk = holes[i:i + batch]
+        cursor.execute(f"SELECT {', '.join(c for c, _ in columns)} FROM {source} WHERE "
+                       + " OR ".join([f"{key} BETWEEN %s AND %s"] * len(chunk)) + f" ORDER BY {key}",
+                       tuple(bound for first, last, _ in chunk for bound in (first, last)))
+        found.extend(cursor.fetchall())
+    if found:
+        found.sort(key=lambda row: row[key])
+        _write_part(pa, found, name, directory)
+    ids = [row[key] for row in found]
+    now = time.time()
+    state["holes"][name] = [[first, last, missed] for hole_first, hole_last, missed in holes
+                            if now - missed <= HOLE_GRACE_SECONDS
+                            for first, last in change_feed.fill_gaps([(hole_first, hole_last)], ids)]
+    _save_state(directory, state)
+    return len(found)
+
+
+def _export_incremental(pa, conn, directory, name, state, chunk_size):
+    source, key, _, columns = TABLES[name]
+    high_water = state["high_water"].get(name, 0)
+    _drop_parts_above(os.path.join(directory, name), high_water)
+
+    cursor = conn.cursor(dictionary=True)
+    try:
+        exported = _export_late_rows(pa, cursor, directory, name, state)
+        while True:
+            cursor.execute(
+                f"SELECT {', '.join(c for c, _ in columns)} FROM {source} WHERE {key} > %s ORDER BY {key} LIMIT %s",
+                (high_water, chunk_size)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            _write_part(pa, rows, name, directory)
+            high_water, holes = change_feed.advance(high_water, [(row[key],) for row in rows])
+            exported += len(rows)
+            state["high_water"][name] = high_water
+            state["holes"].setdefault(name, []).extend([first, last, time.time()] for first, last in holes)
+            _save_state(directory, state)
+            if len(rows) < chunk_size:
+                break
+    finally:
+        cursor.close()
+    return exported
+
+
+def export_snapshot(conn, directory=DEFAULT_DIR, full=False, chunk_size=DEFAULT_CHUNK_SIZE, on_table=None):
+    """
+    Bring the Parquet snapshot in `directory` up to date from `conn`.
+    full=True discards the fact-table files and high-water marks and exports everything again.
+    on_table(name, rows, seconds) is called after each table.
+    Returns (success, report): report maps table -> rows exported; on failure it is an error message.
+    """
+    try:
+        pa = _require_pyarrow()
+    except RuntimeError as e:
+        return False, str(e)
+
+    os.makedirs(directory, exist_ok=True)
+    state = load_state(directory)
+    if full:
+        for name, (_, key, _, _) in TABLES.items():
+            if key:
+                _drop_parts_above(os.path.join(directory, name), -1)
+        state = {"high_water": {}, "holes": {}, "exported_at": {}}
+        _save_state(directory, state)
+
+    report = {}
+    try:
+        for name, (_, key, _, _) in TABLES.items():
+            t0 = time.perf_counter()
+            if key:
+                report[name] = _export_incremental(pa, conn, directory, name, state, chunk_size)
+            else:
+                report[name] = _export_full(pa, conn, directory, name)
+            state["exported_at"][name] = time.time()
+            _save_state(directory, state)
+            if on_table:
+                on_table(name, report[name], time.perf_counter() - t0)
+    except (storage.Error, OSError) as e:
+        return False, f"Export stopped: {e}"
+    return True, report
+
+
+# ---------- QUERY ENGINE ----------
+class AnalyticsEngine:
+    """
+    In-process DuckDB over a snapshot directory. Each snapshot table is a view named like its
+    MySQL table (Species, Observation, ...), so the app's SQL can run on either.
+    Safe to share between threads: every query runs on its own DuckDB cursor.
+    """
+    def __init__(self, directory=DEFAULT_DIR):
+        try:
+            import duckdb
+        except ImportError:
+            raise RuntimeError("Analytics mode requires duckdb (pip install duckdb)")
+        self.directory = directory
+        self._errors = duckdb.Error
+        self._db = duckdb.connect(database=":memory:")
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self):
+        """(Re)create the views; call after an export adds a table's first files."""
+        with self._lock:
+            for name, (source, _, partition, columns) in TABLES.items():
+                pattern = os.path.join(self.directory, name, "**", "*.parquet")
+                if glob.glob(pattern, recursive=True):
+                    hive = ", hive_partitioning = true" if partition else ""
+                    # union_by_name: files written before a column was added read it as NULL
+                    select = f"SELECT * FROM read_parquet('{pattern}', union_by_name = true{hive})"
+                else:
+                    # no files yet: an empty view with the right columns
+                    select = "SELECT " + ", ".join(
+                        f"CAST(NULL AS {_duckdb_type(kind)}) AS {col}" for col, kind in columns
+                    ) + " WHERE false"
+                try:
+                    self._db.execute(f"CREATE OR REPLACE VIEW {source} AS {select}")
+                except self._errors as e:
+                    raise RuntimeError(f"Cannot read the {name} snapshot: {e}")
+
+    def query(self, sql, params=None):
+        """
+        Run one query (MySQL-style %s placeholders are accepted) and return a DataFrame.
+        DuckDB errors (e.g. an unreadable file) are raised as RuntimeError.
+        """
+        cursor = self._db.cursor()
+        try:
+            return cursor.execute(sql.replace("%s", "?"), list(params or [])).df()
+        except self._errors as e:
+            raise RuntimeError(f"Analytics query failed: {e}")
+        finally:
+            cursor.close()
+
+    def report(self, name):
+        return self.query(REPORTS[name][1])
+
+    def freshness(self):
+        """{table: seconds since its last export} (None if never exported)."""
+        exported_at = load_state(self.directory).get("exported_at", {})
+        now = time.time()
+        return {name: (now - exported_at[name]) if name in exported_at else None for name in TABLES}
+
+    def dashboard_summary(self):
+        """Same shape as app.fetch_dashboard_summary()."""
+        totals = self.query("""
+            SELECT (SELECT COUNT(*) FROM Species) AS Species,
+                   (SELECT COUNT(*) FROM Location) AS Location,
+                   (SELECT COUNT(*) FROM Observation) AS Observation,
+                   (SELECT COUNT(*) FROM Conservation_Action) AS Conservation_Action
+        """).iloc[0]
+        species_status = self.query("""
+            SELECT conservation_status, COUNT(*) AS count
+            FROM Species
+            GROUP BY conservation_status
+        """)
+        pollution = self.query("""
+            SELECT l.region, AVG(wq.pollution_index) AS avg_pollution
+            FROM Water_Quality wq
+            JOIN Location l ON wq.location_id = l.location_id
+            GROUP BY l.region
+        """)
+        if not pollution.empty:
+            pollution["avg_pollution"] = pollution["avg_pollution"].astype(float)
+        ages = [age for age in self.freshness().values() if age is not None]
+        return {
+            "totals": {k: int(v) for k, v in totals.items()},
+            "species_status": species_status,
+            "pollution": pollution,
+            "age_seconds": max(ages) if ages else None,
+        }
+
+    def observation_trend(self, grain="week", species_id=None, location_id=None, by=None):
+        """Same shape as app.fetch_observation_trend(), computed from the Observation snapshot."""
+        if grain not in ("day", "week", "month"):
+            raise ValueError("grain must be 'day', 'week' or 'month'")
+        series = {
+            None: ("", "", ""),
+            "species": (", o.species_id, COALESCE(s.common_name, 'Unknown') AS species",
+                        "LEFT JOIN Species s ON o.species_id = s.species_id", ", o.species_id, s.common_name"),
+            "location": (", o.location_id, COALESCE(l.location_name, 'Unknown') AS location",
+                         "LEFT JOIN Location l ON o.location_id = l.location_id", ", o.location_id, l.location_name"),
+        }
+        columns, join, group = series[by]
+        where, params = ["o.obs_date IS NOT NULL"], []
+        if species_id is not None:
+            where.append("o.species_id = %s")
+            params.append(species_id)
+        if location_id is not None:
+            where.append("o.location_id = %s")
+            params.append(location_id)
+        df = self.query(f"""
+            SELECT CAST(date_trunc('{grain}', o.obs_date) AS DATE) AS bucket_start{columns},
+                   COUNT(*) AS sightings, COALESCE(SUM(o.count_observed), 0) AS total_count
+            FROM Observation o
+            {join}
+            WHERE {' AND '.join(where)}
+            GROUP BY 1{group}
+            ORDER BY 1
+        """, params)
+        if not df.empty:
+            df["sightings"] = df["sightings"].astype(int)
+            df["total_count"] = df["total_count"].astype(int)
+        return df
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analytics snapshot export and reports")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="bring the Parquet snapshot up to date")
+    export.add_argument("--full", action="store_true", help="re-export every row")
+    export.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    export.add_argument("--dir", default=None, help="snapshot directory (defaults to the app's)")
+    report = sub.add_parser("report", help="run a report against the snapshot")
+    report.add_argument("name", choices=sorted(REPORTS))
+    report.add_argument("--dir", default=None)
+    args = parser.parse_args(argv)
+
+    import app  # deferred: only the CLI needs the app's connection settings
+
+    directory = args.dir or app.ANALYTICS_DIR
+    if args.command == "report":
+        print(AnalyticsEngine(directory).report(args.name).to_string(index=False))
+        return 0
+
+    conn = app.get_db_connection()
+    if not conn:
+        print("Could not connect to the database")
+        return 1
+    try:
+        ok, result = export_snapshot(conn, directory, full=args.full, chunk_size=args.chunk_size,
+                                     on_table=lambda n, rows, s: print(f"{n}: {rows} row(s) in {s:.1f}s"))
+    finally:
+        conn.close()
+    if not ok:
+        print(result)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
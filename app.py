@@ -1,130 +1,625 @@
 # app.py
 import streamlit as st
-import mysql.connector
-from mysql.connector import errorcode
-from datetime import datetime
-import pandas as pd
+from datetime import timedelta
 import os
+import sys
+import queue
+import threading
+import time
+from collections import OrderedDict
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+
+import analytics
+import change_feed
+import frames
+import instrumentation
+import lazy_import
+import partitions
+import replicas
+import schema_migrations
+import species_search
+import sql_restore
+import sql_script
+import storage
+import views
+
+# pandas is imported on first use (see lazy_import), so pages that show no tables never load it
+pd = lazy_import.module("pandas")
 
 # ---------- CONFIG ----------
-DB_USER = "root"
-DB_PASSWORD = "password"   # kept from original snippet
-DB_HOST = "localhost"
+DB_USER = os.environ.get("MARINE_DB_USER", "root")
+DB_PASSWORD = os.environ.get("MARINE_DB_PASSWORD", "password")   # kept from original snippet
+DB_HOST = os.environ.get("MARINE_DB_HOST", "localhost")
 DB_NAME = "marine_db"
 
+# Storage backend: "mysql" (the server above) or "sqlite" (an embedded file at SQLITE_PATH, see storage.py)
+DB_BACKEND = os.environ.get("MARINE_DB_BACKEND", "mysql")
+SQLITE_PATH = os.environ.get("MARINE_SQLITE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "marine.db"))
+
+# Read replicas (MySQL only, see replicas.py): comma-separated hosts that serve the read-only helpers
+DB_REPLICA_HOSTS = [h.strip() for h in os.environ.get("MARINE_DB_REPLICA_HOSTS", "").split(",") if h.strip()]
+REPLICA_MAX_LAG = float(os.environ.get("MARINE_REPLICA_MAX_LAG", str(replicas.MAX_LAG_SECONDS)))          # seconds behind before a replica gets no reads
+REPLICA_CHECK_INTERVAL = float(os.environ.get("MARINE_REPLICA_CHECK_INTERVAL", str(replicas.CHECK_INTERVAL)))   # seconds between health checks
+
+# Connection pool settings (shared by every Streamlit session in this process)
+DB_POOL_SIZE = int(os.environ.get("MARINE_DB_POOL_SIZE", "8"))
+DB_POOL_TIMEOUT = float(os.environ.get("MARINE_DB_POOL_TIMEOUT", "10"))           # seconds to wait for a free connection
+DB_POOL_RECYCLE = float(os.environ.get("MARINE_DB_POOL_RECYCLE", "1800"))         # replace connections older than this
+DB_POOL_PING_AFTER = float(os.environ.get("MARINE_DB_POOL_PING_AFTER", "30"))     # ping connections idle longer than this
+
+# Parallel connections used by the DB Init fast-restore mode
+RESTORE_WORKERS = int(os.environ.get("MARINE_RESTORE_WORKERS", "4"))
+
+# Lookup-table cache (Species / Location / Observer dropdowns)
+REFERENCE_CACHE_TTL = float(os.environ.get("MARINE_REFERENCE_CACHE_TTL", "300"))   # seconds
+REFERENCE_CACHE_MAX_ENTRIES = int(os.environ.get("MARINE_REFERENCE_CACHE_MAX_ENTRIES", "32"))
+
+# Dashboard metrics come from Dashboard_Summary; rebuild it when the last full refresh is older than this
+DASHBOARD_SUMMARY_MAX_AGE = float(os.environ.get("MARINE_DASHBOARD_SUMMARY_MAX_AGE", "900"))   # seconds
+
+# Dashboard panels load concurrently on this many threads; a panel with no data after the timeout is skipped
+DASHBOARD_WORKERS = int(os.environ.get("MARINE_DASHBOARD_WORKERS", "4"))
+DASHBOARD_PANEL_TIMEOUT = float(os.environ.get("MARINE_DASHBOARD_PANEL_TIMEOUT", "8"))   # seconds
+
+# Maximum number of species returned by Search Species
+SPECIES_SEARCH_LIMIT = int(os.environ.get("MARINE_SPECIES_SEARCH_LIMIT", "25"))
+
+# Options shown at once by the Manage Data record pickers (type to narrow down the rest)
+RECORD_PICKER_MAX_OPTIONS = int(os.environ.get("MARINE_RECORD_PICKER_MAX_OPTIONS", "200"))
+
+# Rows per page in the Manage Data observation browser
+OBSERVATION_PAGE_SIZE = int(os.environ.get("MARINE_OBSERVATION_PAGE_SIZE", "50"))
+
+# Listings are streamed into DataFrames this many rows at a time (see frames.py)
+RESULT_CHUNK_ROWS = int(os.environ.get("MARINE_RESULT_CHUNK_ROWS", str(frames.CHUNK_ROWS)))
+LISTING_MAX_ROWS = int(os.environ.get("MARINE_LISTING_MAX_ROWS", "0"))      # 0 = no cap
+LISTING_MAX_MB = float(os.environ.get("MARINE_LISTING_MAX_MB", "0"))        # 0 = no cap
+
+# Recent observations are looked up in this many days first, so only the newest partitions are read
+RECENT_OBSERVATIONS_WINDOW_DAYS = int(os.environ.get("MARINE_RECENT_OBSERVATIONS_WINDOW_DAYS", "90"))
+
+# Windows offered for the Dashboard pollution chart (days; None = all readings)
+POLLUTION_WINDOWS = [None, 7, 30, 365]
+
+# Observation_Change rows older than this are deleted by "Prune Change Log" on DB Init
+CHANGE_LOG_RETENTION_DAYS = int(os.environ.get("MARINE_CHANGE_LOG_RETENTION_DAYS", str(change_feed.DEFAULT_RETENTION_DAYS)))
+
+# Empty monthly partitions kept ready ahead of today (see partitions.py)
+PARTITION_MONTHS_AHEAD = int(os.environ.get("MARINE_PARTITION_MONTHS_AHEAD", str(partitions.MONTHS_AHEAD)))
+
+# IDs per `WHERE id IN (...)` statement in the bulk delete / update helpers
+BULK_CHUNK_SIZE = int(os.environ.get("MARINE_BULK_CHUNK_SIZE", "500"))
+
+# Parquet snapshot used by the analytics export and the Dashboard/Reports analytics mode
+ANALYTICS_DIR = os.environ.get("MARINE_ANALYTICS_DIR", analytics.DEFAULT_DIR)
+
+# Diagnostics: statements slower than this are logged with their EXPLAIN plan (empty disables)
+SLOW_QUERY_MS = os.environ.get("MARINE_SLOW_QUERY_MS", "500")
+# Serve Prometheus metrics on http://<host>:<port>/metrics when set
+METRICS_PORT = os.environ.get("MARINE_METRICS_PORT", "")
+
 # Path provided by you (Windows). If you keep SQL in another path, change this.
 DEFAULT_SQL_PATH = r"C:\Users\klson\OneDrive\Desktop\marine_species_projectold.sql"
 # Also keep fallback to uploaded file location used during development/testing
 FALLBACK_SQL_PATH = "/mnt/data/marine_species_projectold.sql"
 
+# ---------- CONNECTION POOL ----------
+class PooledConnection:
+    """
+    Thin wrapper around a pooled database connection.
+    Behaves like the underlying connection, but close() hands it back to the pool.
+    """
+    def __init__(self, pool, raw_conn, created_at):
+        self._pool = pool
+        self._raw = raw_conn
+        self._created_at = created_at
+        self._released = False
+        self.read_only = pool.read_only
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._raw.cursor(*args, **kwargs)
+        if self._pool.recorder is not None:
+            cursor = RecordingCursor(cursor, self._pool.recorder)
+        return instrumentation.InstrumentedCursor(cursor)
+
+    def is_connected(self):
+        if self._released:
+            return False
+        return self._raw.is_connected()
+
+    def close(self):
+        if self._released:
+            return
+        self._released = True
+        self._pool.release(self._raw, self._created_at)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class RecordingCursor:
+    """Cursor wrapper that reports every (sql, params) it executes to `sink`; used by the index advisor."""
+    def __init__(self, cursor, sink):
+        self._cursor = cursor
+        self._sink = sink
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        self._sink(operation, params)
+        return self._cursor.execute(operation, params, *args, **kwargs)
+
+
+class ConnectionPool:
+    """
+    Process-wide pool of database connections, opened by connect() (see storage).
+    - at most `size` connections are open at once; callers wait up to `timeout` seconds for one
+    - connections older than `recycle` seconds are closed and replaced
+    - connections idle longer than `ping_after` seconds are pinged before being handed out
+    - read_only marks a replica's pool; its connections must only be used for SELECTs
+    """
+    def __init__(self, size, timeout, recycle, ping_after, connect, read_only=False):
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+        self.connect = connect
+        self.read_only = read_only
+        self.recorder = None    # optional callable(sql, params), see schema_migrations.recording
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._stats = {
+            "acquired": 0,
+            "released": 0,
+            "created": 0,
+            "recycled": 0,
+            "health_check_failures": 0,
+            "timeouts": 0,
+            "in_use": 0,
+            "total_wait_ms": 0.0,
+            "max_wait_ms": 0.0,
+        }
+
+    def _bump(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def _connect(self):
+        raw = self.connect()
+        self._bump("created")
+        return raw, time.monotonic()
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _checkout_idle(self):
+        """Pop an idle connection that passes the age and health checks, or return None."""
+        while True:
+            try:
+                raw, created_at, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+            now = time.monotonic()
+            if self.recycle and now - created_at > self.recycle:
+                self._bump("recycled")
+                self._discard(raw)
+                continue
+            if now - last_used > self.ping_after:
+                try:
+                    raw.ping(reconnect=False)
+                except storage.Error:
+                    self._bump("health_check_failures")
+                    self._discard(raw)
+                    continue
+            return raw, created_at
+
+    def acquire(self):
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            self._bump("timeouts")
+            instrumentation.registry.error()
+            raise storage.PoolError(
+                f"No free database connection after {self.timeout:.0f}s (pool size {self.size})"
+            )
+        try:
+            checked_out = self._checkout_idle()
+            if checked_out is None:
+                checked_out = self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+        waited_ms = (time.monotonic() - start) * 1000
+        instrumentation.registry.observe("acquire_seconds", waited_ms / 1000)
+        with self._lock:
+            self._stats["acquired"] += 1
+            self._stats["in_use"] += 1
+            self._stats["total_wait_ms"] += waited_ms
+            self._stats["max_wait_ms"] = max(self._stats["max_wait_ms"], waited_ms)
+        raw, created_at = checked_out
+        return PooledConnection(self, raw, created_at)
+
+    def release(self, raw, created_at):
+        """Return a connection to the pool. Open transactions are rolled back so the next borrower starts clean."""
+        try:
+            if raw.is_connected():
+                raw.rollback()
+                self._idle.put((raw, created_at, time.monotonic()))
+            else:
+                self._discard(raw)
+        except Exception:
+            self._discard(raw)
+        finally:
+            with self._lock:
+                self._stats["released"] += 1
+                self._stats["in_use"] -= 1
+            self._slots.release()
+
+    def dispose(self):
+        """Close every idle connection (e.g. after the database was dropped and recreated)."""
+        while True:
+            try:
+                raw, _, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(raw)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["size"] = self.size
+        stats["idle"] = self._idle.qsize()
+        stats["avg_wait_ms"] = stats["total_wait_ms"] / stats["acquired"] if stats["acquired"] else 0.0
+        return stats
+
+
+@st.cache_resource
+def get_storage_backend():
+    """The configured storage backend (DB_BACKEND), shared by every session."""
+    if DB_BACKEND == "sqlite":
+        return storage.SQLiteBackend(SQLITE_PATH)
+    return storage.MySQLBackend(host=DB_HOST, user=DB_USER, password=DB_PASSWORD)
+
+@st.cache_resource
+def get_connection_pool(database=DB_NAME):
+    """One pool per database, created once and shared across all Streamlit sessions and reruns."""
+    backend = get_storage_backend()
+    return ConnectionPool(DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PING_AFTER,
+                          lambda: backend.connect(database))
+
+def open_dedicated_connection(database=DB_NAME):
+    """A new connection outside the pool, for work that changes session settings (e.g. fast restore)."""
+    return get_storage_backend().connect(database)
+
+def open_replica_connection(host, database=DB_NAME):
+    """A new connection to one read replica, outside its pool."""
+    return storage.MySQLBackend(host=host, user=DB_USER, password=DB_PASSWORD).connect(database)
+
+@st.cache_resource
+def get_replica_router():
+    """Routes reads across DB_REPLICA_HOSTS, or None when there are none (or the backend is embedded)."""
+    if not DB_REPLICA_HOSTS or get_storage_backend().embedded:
+        return None
+    members = []
+    for host in DB_REPLICA_HOSTS:
+        connect = lambda host=host: open_replica_connection(host)
+        pool = ConnectionPool(DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PING_AFTER, connect,
+                              read_only=True)
+        members.append(replicas.Replica(host, pool, connect))
+    return replicas.ReplicaRouter(members, REPLICA_MAX_LAG, REPLICA_CHECK_INTERVAL)
+
+def _pin_reads_to_primary():
+    """
+    Keep this session's reads on the primary until any replica that is still usable has caught up
+    with what it just wrote (read-your-own-writes for the rerun after a change).
+    """
+    if DB_REPLICA_HOSTS:
+        st.session_state["_primary_reads_until"] = time.monotonic() + REPLICA_MAX_LAG + REPLICA_CHECK_INTERVAL
+
+def get_read_pool():
+    """Pool-like source for read-only work: the replicas when configured, the primary's pool otherwise."""
+    primary = get_connection_pool(DB_NAME)
+    router = get_replica_router()
+    if router is None or time.monotonic() < st.session_state.get("_primary_reads_until", 0):
+        return primary
+    return router.reader(primary)
+
+# ---------- INSTRUMENTATION ----------
+def _explain_slow_query(sql, params):
+    """ EXPLAIN on a dedicated connection, so the explain itself is neither pooled nor measured. """
+    conn = open_dedicated_connection(DB_NAME)
+    try:
+        return schema_migrations.explain(conn, sql, params)
+    finally:
+        conn.close()
+
+def _pool_gauges(pool):
+    stats = pool.stats()
+    return {"marine_db_pool_in_use": stats["in_use"], "marine_db_pool_idle": stats["idle"],
+            "marine_db_pool_timeouts_total": stats["timeouts"]}
+
+@st.cache_resource
+def setup_instrumentation():
+    """ Configure slow-query logging and start the metrics endpoint once per process. """
+    instrumentation.slow_queries.threshold = float(SLOW_QUERY_MS) / 1000 if SLOW_QUERY_MS else None
+    # the plans are read as MySQL EXPLAIN output
+    instrumentation.slow_queries.explain = None if get_storage_backend().embedded else _explain_slow_query
+    if METRICS_PORT:
+        pool = get_connection_pool(DB_NAME)
+        return instrumentation.start_http_server(int(METRICS_PORT), lambda: _pool_gauges(pool))
+    return None
+
+def _to_frame(rows):
+    """ pd.DataFrame(rows), timed as dataframe_seconds. """
+    with instrumentation.timer("dataframe_seconds"):
+        return pd.DataFrame(rows)
+
+def _read_frame(cursor, capped=False, categorical=()):
+    """
+    The executed query's rows streamed into a compact DataFrame (see frames.read_frame).
+    capped=True applies LISTING_MAX_ROWS / LISTING_MAX_MB; check frame.attrs["truncated"].
+    """
+    caps = {}
+    if capped and LISTING_MAX_ROWS:
+        caps["max_rows"] = LISTING_MAX_ROWS
+    if capped and LISTING_MAX_MB:
+        caps["max_bytes"] = int(LISTING_MAX_MB * 1024 * 1024)
+    return frames.read_frame(cursor, chunk_size=RESULT_CHUNK_ROWS, categorical=categorical, **caps)
+
+def _listing_limit():
+    """ A LIMIT clause matching LISTING_MAX_ROWS (one extra row shows that the listing was cut), or "". """
+    return f"LIMIT {LISTING_MAX_ROWS + 1}" if LISTING_MAX_ROWS else ""
+
+# ---------- REFERENCE DATA CACHE ----------
+class ReferenceCache:
+    """
+    Small in-process LRU cache with a TTL, used for the Species/Location/Observer lookup tables.
+    Writers patch or invalidate entries through patch()/invalidate(); each change bumps a
+    per-key generation, and invalidating everything bumps a cache-wide epoch, so a load that
+    raced with a write is never stored.
+    """
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> (value, loaded_at)
+        self._generations = {}
+        self._epoch = 0                 # bumped by invalidate(None), which also covers keys not loaded yet
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0, "patches": 0}
+
+    def get_or_load(self, key, loader):
+        """Return a copy of the cached list for `key`, calling loader() on a miss. A loader result of None is not cached."""
+        return self.get_versioned(key, loader)[0]
+
+    def get_versioned(self, key, loader):
+        """
+        Like get_or_load, but returns (rows, version). The version changes whenever the entry is
+        reloaded, patched or invalidated, so values derived from the rows can be cached against it.
+        Version is None when the rows could not be cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, loaded_at = entry
+                if time.monotonic() - loaded_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return list(value), ((self._epoch, self._generations.get(key, 0)), loaded_at)
+                del self._entries[key]
+                self._stats["expirations"] += 1
+            self._stats["misses"] += 1
+            generation = (self._epoch, self._generations.get(key, 0))
+
+        value = loader()
+        if value is None:
+            return None, None
+
+        version = None
+        with self._lock:
+            if (self._epoch, self._generations.get(key, 0)) == generation:
+                loaded_at = time.monotonic()
+                self._entries[key] = (list(value), loaded_at)
+                self._entries.move_to_end(key)
+                version = (generation, loaded_at)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._stats["evictions"] += 1
+        return list(value), version
+
+    def patch(self, key, fn):
+        """Apply fn(rows) -> rows to a cached entry in place of a reload. Missing entries are left alone."""
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            value, loaded_at = entry
+            self._entries[key] = (fn(list(value)), loaded_at)
+            self._stats["patches"] += 1
+
+    def invalidate(self, key=None):
+        """Drop one entry, or every entry when key is None."""
+        with self._lock:
+            if key is None:
+                self._epoch += 1
+                self._stats["invalidations"] += len(self._entries)
+                self._entries.clear()
+                return
+            self._generations[key] = self._generations.get(key, 0) + 1
+            if self._entries.pop(key, None) is not None:
+                self._stats["invalidations"] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+@st.cache_resource
+def get_reference_cache():
+    """The shared lookup-table cache for this process."""
+    return ReferenceCache(REFERENCE_CACHE_TTL, REFERENCE_CACHE_MAX_ENTRIES)
+
+# Primary key of each cached lookup table
+REFERENCE_TABLE_KEYS = {
+    "Species": "species_id",
+    "Location": "location_id",
+    "Observer": "observer_id",
+}
+
+@st.cache_resource
+def get_species_index():
+    """The shared trigram index behind Search Species (see species_search)."""
+    return species_search.TrigramIndex(["common_name", "scientific_name"])
+
+def _append_reference_row(table_name, row):
+    get_reference_cache().patch(table_name, lambda rows: rows + [row])
+    if table_name == "Species":
+        get_species_index().upsert(row["species_id"], row)
+
+def _update_reference_row(table_name, record_id, changes):
+    _update_reference_rows(table_name, [record_id], changes)
+
+def _update_reference_rows(table_name, record_ids, changes):
+    id_column = REFERENCE_TABLE_KEYS[table_name]
+    record_ids = set(record_ids)
+    get_reference_cache().patch(
+        table_name,
+        lambda rows: [{**r, **changes} if r[id_column] in record_ids else r for r in rows]
+    )
+    get_observation_feed().clear_cached()    # cached observation listings carry the old names
+    if table_name == "Species":
+        for record_id in record_ids:
+            get_species_index().update(record_id, changes)
+
+def _remove_reference_row(table_name, record_id):
+    _remove_reference_rows(table_name, [record_id])
+
+def _remove_reference_rows(table_name, record_ids):
+    id_column = REFERENCE_TABLE_KEYS[table_name]
+    record_ids = set(record_ids)
+    get_reference_cache().patch(
+        table_name,
+        lambda rows: [r for r in rows if r[id_column] not in record_ids]
+    )
+    if table_name == "Species":
+        for record_id in record_ids:
+            get_species_index().remove(record_id)
+
 # ---------- DB CONNECTION ----------
-def get_db_connection(database=DB_NAME):
-    """Return a MySQL connection to `database`. If database is None connect to server only"""
+def get_db_connection(database=DB_NAME, read_only=False):
+    """
+    Borrow a connection to `database` from the pool. If database is None connect to server only.
+    read_only=True may hand out a replica connection (see get_read_pool); anything else goes to the
+    primary and keeps the session's next reads there too.
+    Call close() on the returned connection to give it back to the pool.
+    """
     try:
-        conn_kwargs = {
-            "host": DB_HOST,
-            "user": DB_USER,
-            "password": DB_PASSWORD,
-        }
-        if database:
-            conn_kwargs["database"] = database
-        conn = mysql.connector.connect(**conn_kwargs)
-        return conn
-    except mysql.connector.Error as e:
+        if read_only and database == DB_NAME:
+            return get_read_pool().acquire()
+        if database == DB_NAME:
+            _pin_reads_to_primary()
+        return get_connection_pool(database).acquire()
+    except storage.Error as e:
+        st.error(f"Database connection error: {e}")
+        return None
+
+def get_shared_read_connection():
+    """
+    Borrow a primary connection for reads that fill process-wide caches (the reference tables).
+    A replica may not have another session's latest write yet, and once
+    its rows are cached every session would see them. Unlike get_db_connection() this does not
+    pin the session's reads to the primary.
+    """
+    try:
+        return get_connection_pool(DB_NAME).acquire()
+    except storage.Error as e:
         st.error(f"Database connection error: {e}")
         return None
 
-# ---------- SQL FILE EXECUTOR (handles DELIMITER // blocks) ----------
-def execute_sql_file(conn, sql_file_path):
+# ---------- SQL FILE EXECUTOR (streaming, handles DELIMITER // blocks) ----------
+def execute_sql_file(conn, sql_file_path, start_statement=0, on_progress=None):
     """
-    Execute SQL script with basic support for DELIMITER blocks.
-    This attempts to parse the file and execute statements in order.
+    Execute a SQL script statement by statement without loading it into memory (see sql_script).
+    `start_statement` resumes a previous run from that 0-based statement number.
+    on_progress(info) receives bytes_read/total_bytes, statements and throughput while it runs.
     """
     if not os.path.exists(sql_file_path):
         return False, f"SQL file not found at: {sql_file_path}"
     try:
-        cursor = conn.cursor()
-        with open(sql_file_path, "r", encoding="utf-8") as f:
-            script = f.read()
-    except Exception as e:
+        total_bytes = os.path.getsize(sql_file_path)
+        with open(sql_file_path, "rb") as f:
+            ok, info = sql_script.execute_script(conn, f, total_bytes=total_bytes,
+                                                 start_statement=start_statement, on_progress=on_progress)
+    except OSError as e:
         return False, f"Failed to read SQL file: {e}"
 
-    # Basic parser: supports changing delimiter (e.g., DELIMITER // ... //)
-    current_delim = ";"
-    statement = ""
-    lines = script.splitlines()
-    for raw_line in lines:
-        line = raw_line.strip()
-        if not line and not statement:
-            continue
-
-        # Handle delimiter change lines
-        if line.upper().startswith("DELIMITER"):
-            parts = line.split()
-            if len(parts) >= 2:
-                current_delim = parts[1]
-            else:
-                current_delim = ";"
-            continue
-
-        # Append line to running statement
-        statement += raw_line + "\n"
-
-        # If current delimiter appears at end of the statement, split and execute
-        if current_delim != ";":
-            # check if statement ends with delimiter on its own (after strip)
-            if statement.rstrip().endswith(current_delim):
-                exec_stmt = statement.rstrip()[:-len(current_delim)].strip()
-                if exec_stmt:
-                    try:
-                        cursor.execute(exec_stmt)
-                    except mysql.connector.Error as e:
-                        # Continue on error but return message at end
-                        conn.rollback()
-                        cursor.close()
-                        return False, f"Error executing statement: {e}\nStatement:\n{exec_stmt[:500]}"
-                statement = ""
-        else:
-            # default delimiter ';' — execute when a semicolon appears at the end
-            if statement.strip().endswith(";"):
-                exec_stmt = statement.strip()[:-1].strip()
-                if exec_stmt:
-                    try:
-                        cursor.execute(exec_stmt)
-                    except mysql.connector.Error as e:
-                        conn.rollback()
-                        cursor.close()
-                        return False, f"Error executing statement: {e}\nStatement:\n{exec_stmt[:500]}"
-                statement = ""
-
-    # in case any trailing statement remains (no delimiter)
-    if statement.strip():
-        try:
-            cursor.execute(statement)
-        except mysql.connector.Error as e:
-            conn.rollback()
-            cursor.close()
-            return False, f"Error executing final statement: {e}\nStatement:\n{statement[:500]}"
-
-    conn.commit()
-    cursor.close()
-    return True, "SQL file executed successfully"
+    rate = f"{info['statements_per_sec']:.0f} statements/s, {info['bytes_per_sec'] / 1e6:.1f} MB/s"
+    if not ok:
+        statement = (info.get('sql') or "")[:500]
+        return False, (f"Error executing statement {info['failed_statement']}: {info['error']}\n"
+                       f"Statement:\n{statement}\n"
+                       f"Fix the problem and resume from statement {info['failed_statement']}.")
+    return True, f"SQL file executed successfully ({info['executed']} statements, {rate})"
 
 # ---------- DB INIT FUNCTION ----------
-def ensure_database_initialized(sql_path=None):
+def restore_sql_file(sql_file_path, workers=RESTORE_WORKERS, on_phase=None):
+    """
+    Fast restore: load tables in parallel with constraints deferred (see sql_restore).
+    Returns (success, message, timings) where timings maps phase -> seconds.
+    """
+    try:
+        with open(sql_file_path, "rb") as f:
+            ok, report = sql_restore.restore_script(open_dedicated_connection, f, workers=workers, on_phase=on_phase)
+    except OSError as e:
+        return False, f"Failed to read SQL file: {e}", {}
+    except storage.Error as e:
+        return False, f"Could not connect to MySQL server: {e}", {}
+    if not ok:
+        return False, (f"Fast restore failed in the {report['phase']} phase: {report['error']}\n"
+                       f"Statement:\n{report['sql']}"), report["timings"]
+    return True, (f"Fast restore finished in {report['seconds']:.1f}s "
+                  f"({report['statements']} statements, {report['rows_statements']} loaded in parallel)"), report["timings"]
+
+def ensure_database_initialized(sql_path=None, start_statement=0, on_progress=None, fast=False, on_phase=None):
     """
     Ensures marine_db exists and, if not present, tries to create it by executing the SQL file.
+    A non-zero `start_statement` resumes an interrupted run, even if the database already exists.
+    With fast=True the script is loaded with restore_sql_file instead (start_statement is ignored).
     Returns (success: bool, message: str)
     """
+    backend = get_storage_backend()
+    if backend.embedded:
+        return _ensure_embedded_database(backend)
     # first try to connect to the database
-    conn = get_db_connection(database=DB_NAME)
-    if conn:
-        conn.close()
-        return True, f"Database '{DB_NAME}' exists and is reachable"
-    # If not, connect to server without specifying database and run SQL
-    server_conn = get_db_connection(database=None)
-    if not server_conn:
-        return False, "Could not connect to MySQL server to initialize database"
+    if not start_statement:
+        conn = get_db_connection(database=DB_NAME)
+        if conn:
+            conn.close()
+            return True, f"Database '{DB_NAME}' exists and is reachable"
+    # If not, connect to server without specifying database and run SQL.
+    # The script changes session state (USE, DELIMITER blocks), so this connection is not pooled.
+    try:
+        server_conn = open_dedicated_connection(database=None)
+    except storage.Error as e:
+        return False, f"Could not connect to MySQL server to initialize database: {e}"
 
     # Choose SQL path: user-specified or fallback
     if sql_path and os.path.exists(sql_path):
@@ -139,74 +634,292 @@ def ensure_database_initialized(sql_path=None):
                        f"{DEFAULT_SQL_PATH}\nor\n{FALLBACK_SQL_PATH}\n"
                        "Or update the path in the app settings")
 
-    success, msg = execute_sql_file(server_conn, use_path)
-    server_conn.close()
+    if fast:
+        server_conn.close()
+        success, msg, _ = restore_sql_file(use_path, on_phase=on_phase)
+    else:
+        success, msg = execute_sql_file(server_conn, use_path, start_statement=start_statement, on_progress=on_progress)
+        server_conn.close()
+    # The script drops and recreates the database, so idle pooled connections to it are no longer usable
+    get_connection_pool(DB_NAME).dispose()
+    get_reference_cache().invalidate()
+    get_species_index().clear()
+    if success:
+        mig_ok, mig_msg = run_schema_migrations()
+        return mig_ok, f"{msg}\n{mig_msg}"
     return success, msg
 
+def _ensure_embedded_database(backend):
+    """ Create the SQLite schema and sample data unless the file already has them (see storage). """
+    if backend.is_initialized():
+        return True, f"SQLite database at {backend.path} exists"
+    ok, msg = backend.initialize()
+    get_connection_pool(DB_NAME).dispose()
+    get_reference_cache().invalidate()
+    get_species_index().clear()
+    return ok, msg
+
+@instrumentation.helper
+def run_schema_migrations():
+    """
+    Apply pending files from migrations/ (see schema_migrations), then create any missing
+    monthly partitions (see partitions). Returns (success, message).
+    The SQLite schema is created complete, so there is nothing to do there.
+    """
+    if get_storage_backend().embedded:
+        return True, "SQLite schema is created complete; migrations and partitions are MySQL only"
+    try:
+        conn = open_dedicated_connection(DB_NAME)
+    except storage.Error as e:
+        return False, f"Could not connect to apply migrations: {e}"
+    try:
+        ok, msg = schema_migrations.apply_migrations(conn)
+        if not ok:
+            return ok, msg
+        ok, partition_msg = partitions.maintain(conn, PARTITION_MONTHS_AHEAD)
+        return ok, f"{msg}. {partition_msg}"
+    finally:
+        conn.close()
+
+@instrumentation.helper
+def fetch_partition_status():
+    """ {table: [{name, upper, rows}]} for the partitioned tables; None if the database is unreachable. """
+    conn = get_db_connection()
+    if not conn:
+        return None
+    try:
+        return partitions.status(conn)
+    finally:
+        conn.close()
+
+@instrumentation.helper
+def add_future_partitions():
+    """ Make sure PARTITION_MONTHS_AHEAD future months exist. Returns (success, message). """
+    try:
+        conn = open_dedicated_connection(DB_NAME)
+    except storage.Error as e:
+        return False, f"Could not connect: {e}"
+    try:
+        return partitions.maintain(conn, PARTITION_MONTHS_AHEAD)
+    finally:
+        conn.close()
+
+@instrumentation.helper
+def archive_partitions(before):
+    """
+    Move whole months that end on or before `before` out of Observation and Water_Quality
+    into archive tables (see partitions.archive_partitions). Returns (success, message).
+    """
+    try:
+        conn = open_dedicated_connection(DB_NAME)
+    except storage.Error as e:
+        return False, f"Could not connect: {e}"
+    archived = []
+    try:
+        # Observation first, so no live observation is left pointing at an archived reading
+        for table in partitions.PARTITIONED:
+            ok, result = partitions.archive_partitions(conn, table, before)
+            if not ok:
+                return False, result
+            archived.extend(result)
+    finally:
+        conn.close()
+    if not archived:
+        return True, "Nothing to archive"
+    return True, f"Archived {len(archived)} partition(s): " + ", ".join(archived)
+
+@instrumentation.helper
+def fetch_change_log_status():
+    """ Retained range of Observation_Change; None without a log or a connection. """
+    conn = get_db_connection()
+    if not conn:
+        return None
+    try:
+        return change_feed.log_status(conn)
+    finally:
+        conn.close()
+
+@instrumentation.helper
+def prune_change_log(older_than_days=CHANGE_LOG_RETENTION_DAYS):
+    """ Delete old Observation_Change rows; readers behind the pruned range reload in full. Returns (success, message). """
+    try:
+        conn = open_dedicated_connection(DB_NAME)
+    except storage.Error as e:
+        return False, f"Could not connect: {e}"
+    try:
+        return True, f"Deleted {change_feed.prune(conn, older_than_days)} change(s)"
+    except storage.Error as e:
+        return False, str(e)
+    finally:
+        conn.close()
+
 # ---------- DATA ACCESS HELPERS ----------
+# Loaders for the shared reference cache read from the primary (see get_shared_read_connection)
+def _load_species():
+    conn = get_shared_read_connection()
+    if not conn:
+        return None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT species_id, common_name, scientific_name, conservation_status FROM Species")
+        return cursor.fetchall()
+    finally:
+        conn.close()
+
+@instrumentation.helper
 def fetch_all_species():
-    conn = get_db_connection()
+    """ Cached; see ReferenceCache. """
+    return get_reference_cache().get_or_load("Species", _load_species) or []
+
+def _load_location():
+    conn = get_shared_read_connection()
     if not conn:
-        return []
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT species_id, common_name, scientific_name, conservation_status FROM Species")
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+        return None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT location_id, location_name, region, water_type FROM Location")
+        return cursor.fetchall()
+    finally:
+        conn.close()
 
+@instrumentation.helper
 def fetch_all_locations():
-    conn = get_db_connection()
+    """ Cached; see ReferenceCache. """
+    return get_reference_cache().get_or_load("Location", _load_location) or []
+
+def _load_observer():
+    conn = get_shared_read_connection()
     if not conn:
-        return []
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT location_id, location_name, region, water_type FROM Location")
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+        return None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT observer_id, name, organization, contact FROM Observer")
+        return cursor.fetchall()
+    finally:
+        conn.close()
 
+@instrumentation.helper
 def fetch_all_observers():
-    conn = get_db_connection()
+    """ Cached; see ReferenceCache. """
+    return get_reference_cache().get_or_load("Observer", _load_observer) or []
+
+# ---------- OBSERVATION CHANGE FEED ----------
+@st.cache_resource
+def get_observation_feed():
+    """ The process-wide memo of observation listings, reused until Observation_Change moves on (see change_feed). """
+    return change_feed.ChangeFeedMemo(ttl=REFERENCE_CACHE_TTL)
+
+@instrumentation.helper
+def fetch_observations_page(page_size=OBSERVATION_PAGE_SIZE, after=None, species_id=None, location_id=None,
+                            observer_id=None, date_from=None, date_to=None):
+    """
+    One page of observations, newest first, keyset-paginated on (obs_date, obs_id).
+    `after` is the (obs_date, obs_id) of the last row of the previous page (None for the first page).
+    Filters are applied in SQL; date_from/date_to are inclusive dates.
+    Returns (DataFrame, next_cursor); next_cursor is None on the last page.
+    """
+    where = []
+    params = []
+    if species_id is not None:
+        where.append("o.species_id = %s")
+        params.append(species_id)
+    if location_id is not None:
+        where.append("o.location_id = %s")
+        params.append(location_id)
+    if observer_id is not None:
+        where.append("o.observer_id = %s")
+        params.append(observer_id)
+    if date_from is not None:
+        where.append("o.obs_date >= %s")
+        params.append(date_from)
+    if date_to is not None:
+        where.append("o.obs_date < %s")
+        params.append(date_to + timedelta(days=1))
+    if after is not None:
+        after_date, after_id = after
+        if after_date is None:
+            # already inside the trailing block of undated rows (NULLs sort last in DESC order)
+            where.append("(o.obs_date IS NULL AND o.obs_id < %s)")
+            params.append(after_id)
+        else:
+            where.append("(o.obs_date < %s OR (o.obs_date = %s AND o.obs_id < %s) OR o.obs_date IS NULL)")
+            params.extend([after_date, after_date, after_id])
+
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+    params.append(page_size + 1)   # one extra row tells us whether another page exists
+
+    conn = get_db_connection(read_only=True)
     if not conn:
-        return []
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT observer_id, name, organization, contact FROM Observer")
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+        return pd.DataFrame(), None
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT o.obs_id, s.common_name, l.location_name, obs.name as observer_name, o.obs_date, o.count_observed
+            FROM Observation o
+            LEFT JOIN Species s ON o.species_id = s.species_id
+            LEFT JOIN Location l ON o.location_id = l.location_id
+            LEFT JOIN Observer obs ON o.observer_id = obs.observer_id
+            {where_sql}
+            ORDER BY o.obs_date DESC, o.obs_id DESC
+            LIMIT %s
+        """, tuple(params))
+        df = _read_frame(cursor)
+    finally:
+        conn.close()
 
-def fetch_all_observations_full():
-    """ Fetches all observations with key details for management. """
-    conn = get_db_connection()
-    if not conn: return pd.DataFrame()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("""
-        SELECT o.obs_id, s.common_name, l.location_name, obs.name as observer_name, o.obs_date, o.count_observed
-        FROM Observation o
-        LEFT JOIN Species s ON o.species_id = s.species_id
-        LEFT JOIN Location l ON o.location_id = l.location_id
-        LEFT JOIN Observer obs ON o.observer_id = obs.observer_id
-        ORDER BY o.obs_date DESC
-    """)
-    rows = cursor.fetchall()
-    conn.close()
-    return pd.DataFrame(rows)
+    next_cursor = None
+    if len(df) > page_size:
+        df = df.iloc[:page_size]
+        last = df.iloc[-1]
+        # back to plain Python values: they become query parameters for the next page
+        last_date = None if pd.isna(last['obs_date']) else last['obs_date'].to_pydatetime()
+        next_cursor = (last_date, int(last['obs_id']))
+    return df, next_cursor
 
+@instrumentation.helper
 def fetch_all_actions_full():
-    """ Fetches all conservation actions with key details. """
-    conn = get_db_connection()
+    """
+    Fetches all conservation actions with key details, up to the listing caps
+    (frame.attrs["truncated"] says whether some were left out).
+    """
+    conn = get_db_connection(read_only=True)
     if not conn: return pd.DataFrame()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("""
-        SELECT ca.action_id, s.common_name, ca.action_type, ca.description, ca.start_date, ca.end_date
-        FROM Conservation_Action ca
-        JOIN Species s ON ca.species_id = s.species_id
-        ORDER BY ca.start_date DESC
-    """)
-    rows = cursor.fetchall()
-    conn.close()
-    return pd.DataFrame(rows)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT ca.action_id, s.common_name, ca.action_type, ca.description, ca.start_date, ca.end_date
+            FROM Conservation_Action ca
+            JOIN Species s ON ca.species_id = s.species_id
+            ORDER BY ca.start_date DESC
+            {_listing_limit()}
+        """)
+        return _read_frame(cursor, capped=True, categorical=("common_name", "action_type"))
+    finally:
+        conn.close()
+
 
+@instrumentation.helper
+def _load_action_labels():
+    """ Picker labels for Conservation_Action, built by the database so no per-row work happens in Python. """
+    conn = get_shared_read_connection()
+    if not conn:
+        return None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT ca.action_id,
+                   CONCAT('ID ', ca.action_id, ': ', COALESCE(ca.action_type, 'None'),
+                          ' for ', COALESCE(s.common_name, 'None')) AS label
+            FROM Conservation_Action ca
+            JOIN Species s ON ca.species_id = s.species_id
+            ORDER BY ca.start_date DESC
+        """)
+        return cursor.fetchall()
+    finally:
+        conn.close()
 
+
+@instrumentation.helper
 def add_species(common_name, scientific_name, conservation_status):
     conn = get_db_connection()
     if not conn:
@@ -217,13 +930,22 @@ def add_species(common_name, scientific_name, conservation_status):
             "INSERT INTO Species (common_name, scientific_name, conservation_status) VALUES (%s, %s, %s)",
             (common_name, scientific_name, conservation_status)
         )
+        species_id = cursor.lastrowid
         conn.commit()
         cursor.close()
-        conn.close()
+        _append_reference_row("Species", {
+            "species_id": species_id,
+            "common_name": common_name,
+            "scientific_name": scientific_name,
+            "conservation_status": conservation_status,
+        })
         return True, "Species added"
-    except mysql.connector.Error as e:
+    except storage.Error as e:
         return False, str(e)
+    finally:
+        conn.close()
 
+@instrumentation.helper
 def add_observer(name, organization, contact):
     conn = get_db_connection()
     if not conn:
@@ -234,31 +956,49 @@ def add_observer(name, organization, contact):
             "INSERT INTO Observer (name, organization, contact) VALUES (%s, %s, %s)",
             (name, organization, contact)
         )
+        observer_id = cursor.lastrowid
         conn.commit()
         cursor.close()
-        conn.close()
+        _append_reference_row("Observer", {
+            "observer_id": observer_id,
+            "name": name,
+            "organization": organization,
+            "contact": contact,
+        })
         return True, "Observer added"
-    except mysql.connector.Error as e:
+    except storage.Error as e:
         return False, str(e)
+    finally:
+        conn.close()
 
-def add_water_quality(location_id, temperature, pH, salinity, pollution_index):
+@instrumentation.helper
+def add_water_quality(location_id, temperature, pH, salinity, pollution_index, measured_at=None):
+    """ measured_at defaults to now (the column default). """
     conn = get_db_connection()
     if not conn:
         return False, "DB connection failed"
     try:
         cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO Water_Quality (location_id, temperature, pH, salinity, pollution_index) VALUES (%s, %s, %s, %s, %s)",
-            (location_id, temperature, pH, salinity, pollution_index)
-        )
+        if measured_at is None:
+            cursor.execute(
+                "INSERT INTO Water_Quality (location_id, temperature, pH, salinity, pollution_index) VALUES (%s, %s, %s, %s, %s)",
+                (location_id, temperature, pH, salinity, pollution_index)
+            )
+        else:
+            cursor.execute(
+                "INSERT INTO Water_Quality (location_id, temperature, pH, salinity, pollution_index, measured_at) VALUES (%s, %s, %s, %s, %s, %s)",
+                (location_id, temperature, pH, salinity, pollution_index, measured_at)
+            )
         wq_id = cursor.lastrowid
         conn.commit()
         cursor.close()
-        conn.close()
         return True, wq_id
-    except mysql.connector.Error as e:
+    except storage.Error as e:
         return False, str(e)
+    finally:
+        conn.close()
 
+@instrumentation.helper
 def add_observation(species_id, location_id, observer_id, quality_id, obs_date, count_observed, remarks):
     conn = get_db_connection()
     if not conn:
@@ -271,95 +1011,610 @@ def add_observation(species_id, location_id, observer_id, quality_id, obs_date,
         )
         conn.commit()
         cursor.close()
-        conn.close()
         return True, "Observation logged"
-    except mysql.connector.Error as e:
+    except storage.Error as e:
         return False, str(e)
+    finally:
+        conn.close()
 
-def search_species_by_name(name):
+@instrumentation.helper
+def submit_observations(observations):
+    """
+    Record many observations in one connection and one transaction.
+    Each item is a dict with species_id, location_id, obs_date, count_observed, remarks and either
+    observer_id or new_observer={'name', 'organization', 'contact'}; an optional
+    water_quality={'temperature', 'pH', 'salinity', 'pollution_index'[, 'measured_at']} is stored
+    first and linked; its measured_at defaults to the observation's obs_date.
+    Nothing is written unless every row succeeds.
+    Returns (True, [{'obs_id', 'observer_id', 'quality_id'}, ...]) or (False, error message).
+    """
+    if not observations:
+        return True, []
     conn = get_db_connection()
     if not conn:
+        return False, "DB connection failed"
+
+    new_observers = {}   # (name, organization, contact) -> observer_id, so repeats in a batch share one row
+    results = []
+    try:
+        cursor = conn.cursor()
+        obs_rows = []
+        for item in observations:
+            observer_id = item.get('observer_id')
+            if item.get('new_observer'):
+                o = item['new_observer']
+                key = (o['name'], o.get('organization'), o.get('contact'))
+                if key not in new_observers:
+                    cursor.execute(
+                        "INSERT INTO Observer (name, organization, contact) VALUES (%s, %s, %s)", key
+                    )
+                    new_observers[key] = cursor.lastrowid
+                observer_id = new_observers[key]
+
+            quality_id = None
+            wq = item.get('water_quality')
+            if wq:
+                cursor.execute(
+                    "INSERT INTO Water_Quality (location_id, temperature, pH, salinity, pollution_index, measured_at) VALUES (%s, %s, %s, %s, %s, %s)",
+                    (item['location_id'], wq['temperature'], wq['pH'], wq['salinity'], wq['pollution_index'],
+                     wq.get('measured_at') or item['obs_date'])
+                )
+                quality_id = cursor.lastrowid
+
+            obs_rows.append((item['species_id'], item['location_id'], observer_id, quality_id,
+                             item['obs_date'], item['count_observed'], item.get('remarks')))
+            results.append({'observer_id': observer_id, 'quality_id': quality_id})
+
+        obs_sql = ("INSERT INTO Observation (species_id, location_id, observer_id, quality_id, obs_date, count_observed, remarks) "
+                   "VALUES (%s, %s, %s, %s, %s, %s, %s)")
+        # one INSERT per row on the open transaction: a multi-row INSERT only reports one id, and
+        # the rest are not guaranteed to follow it (auto_increment_increment, interleaved lock mode)
+        for row, r in zip(obs_rows, results):
+            cursor.execute(obs_sql, row)
+            r['obs_id'] = cursor.lastrowid
+        conn.commit()
+        cursor.close()
+    except storage.Error as e:
+        conn.rollback()
+        return False, str(e)
+    finally:
+        conn.close()
+
+    for (name, organization, contact), observer_id in new_observers.items():
+        _append_reference_row("Observer", {
+            "observer_id": observer_id,
+            "name": name,
+            "organization": organization,
+            "contact": contact,
+        })
+    return True, results
+
+def submit_observation(species_id, location_id, obs_date, count_observed, remarks,
+                       observer_id=None, new_observer=None, water_quality=None):
+    """
+    Record one observation (plus optional new observer and water-quality reading) atomically.
+    Returns (True, {'obs_id', 'observer_id', 'quality_id'}) or (False, error message).
+    """
+    ok, res = submit_observations([{
+        'species_id': species_id,
+        'location_id': location_id,
+        'observer_id': observer_id,
+        'new_observer': new_observer,
+        'water_quality': water_quality,
+        'obs_date': obs_date,
+        'count_observed': count_observed,
+        'remarks': remarks,
+    }])
+    return (True, res[0]) if ok else (False, res)
+
+def _species_search_index():
+    """ The species index, rebuilt from the reference cache when it is missing or older than its TTL. """
+    index = get_species_index()
+    if index.built_at is None or time.monotonic() - index.built_at > REFERENCE_CACHE_TTL:
+        species = get_reference_cache().get_or_load("Species", _load_species)
+        if species is None:
+            return None
+        index.rebuild(species, "species_id")
+    return index
+
+@instrumentation.helper
+def search_species_by_name(name, limit=SPECIES_SEARCH_LIMIT):
+    """
+    Ranked species search: exact, prefix, substring and fuzzy (typo-tolerant) name matches.
+    Each result also carries total_observations and its conservation 'actions'; both are
+    loaded for every hit in a single query.
+    """
+    index = _species_search_index()
+    if index is None:
         return []
-    cursor = conn.cursor(dictionary=True)
-    like = f"%{name}%"
-    cursor.execute("""
-        SELECT s.*, 
-               (SELECT COUNT(*) FROM Observation o WHERE o.species_id = s.species_id) AS total_observations
-        FROM Species s
-        WHERE s.common_name LIKE %s OR s.scientific_name LIKE %s
-    """, (like, like))
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+    hits = index.search(name, limit)
+    if not hits:
+        return []
+    ids = [species_id for species_id, _ in hits]
+    placeholders = ", ".join(["%s"] * len(ids))
+
+    conn = get_db_connection(read_only=True)
+    if not conn:
+        return []
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(f"""
+            SELECT s.species_id, s.common_name, s.scientific_name, s.conservation_status,
+                   COALESCE(oc.total_observations, 0) AS total_observations,
+                   ca.action_id, ca.action_type, ca.description, ca.start_date, ca.end_date
+            FROM Species s
+            LEFT JOIN (
+                SELECT species_id, COUNT(*) AS total_observations
+                FROM Observation
+                WHERE species_id IN ({placeholders})
+                GROUP BY species_id
+            ) oc ON oc.species_id = s.species_id
+            LEFT JOIN Conservation_Action ca ON ca.species_id = s.species_id
+            WHERE s.species_id IN ({placeholders})
+            ORDER BY ca.start_date
+        """, tuple(ids) * 2)
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
 
+    results = {}
+    for row in rows:
+        result = results.get(row['species_id'])
+        if result is None:
+            result = results[row['species_id']] = {
+                key: row[key] for key in
+                ('species_id', 'common_name', 'scientific_name', 'conservation_status', 'total_observations')
+            }
+            result['actions'] = []
+        if row['action_id'] is not None:
+            result['actions'].append({
+                key: row[key] for key in ('action_id', 'action_type', 'description', 'start_date', 'end_date')
+            })
+    # keep the ranking; ids deleted since the index was built simply drop out
+    ranked = []
+    for species_id, score in hits:
+        if species_id in results:
+            results[species_id]['score'] = score
+            ranked.append(results[species_id])
+    return ranked
+
+@instrumentation.helper
 def fetch_actions_for_species(species_id):
-    conn = get_db_connection()
+    conn = get_db_connection(read_only=True)
     if not conn:
         return []
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("""
-        SELECT action_id, action_type, description, start_date, end_date
-        FROM Conservation_Action
-        WHERE species_id = %s
-    """, (species_id,))
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
-
-def fetch_recent_observations(limit=10):
-    conn = get_db_connection()
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT action_id, action_type, description, start_date, end_date
+            FROM Conservation_Action
+            WHERE species_id = %s
+        """, (species_id,))
+        return cursor.fetchall()
+    finally:
+        conn.close()
+
+@instrumentation.helper
+def fetch_recent_observations(limit=10, conn=None, feed=None):
+    """
+    Latest observations. Pass `conn` to reuse an open connection (it is left open), and
+    `feed` (get_observation_feed()) when calling from a worker thread.
+    The result is reused until Observation_Change moves on (see change_feed).
+    The last RECENT_OBSERVATIONS_WINDOW_DAYS are tried first so only the newest partitions
+    are read; the whole table is only searched when that window has fewer than `limit` rows.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection(read_only=True)
     if not conn:
         return pd.DataFrame()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("""
+    if feed is None:
+        feed = get_observation_feed()
+    sql = """
         SELECT o.obs_id, s.common_name, l.location_name, o.obs_date, o.count_observed, o.remarks
         FROM Observation o
         LEFT JOIN Species s ON o.species_id = s.species_id
         LEFT JOIN Location l ON o.location_id = l.location_id
+        {where}
         ORDER BY o.obs_date DESC
         LIMIT %s
-    """, (limit,))
-    rows = cursor.fetchall()
-    conn.close()
-    return pd.DataFrame(rows)
+    """
 
-def fetch_one_record(table_name, id_column, record_id):
-    """ Fetches a single record to pre-fill update forms. """
+    def query():
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(sql.format(where="WHERE o.obs_date >= NOW() - INTERVAL %s DAY"),
+                       (RECENT_OBSERVATIONS_WINDOW_DAYS, limit))
+        rows = cursor.fetchall()
+        if len(rows) < limit:
+            cursor.execute(sql.format(where=""), (limit,))
+            rows = cursor.fetchall()
+        cursor.close()
+        return _to_frame(rows)
+
+    try:
+        return feed.cached(conn, f"recent:{limit}", query)
+    finally:
+        if own_conn:
+            conn.close()
+
+def _summary_from_rows(rows):
+    """ Shape Dashboard_Summary rows into the dict the Dashboard renders. """
+    totals = {"Species": 0, "Location": 0, "Observation": 0, "Conservation_Action": 0}
+    status_rows, pollution_rows = [], []
+    for r in rows:
+        if r['metric'] == 'total':
+            totals[r['dimension']] = int(r['value_count'])
+        elif r['metric'] == 'status' and r['value_count'] > 0:
+            status_rows.append({"conservation_status": r['dimension'], "count": int(r['value_count'])})
+        elif r['metric'] == 'pollution' and r['value_count'] > 0:
+            pollution_rows.append({"region": r['dimension'], "avg_pollution": float(r['value_sum']) / int(r['value_count'])})
+    return {
+        "totals": totals,
+        "species_status": _to_frame(status_rows),
+        "pollution": _to_frame(pollution_rows),
+    }
+
+def _fetch_dashboard_summary_live(cursor):
+    """ Fallback for databases created before Dashboard_Summary existed: compute every metric directly. """
+    totals = {}
+    for table in ["Species", "Location", "Observation", "Conservation_Action"]:
+        cursor.execute(f"SELECT COUNT(*) as count FROM {table}")
+        totals[table] = cursor.fetchone()['count']
+    cursor.execute("""
+        SELECT conservation_status, COUNT(*) as count
+        FROM Species
+        GROUP BY conservation_status
+    """)
+    species_status = _to_frame(cursor.fetchall())
+    cursor.execute("""
+        SELECT l.region, AVG(wq.pollution_index) as avg_pollution
+        FROM Water_Quality wq
+        JOIN Location l ON wq.location_id = l.location_id
+        GROUP BY l.region
+    """)
+    pollution = _to_frame(cursor.fetchall())
+    return {"totals": totals, "species_status": species_status, "pollution": pollution, "age_seconds": None}
+
+@instrumentation.helper
+def fetch_dashboard_summary(conn, max_age=DASHBOARD_SUMMARY_MAX_AGE, pollution_days=None, primary=None):
+    """
+    Read all dashboard metrics from Dashboard_Summary in a single query.
+    Triggers keep the table current; if its last full rebuild is older than `max_age` seconds
+    (or it was never built) RefreshDashboardSummary() is run first to correct any drift.
+    When `conn` is a replica connection the refresh runs on a connection from `primary` (the
+    primary's pool) and the refreshed rows are read there.
+    Pollution by region comes from Water_Quality_Stats, over the last `pollution_days` days
+    when given (see fetch_water_quality_stats).
+    Returns a dict with 'totals', 'species_status', 'pollution' and 'age_seconds'.
+    """
+    cursor = conn.cursor(dictionary=True)
+    query = """
+        SELECT metric, dimension, value_count, value_sum,
+               TIMESTAMPDIFF(SECOND, refreshed_at, NOW()) AS age_seconds
+        FROM Dashboard_Summary
+    """
+    try:
+        cursor.execute(query)
+        rows = cursor.fetchall()
+    except storage.Error as e:
+        if not storage.is_missing_table(e):
+            raise
+        return _fetch_dashboard_summary_live(cursor)
+
+    meta = next((r for r in rows if r['metric'] == 'meta'), None)
+    if meta is None or meta['age_seconds'] > max_age:
+        if getattr(conn, "read_only", False):
+            if primary is None:
+                raise storage.Error("Dashboard_Summary is stale and no primary connection was given to refresh it")
+            refresh_conn = primary.acquire()
+        else:
+            refresh_conn = conn
+        try:
+            refresh_cursor = refresh_conn.cursor(dictionary=True)
+            refresh_cursor.callproc("RefreshDashboardSummary")
+            refresh_conn.commit()
+            refresh_cursor.execute(query)
+            rows = refresh_cursor.fetchall()
+            refresh_cursor.close()
+        finally:
+            if refresh_conn is not conn:
+                refresh_conn.close()
+        meta = next((r for r in rows if r['metric'] == 'meta'), None)
+
+    summary = _summary_from_rows(rows)
+    summary["age_seconds"] = meta['age_seconds'] if meta else None
+    stats = fetch_water_quality_stats("region", days=pollution_days, conn=conn)
+    if stats is not None:
+        # before migration 0005 the pollution rows still come from Dashboard_Summary
+        summary["pollution"] = (stats[["region", "pollution_index_mean"]]
+                                .dropna().rename(columns={"pollution_index_mean": "avg_pollution"})
+                                if not stats.empty else pd.DataFrame())
+    return summary
+
+# Rollup grains available in Observation_Rollup (migration 0002)
+TREND_GRAINS = ["day", "week", "month"]
+
+@instrumentation.helper
+def fetch_observation_trend(grain="week", species_id=None, location_id=None, date_from=None, date_to=None,
+                            by=None, conn=None):
+    """
+    Sightings and total count_observed per time bucket, read from Observation_Rollup.
+    `by` = 'species' or 'location' returns one series per species / location (with its name);
+    otherwise buckets are summed over everything that matches the filters.
+    Returns a DataFrame ordered by bucket_start, or None if the rollup table does not exist yet
+    (apply migrations on DB Init). Pass `conn` to reuse an open connection (it is left open).
+    """
+    if grain not in TREND_GRAINS:
+        raise ValueError(f"grain must be one of {TREND_GRAINS}")
+    series = {
+        None: ("", "", ""),
+        "species": (", r.species_id, COALESCE(s.common_name, 'Unknown') AS species",
+                    "LEFT JOIN Species s ON r.species_id = s.species_id",
+                    ", r.species_id, s.common_name"),
+        "location": (", r.location_id, COALESCE(l.location_name, 'Unknown') AS location",
+                     "LEFT JOIN Location l ON r.location_id = l.location_id",
+                     ", r.location_id, l.location_name"),
+    }
+    if by not in series:
+        raise ValueError("by must be None, 'species' or 'location'")
+    columns, join, group = series[by]
+
+    where = ["r.grain = %s"]
+    params = [grain]
+    if species_id is not None:
+        where.append("r.species_id = %s")
+        params.append(species_id)
+    if location_id is not None:
+        where.append("r.location_id = %s")
+        params.append(location_id)
+    if date_from is not None:
+        where.append("r.bucket_start >= %s")
+        params.append(date_from)
+    if date_to is not None:
+        where.append("r.bucket_start <= %s")
+        params.append(date_to)
+
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection(read_only=True)
+    if not conn:
+        return pd.DataFrame()
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(f"""
+            SELECT r.bucket_start{columns}, SUM(r.sightings) AS sightings, SUM(r.total_count) AS total_count
+            FROM Observation_Rollup r
+            {join}
+            WHERE {' AND '.join(where)}
+            GROUP BY r.bucket_start{group}
+            ORDER BY r.bucket_start
+        """, tuple(params))
+        rows = cursor.fetchall()
+    except storage.Error as e:
+        if not storage.is_missing_table(e):
+            raise
+        return None
+    finally:
+        if own_conn:
+            conn.close()
+    df = _to_frame(rows)
+    if not df.empty:
+        df['sightings'] = df['sightings'].astype(int)
+        df['total_count'] = df['total_count'].astype(int)
+    return df
+
+@instrumentation.helper
+def rebuild_observation_rollups():
+    """ Recompute Observation_Rollup from Observation (repairs drift). Returns (success, message). """
     conn = get_db_connection()
     if not conn:
-        return None, "DB connection failed"
-    
+        return False, "DB connection failed"
+    try:
+        cursor = conn.cursor()
+        cursor.callproc("RebuildObservationRollups")
+        conn.commit()
+        cursor.close()
+        return True, "Observation rollups rebuilt."
+    except storage.Error as e:
+        conn.rollback()
+        return False, str(e)
+    finally:
+        conn.close()
+
+# Water_Quality reading -> column prefix in Water_Quality_Stats (migration 0005)
+WATER_QUALITY_STATS_METRICS = {
+    "temperature": "temperature",
+    "pH": "ph",
+    "salinity": "salinity",
+    "pollution_index": "pollution",
+}
+
+@instrumentation.helper
+def fetch_water_quality_stats(by="location", days=None, conn=None):
+    """
+    Count, mean, standard deviation, min and max of every Water_Quality reading per location
+    (by='location') or per region (by='region'), summed from the running totals in
+    Water_Quality_Stats instead of scanning the readings. `days` limits it to the last N days
+    (today included). Columns are <reading>_count/_mean/_std/_min/_max plus 'readings'.
+    Returns None if the stats table does not exist yet (apply migrations on DB Init).
+    Pass `conn` to reuse an open connection (it is left open).
+    """
+    if by == "location":
+        group_cols = group_by = "l.location_id, l.location_name, l.region"
+    elif by == "region":
+        group_cols, group_by = "COALESCE(l.region, 'Unknown') AS region", "region"
+    else:
+        raise ValueError(f"by must be 'location' or 'region', not {by!r}")
+    sums = ", ".join(
+        f"SUM(st.{p}_n) AS {p}_n, SUM(st.{p}_sum) AS {p}_sum, SUM(st.{p}_sumsq) AS {p}_sumsq, "
+        f"MIN(st.{p}_min) AS {p}_min, MAX(st.{p}_max) AS {p}_max"
+        for p in WATER_QUALITY_STATS_METRICS.values()
+    )
+    if days is None:
+        window, params = "st.grain = 'all'", ()
+    else:
+        window, params = "st.grain = 'day' AND st.bucket_start > CURDATE() - INTERVAL %s DAY", (int(days),)
+
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection(read_only=True)
+    if not conn:
+        return pd.DataFrame()
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(f"""
+            SELECT {group_cols}, SUM(st.readings) AS readings, {sums}
+            FROM Water_Quality_Stats st
+            JOIN Location l ON st.location_id = l.location_id
+            WHERE {window}
+            GROUP BY {group_by}
+            ORDER BY {'region' if by == 'region' else 'l.location_name'}
+        """, params)
+        rows = cursor.fetchall()
+        cursor.close()
+    except storage.Error as e:
+        if storage.is_missing_table(e):
+            return None
+        raise
+    finally:
+        if own_conn:
+            conn.close()
+
+    raw = _to_frame(rows)
+    keys = ["location_id", "location_name", "region"] if by == "location" else ["region"]
+    if raw.empty:
+        return pd.DataFrame(columns=keys + ["readings"])
+    stats = raw[keys].copy()
+    stats["readings"] = raw["readings"].astype(int)
+    for reading, p in WATER_QUALITY_STATS_METRICS.items():
+        n = raw[f"{p}_n"].astype(float)
+        total = raw[f"{p}_sum"].astype(float)
+        mean = total / n.where(n > 0)
+        variance = (raw[f"{p}_sumsq"].astype(float) - total * mean) / (n - 1).where(n > 1)
+        stats[f"{reading}_count"] = n.astype(int)
+        stats[f"{reading}_mean"] = mean
+        stats[f"{reading}_std"] = variance.clip(lower=0) ** 0.5
+        stats[f"{reading}_min"] = raw[f"{p}_min"].astype(float)
+        stats[f"{reading}_max"] = raw[f"{p}_max"].astype(float)
+    return stats
+
+@instrumentation.helper
+def rebuild_water_quality_stats():
+    """ Recompute Water_Quality_Stats from Water_Quality (repairs drift). Returns (success, message). """
+    conn = get_db_connection()
+    if not conn:
+        return False, "DB connection failed"
+    try:
+        cursor = conn.cursor()
+        cursor.callproc("RebuildWaterQualityStats")
+        conn.commit()
+        cursor.close()
+        return True, "Water quality statistics rebuilt."
+    except storage.Error as e:
+        conn.rollback()
+        return False, str(e)
+    finally:
+        conn.close()
+
+# ---------- ANALYTICS SNAPSHOT ----------
+@st.cache_resource
+def get_analytics_engine():
+    """ Process-wide DuckDB engine over ANALYTICS_DIR (raises RuntimeError without duckdb). """
+    return analytics.AnalyticsEngine(ANALYTICS_DIR)
+
+@instrumentation.helper
+def export_analytics_snapshot(full=False, on_table=None):
+    """ Bring the Parquet snapshot up to date (see analytics.export_snapshot). Returns (success, report or message). """
+    conn = get_db_connection(read_only=True)
+    if not conn:
+        return False, "DB connection failed"
+    try:
+        ok, result = analytics.export_snapshot(conn, ANALYTICS_DIR, full=full, on_table=on_table)
+    finally:
+        conn.close()
+    if ok:
+        try:
+            get_analytics_engine().refresh()
+        except RuntimeError:
+            pass    # duckdb missing: the snapshot is still usable by other tools
+    return ok, result
+
+@instrumentation.helper
+def run_report(name, use_snapshot=False):
+    """ One of analytics.REPORTS, answered from the snapshot or from MySQL. """
+    if use_snapshot:
+        return get_analytics_engine().report(name)
+    conn = get_db_connection(read_only=True)
+    if not conn:
+        return pd.DataFrame()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(analytics.REPORTS[name][1])
+        return _read_frame(cursor)
+    finally:
+        conn.close()
+
+# Columns the update helpers may change, per table
+UPDATABLE_COLUMNS = {
+    'Species': ['common_name', 'scientific_name', 'conservation_status'],
+    'Observer': ['name', 'organization', 'contact'],
+    'Location': ['location_name', 'region', 'water_type'],
+    'Conservation_Action': ['action_type', 'description', 'start_date', 'end_date']
+}
+
+# ID column of every table the bulk delete / update helpers accept
+TABLE_ID_COLUMNS = {
+    'Species': 'species_id',
+    'Observer': 'observer_id',
+    'Location': 'location_id',
+    'Observation': 'obs_id',
+    'Conservation_Action': 'action_id',
+    'Water_Quality': 'quality_id',
+}
+
+# Foreign keys pointing at each deletable table, as (child table, child column)
+REFERENCED_BY = {
+    'Species': [('Observation', 'species_id'), ('Conservation_Action', 'species_id'), ('Species_Threat', 'species_id')],
+    'Observer': [('Observation', 'observer_id')],
+    'Location': [('Observation', 'location_id'), ('Water_Quality', 'location_id')],
+    'Observation': [],
+    'Conservation_Action': [('Action_Equipment', 'action_id')],
+    'Water_Quality': [('Observation', 'quality_id')],
+}
+
+@instrumentation.helper
+def fetch_one_record(table_name, id_column, record_id):
+    """ Fetches a single record to pre-fill update forms. """
     # Whitelist
     if table_name not in ['Species', 'Observer', 'Location', 'Conservation_Action']:
         return None, "Invalid table name for update."
     if id_column not in ['species_id', 'observer_id', 'location_id', 'action_id']:
         return None, "Invalid ID column."
 
+    conn = get_db_connection(read_only=True)
+    if not conn:
+        return None, "DB connection failed"
+
     try:
         cursor = conn.cursor(dictionary=True)
         query = f"SELECT * FROM {table_name} WHERE {id_column} = %s"
         cursor.execute(query, (record_id,))
         record = cursor.fetchone()
         cursor.close()
-        conn.close()
         if not record:
             return None, "Record not found."
         return record, "Success"
-    except mysql.connector.Error as e:
+    except storage.Error as e:
         return None, str(e)
     finally:
-        if conn.is_connected():
-            conn.close()
+        conn.close()
 
+@instrumentation.helper
 def update_record(table_name, id_column, record_id, update_data):
     """
     Safely updates a record.
     update_data is a dict {'column_name': new_value}
     """
-    conn = get_db_connection()
-    if not conn:
-        return False, "DB connection failed"
-    
     # Whitelist tables and columns
     if table_name not in ['Species', 'Observer', 'Location', 'Conservation_Action']:
         return False, "Invalid table name for update."
@@ -371,12 +1626,7 @@ def update_record(table_name, id_column, record_id, update_data):
     values = []
     
     # Whitelist columns for each table
-    allowed_columns = {
-        'Species': ['common_name', 'scientific_name', 'conservation_status'],
-        'Observer': ['name', 'organization', 'contact'],
-        'Location': ['location_name', 'region', 'water_type'],
-        'Conservation_Action': ['action_type', 'description', 'start_date', 'end_date']
-    }
+    allowed_columns = UPDATABLE_COLUMNS
     
     if table_name not in allowed_columns:
          return False, f"Update not configured for table {table_name}."
@@ -394,7 +1644,11 @@ def update_record(table_name, id_column, record_id, update_data):
         return False, "No valid data provided for update."
 
     values.append(record_id) # for the WHERE clause
-    
+
+    conn = get_db_connection()
+    if not conn:
+        return False, "DB connection failed"
+
     try:
         cursor = conn.cursor()
         query = f"UPDATE {table_name} SET {', '.join(set_clause)} WHERE {id_column} = %s"
@@ -407,29 +1661,35 @@ def update_record(table_name, id_column, record_id, update_data):
         
         if rows_affected == 0:
             return False, "Record not found or data was unchanged."
+        if table_name in REFERENCE_TABLE_KEYS:
+            changes = {col: val for col, val in update_data.items() if col in allowed_columns[table_name]}
+            _update_reference_row(table_name, record_id, changes)
+        if table_name in ("Species", "Conservation_Action"):
+            # action picker labels include the species name
+            get_reference_cache().invalidate("Conservation_Action")
         return True, f"Record {record_id} in {table_name} updated."
         
-    except mysql.connector.Error as e:
+    except storage.Error as e:
         conn.rollback()
         return False, str(e)
     finally:
-        if conn.is_connected():
-            conn.close()
+        conn.close()
 
+@instrumentation.helper
 def delete_record(table_name, id_column, record_id):
     """
     Safely deletes a record by its ID, with whitelist validation and FK error handling.
     """
-    conn = get_db_connection()
-    if not conn:
-        return False, "DB connection failed"
-    
     # Whitelist tables and columns to prevent SQL injection
     if table_name not in ['Species', 'Observer', 'Location', 'Observation', 'Conservation_Action', 'Water_Quality']:
         return False, "Invalid table name."
     if id_column not in ['species_id', 'observer_id', 'location_id', 'obs_id', 'action_id', 'quality_id']:
         return False, "Invalid ID column."
 
+    conn = get_db_connection()
+    if not conn:
+        return False, "DB connection failed"
+
     try:
         cursor = conn.cursor()
         # f-string is safe here due to the whitelist check above
@@ -442,489 +1702,367 @@ def delete_record(table_name, id_column, record_id):
         
         if rows_affected == 0:
             return False, "Record not found or already deleted."
+        if table_name in REFERENCE_TABLE_KEYS:
+            _remove_reference_row(table_name, record_id)
+        if table_name == "Conservation_Action":
+            get_reference_cache().invalidate("Conservation_Action")
         return True, f"Record {record_id} deleted from {table_name}."
         
-    except mysql.connector.Error as e:
+    except storage.Error as e:
         conn.rollback()
         # Check for foreign key constraint error (e.g., 1451)
-        if e.errno == 1451:
+        if storage.is_referenced(e):
             return False, f"Cannot delete: This record is being referenced by other data (Foreign Key constraint)."
         return False, str(e)
     finally:
-        if conn.is_connected():
-            conn.close()
+        conn.close()
 
-# ---------- STREAMLIT UI ----------
-def main():
-    st.set_page_config(page_title="Marine Species Conservation", page_icon="🐟", layout="wide")
+def _chunks(items, size=BULK_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
 
-    st.sidebar.title("Marine Conservation")
-    st.sidebar.markdown("---")
-    menu_options = [
-        "Dashboard", 
-        "Add Observation", 
-        "Add Species/Observer", 
-        "Search Species", 
-        "Conservation Actions", 
-        "Manage Data", # <-- RENAMED
-        "DB Init"
-    ]
-    menu = st.sidebar.radio("Navigation", menu_options)
-
-    # ---------- DB INIT ----------
-    if menu == "DB Init":
-        st.title("Database Initialization")
-        st.markdown("Use this page to initialize the `marine_db` from your SQL file path")
-
-        st.info(f"Default SQL path set to: {DEFAULT_SQL_PATH}")
-        sql_path = st.text_input("SQL file path", value=DEFAULT_SQL_PATH)
-        if st.button("Initialize Database"):
-            with st.spinner("Initializing database. This may take a few seconds"):
-                success, msg = ensure_database_initialized(sql_path=sql_path)
-                if success:
-                    st.success(msg)
-                else:
-                    st.error(msg)
-                    st.write("If the automatic initialization failed, please run this SQL file manually using mysql client:")
-                    st.code(f'mysql -u {DB_USER} -p < "{sql_path}"')
-
-    # ---------- DASHBOARD ----------
-    elif menu == "Dashboard":
-        st.title("🐠 Marine Conservation Dashboard")
-        conn = get_db_connection()
-        if not conn:
-            st.error("Cannot connect to database. Use DB Init to create the DB or check credentials")
-            return
+def _in_clause(ids):
+    return ", ".join(["%s"] * len(ids))
+
+def _invalidate_after_bulk(table_name, ids, changes=None):
+    """ Bring the reference cache, species index and picker labels in line after a bulk write. """
+    if table_name in REFERENCE_TABLE_KEYS:
+        if changes is None:
+            _remove_reference_rows(table_name, ids)
+        else:
+            _update_reference_rows(table_name, ids, changes)
+    if table_name in ("Species", "Conservation_Action"):
+        get_reference_cache().invalidate("Conservation_Action")
+
+@instrumentation.helper
+def delete_records(table_name, id_column, record_ids):
+    """
+    Delete many records in one transaction with chunked `WHERE id IN (...)` statements.
+    Rows still referenced by other tables are found up front with one query per chunk and
+    skipped, instead of letting the whole delete fail on a foreign key error (1451).
+    Returns (success, outcomes) where outcomes maps each ID to ('deleted' | 'referenced' |
+    'not found', message). On failure nothing is deleted and outcomes is an error message.
+    """
+    if TABLE_ID_COLUMNS.get(table_name) != id_column:
+        return False, "Invalid table name or ID column."
+    record_ids = list(dict.fromkeys(record_ids))
+    if not record_ids:
+        return True, {}
+
+    # one EXISTS per referencing table tells which rows exist and what still points at them
+    references = REFERENCED_BY[table_name]
+    ref_columns = "".join(
+        f", EXISTS(SELECT 1 FROM {child} c{i} WHERE c{i}.{column} = t.{id_column}) AS ref_{i}"
+        for i, (child, column) in enumerate(references)
+    )
+
+    conn = get_db_connection()
+    if not conn:
+        return False, "DB connection failed"
 
+    outcomes = {}
+    try:
         cursor = conn.cursor(dictionary=True)
+        deletable = []
+        for chunk in _chunks(record_ids):
+            cursor.execute(
+                f"SELECT t.{id_column} AS id{ref_columns} FROM {table_name} t "
+                f"WHERE t.{id_column} IN ({_in_clause(chunk)}) FOR UPDATE",
+                tuple(chunk)
+            )
+            for row in cursor.fetchall():
+                blockers = [references[i][0] for i in range(len(references)) if row[f"ref_{i}"]]
+                if blockers:
+                    outcomes[row['id']] = ("referenced", f"Still referenced by {', '.join(blockers)}")
+                else:
+                    deletable.append(row['id'])
 
-        # Metrics
-        cursor.execute("SELECT COUNT(*) as count FROM Species")
-        total_species = cursor.fetchone()['count']
-        cursor.execute("SELECT COUNT(*) as count FROM Location")
-        total_locations = cursor.fetchone()['count']
-        cursor.execute("SELECT COUNT(*) as count FROM Observation")
-        total_observations = cursor.fetchone()['count']
-        cursor.execute("SELECT COUNT(*) as count FROM Conservation_Action")
-        total_actions = cursor.fetchone()['count']
-
-        col1, col2, col3, col4 = st.columns(4)
-        col1.metric("Species", total_species)
-        col2.metric("Locations", total_locations)
-        col3.metric("Observations", total_observations)
-        col4.metric("Conservation Actions", total_actions)
-
-        st.markdown("---")
-
-        # Species by conservation status
-        cursor.execute("""
-            SELECT conservation_status, COUNT(*) as count
-            FROM Species
-            GROUP BY conservation_status
-        """)
-        species_status = pd.DataFrame(cursor.fetchall())
-        if not species_status.empty:
-            st.subheader("Species by Conservation Status")
-            st.bar_chart(species_status.set_index('conservation_status'))
+        for chunk in _chunks(deletable):
+            cursor.execute(f"DELETE FROM {table_name} WHERE {id_column} IN ({_in_clause(chunk)})", tuple(chunk))
+        conn.commit()
+        cursor.close()
+    except storage.Error as e:
+        conn.rollback()
+        if storage.is_referenced(e):
+            return False, "Cannot delete: a record became referenced by other data while deleting (Foreign Key constraint)."
+        return False, str(e)
+    finally:
+        conn.close()
 
-        # Pollution by region
-        cursor.execute("""
-            SELECT l.region, AVG(wq.pollution_index) as avg_pollution
-            FROM Water_Quality wq
-            JOIN Location l ON wq.location_id = l.location_id
-            GROUP BY l.region
-        """)
-        pollution_df = pd.DataFrame(cursor.fetchall())
-        if not pollution_df.empty:
-            st.subheader("Average Pollution Index by Region")
-            st.line_chart(pollution_df.set_index('region'))
-
-        st.markdown("---")
-        st.subheader("Recent Observations")
-        recent = fetch_recent_observations(limit=8)
-        if not recent.empty:
-            st.dataframe(recent, use_container_width=True)
-        else:
-            st.info("No observations yet")
+    for record_id in deletable:
+        outcomes[record_id] = ("deleted", f"Record {record_id} deleted from {table_name}.")
+    for record_id in record_ids:
+        outcomes.setdefault(record_id, ("not found", "Record not found or already deleted."))
+    if deletable:
+        _invalidate_after_bulk(table_name, deletable)
+    return True, outcomes
+
+@instrumentation.helper
+def update_records(table_name, id_column, record_ids, update_data):
+    """
+    Apply the same update_data {'column_name': new_value} to many records in one transaction
+    with chunked `WHERE id IN (...)` statements.
+    Returns (success, outcomes) where outcomes maps each ID to ('updated' | 'not found', message).
+    On failure nothing is updated and outcomes is an error message.
+    """
+    if table_name not in UPDATABLE_COLUMNS or TABLE_ID_COLUMNS.get(table_name) != id_column:
+        return False, "Invalid table name or ID column."
+    invalid = [col for col in update_data if col not in UPDATABLE_COLUMNS[table_name]]
+    if invalid:
+        return False, f"Columns cannot be updated: {', '.join(invalid)}"
+    if not update_data:
+        return False, "No valid data provided for update."
+    record_ids = list(dict.fromkeys(record_ids))
+    if not record_ids:
+        return True, {}
+
+    set_clause = ", ".join(f"{col} = %s" for col in update_data)
+    values = tuple(update_data.values())
+
+    conn = get_db_connection()
+    if not conn:
+        return False, "DB connection failed"
+
+    try:
+        cursor = conn.cursor()
+        found = []
+        for chunk in _chunks(record_ids):
+            # rowcount skips rows that already hold the new values, so look the IDs up first
+            cursor.execute(
+                f"SELECT {id_column} FROM {table_name} WHERE {id_column} IN ({_in_clause(chunk)}) FOR UPDATE",
+                tuple(chunk)
+            )
+            found.extend(row[0] for row in cursor.fetchall())
+        for chunk in _chunks(found):
+            cursor.execute(
+                f"UPDATE {table_name} SET {set_clause} WHERE {id_column} IN ({_in_clause(chunk)})",
+                values + tuple(chunk)
+            )
+        conn.commit()
+        cursor.close()
+    except storage.Error as e:
+        conn.rollback()
+        return False, str(e)
+    finally:
+        conn.close()
+
+    found_set = set(found)
+    outcomes = {
+        record_id: ("updated", f"Record {record_id} in {table_name} updated.") if record_id in found_set
+        else ("not found", "Record not found.")
+        for record_id in record_ids
+    }
+    if found:
+        _invalidate_after_bulk(table_name, found, dict(update_data))
+    return True, outcomes
 
+# ---------- DASHBOARD PANELS ----------
+@st.cache_resource
+def get_dashboard_executor():
+    """ Process-wide thread pool that runs dashboard panel queries. """
+    return ThreadPoolExecutor(max_workers=DASHBOARD_WORKERS, thread_name_prefix="dashboard")
+
+def _with_panel_connection(pool, fn, timeout=DASHBOARD_PANEL_TIMEOUT):
+    """
+    Run fn(conn) on a connection from `pool`. SELECTs are capped server-side at `timeout`
+    so a panel that was given up on does not keep a connection busy.
+    Worker threads must not call Streamlit, so the pool is passed in rather than looked up.
+    """
+    conn = pool.acquire()
+    try:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SET SESSION max_execution_time = %s", (int(timeout * 1000),))
+        except storage.Error:
+            pass    # server without max_execution_time: the client-side timeout still applies
+        try:
+            return fn(conn)
+        finally:
+            try:
+                cursor.execute("SET SESSION max_execution_time = 0")
+            except storage.Error:
+                pass
+            cursor.close()
+    finally:
         conn.close()
 
-    # ---------- ADD OBSERVATION ----------
-    elif menu == "Add Observation":
-        st.title("Log New Observation")
-        st.markdown("Record sightings and water quality measurements")
-
-        species = fetch_all_species()
-        locations = fetch_all_locations()
-        observers = fetch_all_observers()
-
-        if not species:
-            st.warning("No species found in DB. Add species first or run DB Init")
-        col1, col2 = st.columns(2)
-        with col1:
-            selected_species = st.selectbox("Species", options=[f"{s['common_name']} ({s['scientific_name']})" for s in species] if species else ["-"])
-            species_map = {f"{s['common_name']} ({s['scientific_name']})": s['species_id'] for s in species}
-            obs_date = st.date_input("Observation Date", value=datetime.now().date())
-            obs_time = st.time_input("Observation Time", value=datetime.now().time())
-            count_observed = st.number_input("Count Observed", min_value=0, step=1, value=1)
-
-        with col2:
-            selected_location = st.selectbox("Location", options=[f"{l['location_name']} - {l['region']}" for l in locations] if locations else ["-"])
-            location_map = {f"{l['location_name']} - {l['region']}": l['location_id'] for l in locations}
-            observer_choice = st.selectbox("Observer", options=[f"{o['name']} ({o['organization']})" for o in observers] if observers else ["-"])
-            observer_map = {f"{o['name']} ({o['organization']})": o['observer_id'] for o in observers}
-            remarks = st.text_area("Remarks", placeholder="Optional notes")
-
-        st.markdown("### Water Quality (optional)")
-        wcol1, wcol2, wcol3 = st.columns(3)
-        with wcol1:
-            temperature = st.number_input("Temperature (°C)", format="%.2f", value=25.0)
-            pH = st.number_input("pH", format="%.2f", value=8.0)
-        with wcol2:
-            salinity = st.number_input("Salinity (ppt)", format="%.2f", value=35.0)
-            pollution_index = st.number_input("Pollution Index (0-100)", format="%.2f", value=10.0)
-        with wcol3:
-            add_new_observer = st.checkbox("Add new observer")
-            if add_new_observer:
-                new_obs_name = st.text_input("Observer Name")
-                new_obs_org = st.text_input("Organization")
-                new_obs_contact = st.text_input("Contact email/phone")
-
-        if st.button("Submit Observation"):
-            if not species or selected_species == "-" or selected_location == "-" or observer_choice == "-":
-                st.error("Ensure species, location and observer are available or add them first")
+def _panel_outcome(panel, future):
+    """ (panel, result, error) of a finished loader, whatever it raised. """
+    error = future.exception()
+    if error is not None:
+        return panel, None, error
+    return panel, future.result(), None
+
+def load_panels(loaders, timeout=DASHBOARD_PANEL_TIMEOUT):
+    """
+    Run the zero-argument callables in `loaders` ({panel: fn}) concurrently and yield
+    (panel, result, error) as each one finishes; any exception a loader raises becomes that
+    panel's error, so one failing panel never takes the others down. Panels still running
+    `timeout` seconds after the start are yielded with a TimeoutError.
+    """
+    # run each loader in a copy of this context so its queries keep the page tag
+    executor = get_dashboard_executor()
+    futures = {executor.submit(contextvars.copy_context().run, fn): panel for panel, fn in loaders.items()}
+    finished = set()
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            finished.add(future)
+            yield _panel_outcome(futures[future], future)
+    except FuturesTimeout:
+        for future, panel in futures.items():
+            if future in finished:
+                continue
+            if future.done():
+                yield _panel_outcome(panel, future)
             else:
-                sp_id = species_map[selected_species]
-                loc_id = location_map[selected_location]
-                if add_new_observer:
-                    ok, res = add_observer(new_obs_name, new_obs_org, new_obs_contact)
-                    if not ok:
-                        st.error(f"Failed to add observer: {res}")
-                        return
-                    # fetch observers again to get id
-                    observers = fetch_all_observers()
-                    observer_map = {f"{o['name']} ({o['organization']})": o['observer_id'] for o in observers}
-                    observer_choice = f"{new_obs_name} ({new_obs_org})"
-                obs_id_val = observer_map[observer_choice]
-
-                # Add water quality row first (optional)
-                ok_wq, wq_res = add_water_quality(loc_id, temperature, pH, salinity, pollution_index)
-                if not ok_wq:
-                    st.error(f"Failed to add water quality: {wq_res}")
-                    return
-                quality_id = wq_res  # lastrowid returned
-
-                obs_dt = datetime.combine(obs_date, obs_time)
-                ok_obs, obs_msg = add_observation(sp_id, loc_id, obs_id_val, quality_id, obs_dt, int(count_observed), remarks)
-                if ok_obs:
-                    st.success("Observation logged")
-                else:
-                    st.error(f"Failed to log observation: {obs_msg}")
+                future.cancel()
+                yield panel, None, TimeoutError(f"no data after {timeout:.0f}s")
+
+# ---------- STREAMLIT UI ----------
+def _cat(*parts):
+    """ Vectorized string concatenation of Series and literals (None/NaN render as 'None'). """
+    out = None
+    for part in parts:
+        if isinstance(part, pd.Series):
+            part = part.astype(object).where(part.notna(), None).astype(str)
+        out = part if out is None else out + part
+    return out
+
+# How each Manage Data table is listed in a record picker: cache key, loader, ID column, label builder
+PICKER_TABLES = {
+    "Species": ("Species", _load_species, "species_id",
+                lambda df: _cat("ID ", df['species_id'], ": ", df['common_name'])),
+    "Observers": ("Observer", _load_observer, "observer_id",
+                  lambda df: _cat("ID ", df['observer_id'], ": ", df['name'], " (", df['organization'], ")")),
+    "Locations": ("Location", _load_location, "location_id",
+                  lambda df: _cat("ID ", df['location_id'], ": ", df['location_name'], ", ", df['region'])),
+    "Conservation Actions": ("Conservation_Action", _load_action_labels, "action_id",
+                             lambda df: df['label']),
+}
+
+def observation_labels(df):
+    """ Display labels for a page of observations (see observation_browser). """
+    return _cat("ID ", df['obs_id'], ": ", df['common_name'], " at ", df['location_name'], " (", df['obs_date'], ")")
+
+@st.cache_resource
+def get_picker_indexes():
+    """ table -> (cache version, labels Series, {label: id}); shared by every session. """
+    return {}
+
+def picker_index(table):
+    """ Labels and the label -> ID map for a picker table, rebuilt only when the table's cache version changes. """
+    cache_key, loader, id_column, build_labels = PICKER_TABLES[table]
+    rows, version = get_reference_cache().get_versioned(cache_key, loader)
+    indexes = get_picker_indexes()
+    cached = indexes.get(table)
+    if version is not None and cached is not None and cached[0] == version:
+        return cached[1], cached[2]
+
+    df = _to_frame(rows or [])
+    if df.empty:
+        labels, id_map = pd.Series([], dtype=object), {}
+    else:
+        labels = build_labels(df).reset_index(drop=True)
+        id_map = dict(zip(labels.tolist(), df[id_column].tolist()))
+    if version is not None:
+        indexes[table] = (version, labels, id_map)
+    return labels, id_map
 
-    # ---------- ADD SPECIES / OBSERVER ----------
-    elif menu == "Add Species/Observer":
-        st.title("Add Species or Observer")
-        st.markdown("Add new species to track or new observers")
+def record_picker(table, label, key, multi=False):
+    """
+    Type-ahead picker over one of PICKER_TABLES. At most RECORD_PICKER_MAX_OPTIONS matching
+    labels are offered at a time. Returns the selected ID (None if nothing is selected),
+    or a list of IDs with multi=True.
+    """
+    labels, id_map = picker_index(table)
+    if labels.empty:
+        return [] if multi else None
+    query = st.text_input("Type to filter", key=f"{key}_filter", placeholder="ID, name, ...")
+    matches = labels[labels.str.contains(query, case=False, regex=False)] if query else labels
+    shown = matches.iloc[:RECORD_PICKER_MAX_OPTIONS].tolist()
+    if len(matches) > len(shown):
+        st.caption(f"Showing {len(shown)} of {len(matches)} matches. Type to narrow down.")
+
+    if multi:
+        # keep earlier choices selectable even when the filter no longer matches them
+        chosen = [c for c in st.session_state.get(f"{key}_select", []) if c in id_map]
+        options = list(dict.fromkeys(chosen + shown))
+        selected = st.multiselect(label, options, key=f"{key}_select")
+        return [id_map[s] for s in selected]
+    selected = st.selectbox(label, ["Select..."] + shown, key=f"{key}_select")
+    return None if selected == "Select..." else id_map[selected]
+
+def observation_browser(key):
+    """
+    Filter controls plus Previous/Next paging over Observation.
+    Only the current page is fetched; the stack of page cursors lives in st.session_state.
+    Returns the current page as a DataFrame.
+    """
+    species = fetch_all_species()
+    locations = fetch_all_locations()
+    observers = fetch_all_observers()
+    species_map = {f"{s['common_name']} ({s['scientific_name']})": s['species_id'] for s in species}
+    location_map = {f"{l['location_name']} - {l['region']}": l['location_id'] for l in locations}
+    observer_map = {f"{o['name']} ({o['organization']})": o['observer_id'] for o in observers}
+
+    fcol1, fcol2, fcol3, fcol4 = st.columns(4)
+    with fcol1:
+        species_choice = st.selectbox("Species", ["All"] + list(species_map), key=f"{key}_species")
+    with fcol2:
+        location_choice = st.selectbox("Location", ["All"] + list(location_map), key=f"{key}_location")
+    with fcol3:
+        observer_choice = st.selectbox("Observer", ["All"] + list(observer_map), key=f"{key}_observer")
+    with fcol4:
+        date_range = st.date_input("Date range", value=(), key=f"{key}_dates")
+
+    filters = {
+        "species_id": species_map.get(species_choice),
+        "location_id": location_map.get(location_choice),
+        "observer_id": observer_map.get(observer_choice),
+        "date_from": date_range[0] if len(date_range) > 0 else None,
+        "date_to": date_range[1] if len(date_range) > 1 else None,
+    }
 
-        tab1, tab2 = st.tabs(["Add Species", "Add Observer"])
+    # cursors[i] is the `after` value for page i; reset whenever the filters change
+    state_key = f"{key}_pages"
+    if st.session_state.get(f"{state_key}_filters") != filters:
+        st.session_state[f"{state_key}_filters"] = filters
+        st.session_state[state_key] = [None]
+    cursors = st.session_state[state_key]
+
+    page, next_cursor = fetch_observations_page(after=cursors[-1], **filters)
+
+    ncol1, ncol2, ncol3 = st.columns([1, 1, 4])
+    with ncol1:
+        if st.button("◀ Previous", key=f"{key}_prev", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with ncol2:
+        if st.button("Next ▶", key=f"{key}_next", disabled=next_cursor is None):
+            cursors.append(next_cursor)
+            st.rerun()
+    with ncol3:
+        st.caption(f"Page {len(cursors)} · {len(page)} row(s) · {OBSERVATION_PAGE_SIZE} per page")
+    return page
 
-        with tab1:
-            st.subheader("Add Species")
-            s_common = st.text_input("Common Name")
-            s_scientific = st.text_input("Scientific Name")
-            s_status = st.selectbox("Conservation Status", ["Least Concern", "Near Threatened", "Vulnerable", "Endangered", "Critically Endangered"])
+def main():
+    st.set_page_config(page_title="Marine Species Conservation", page_icon="🐟", layout="wide")
 
-            if st.button("Add Species"):
-                if not s_common:
-                    st.error("Common name is required")
-                else:
-                    ok, msg = add_species(s_common, s_scientific, s_status)
-                    if ok:
-                        st.success("Species added")
-                    else:
-                        st.error(f"Failed to add species: {msg}")
-
-        with tab2:
-            st.subheader("Add Observer")
-            o_name = st.text_input("Name")
-            o_org = st.text_input("Organization")
-            o_contact = st.text_input("Contact")
-
-            if st.button("Add Observer", key="add_obs_btn"):
-                if not o_name:
-                    st.error("Observer name is required")
-                else:
-                    ok, msg = add_observer(o_name, o_org, o_contact)
-                    if ok:
-                        st.success("Observer added")
-                    else:
-                        st.error(f"Failed to add observer: {msg}")
-
-    # ---------- SEARCH SPECIES ----------
-    elif menu == "Search Species":
-        st.title("Search Species")
-        q = st.text_input("Enter species common or scientific name")
-        if st.button("Search"):
-            if not q:
-                st.error("Please enter a search term")
-            else:
-                results = search_species_by_name(q)
-                if results:
-                    st.success(f"Found {len(results)} row(s)")
-                    for r in results:
-                        with st.expander(f"{r['common_name']} ({r.get('scientific_name','')})"):
-                            st.write(f"Conservation Status: {r.get('conservation_status')}")
-                            st.write(f"Total Observations: {r.get('total_observations')}")
-                            st.markdown("### Conservation Actions")
-                            actions = fetch_actions_for_species(r['species_id'])
-                            if actions:
-                                st.table(pd.DataFrame(actions))
-                            else:
-                                st.info("No actions recorded for this species")
-                else:
-                    st.warning("No species found")
-
-    # ---------- CONSERVATION ACTIONS ----------
-    elif menu == "Conservation Actions":
-        st.title("Conservation Actions")
-        conn = get_db_connection()
-        if not conn:
-            st.error("Cannot connect to DB")
-            return
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT ca.action_id, s.common_name, ca.action_type, ca.description, ca.start_date, ca.end_date
-            FROM Conservation_Action ca
-            JOIN Species s ON ca.species_id = s.species_id
-            ORDER BY ca.start_date DESC
-        """)
-        actions = pd.DataFrame(cursor.fetchall())
-        if not actions.empty:
-            st.dataframe(actions, use_container_width=True)
-        else:
-            st.info("No conservation actions recorded")
-        conn.close()
+    st.sidebar.title("Marine Conservation")
+    st.sidebar.markdown("---")
+    menu = st.sidebar.radio("Navigation", views.MENU, key="menu")
+    # Diagnostics is not in the menu; open it with ?page=diagnostics
+    if st.query_params.get("page") == "diagnostics":
+        menu = "Diagnostics"
+    setup_instrumentation()
+    instrumentation.set_page(menu)
+    st.sidebar.markdown("---")
+    use_snapshot = st.sidebar.checkbox(
+        "Analytics mode", key="analytics_mode",
+        help="Answer Dashboard and Reports queries from the Parquet snapshot instead of MySQL"
+    )
 
-    # ---------- MANAGE DATA (UPDATE/DELETE) ----------
-    elif menu == "Manage Data":
-        st.title("✏️ Manage Data")
-        
-        tab_update, tab_delete = st.tabs(["Update Records", "Delete Records"])
-
-        # ---------- UPDATE TAB ----------
-        with tab_update:
-            st.subheader("Update a Record")
-            st.info("Select a record to load its data into the form below for editing.")
-            
-            table_to_update = st.selectbox(
-                "Which data do you want to update?", 
-                ["Select...", "Species", "Observers", "Locations", "Conservation Actions"],
-                key="update_table_select"
-            )
-            
-            record_to_update_id = None
-            record_data = None
-            msg = ""
-            
-            if table_to_update == "Species":
-                data = pd.DataFrame(fetch_all_species())
-                if not data.empty:
-                    display_options = data.apply(lambda row: f"ID {row['species_id']}: {row['common_name']}", axis=1)
-                    id_map = dict(zip(display_options, data['species_id']))
-                    selected_display = st.selectbox("Select Species to Update:", ["Select..."] + list(display_options))
-                    
-                    if selected_display != "Select...":
-                        record_to_update_id = id_map[selected_display]
-                        record_data, msg = fetch_one_record("Species", "species_id", record_to_update_id)
-
-            elif table_to_update == "Observers":
-                data = pd.DataFrame(fetch_all_observers())
-                if not data.empty:
-                    display_options = data.apply(lambda row: f"ID {row['observer_id']}: {row['name']} ({row['organization']})", axis=1)
-                    id_map = dict(zip(display_options, data['observer_id']))
-                    selected_display = st.selectbox("Select Observer to Update:", ["Select..."] + list(display_options))
-                    
-                    if selected_display != "Select...":
-                        record_to_update_id = id_map[selected_display]
-                        record_data, msg = fetch_one_record("Observer", "observer_id", record_to_update_id)
-
-            elif table_to_update == "Locations":
-                data = pd.DataFrame(fetch_all_locations())
-                if not data.empty:
-                    display_options = data.apply(lambda row: f"ID {row['location_id']}: {row['location_name']}, {row['region']}", axis=1)
-                    id_map = dict(zip(display_options, data['location_id']))
-                    selected_display = st.selectbox("Select Location to Update:", ["Select..."] + list(display_options))
-                    
-                    if selected_display != "Select...":
-                        record_to_update_id = id_map[selected_display]
-                        record_data, msg = fetch_one_record("Location", "location_id", record_to_update_id)
-            
-            elif table_to_update == "Conservation Actions":
-                data = fetch_all_actions_full() # Using the existing full fetch
-                if not data.empty:
-                    display_options = data.apply(lambda row: f"ID {row['action_id']}: {row['action_type']} for {row['common_name']}", axis=1)
-                    id_map = dict(zip(display_options, data['action_id']))
-                    selected_display = st.selectbox("Select Action to Update:", ["Select..."] + list(display_options))
-                    
-                    if selected_display != "Select...":
-                        record_to_update_id = id_map[selected_display]
-                        record_data, msg = fetch_one_record("Conservation_Action", "action_id", record_to_update_id)
-
-            
-            # --- UPDATE FORM ---
-            if record_to_update_id:
-                st.markdown("---")
-                st.subheader(f"Editing Record ID: {record_to_update_id}")
-                
-                if not record_data:
-                    st.error(f"Failed to fetch record data: {msg}")
-                else:
-                    with st.form(key=f"update_form_{table_to_update}_{record_to_update_id}"):
-                        update_payload = {}
-                        
-                        if table_to_update == "Species":
-                            update_payload['common_name'] = st.text_input("Common Name", value=record_data.get('common_name'))
-                            update_payload['scientific_name'] = st.text_input("Scientific Name", value=record_data.get('scientific_name'))
-                            status_options = ["Least Concern", "Near Threatened", "Vulnerable", "Endangered", "Critically Endangered"]
-                            try:
-                                default_index = status_options.index(record_data.get('conservation_status'))
-                            except (ValueError, TypeError):
-                                default_index = 0
-                            update_payload['conservation_status'] = st.selectbox("Conservation Status", status_options, index=default_index)
-                            
-                        elif table_to_update == "Observers":
-                            update_payload['name'] = st.text_input("Name", value=record_data.get('name'))
-                            update_payload['organization'] = st.text_input("Organization", value=record_data.get('organization'))
-                            update_payload['contact'] = st.text_input("Contact", value=record_data.get('contact'))
-
-                        elif table_to_update == "Locations":
-                            update_payload['location_name'] = st.text_input("Location Name", value=record_data.get('location_name'))
-                            update_payload['region'] = st.text_input("Region", value=record_data.get('region'))
-                            water_options = ['Ocean', 'Sea', 'Lake', 'River']
-                            try:
-                                default_index = water_options.index(record_data.get('water_type'))
-                            except (ValueError, TypeError):
-                                default_index = 0
-                            update_payload['water_type'] = st.selectbox("Water Type", water_options, index=default_index)
-
-                        elif table_to_update == "Conservation Actions":
-                            update_payload['action_type'] = st.text_input("Action Type", value=record_data.get('action_type'))
-                            update_payload['description'] = st.text_area("Description", value=record_data.get('description'))
-                            update_payload['start_date'] = st.date_input("Start Date", value=record_data.get('start_date'))
-                            update_payload['end_date'] = st.date_input("End Date", value=record_data.get('end_date'))
-                        
-                        
-                        submitted = st.form_submit_button("Submit Update")
-                        if submitted:
-                            table_map = {
-                                "Species": ("Species", "species_id"),
-                                "Observers": ("Observer", "observer_id"),
-                                "Locations": ("Location", "location_id"),
-                                "Conservation Actions": ("Conservation_Action", "action_id")
-                            }
-                            table_name, id_column = table_map[table_to_update]
-                            
-                            ok, msg = update_record(table_name, id_column, record_to_update_id, update_payload)
-                            
-                            if ok:
-                                st.success(msg)
-                                st.rerun()
-                            else:
-                                st.error(f"Update failed: {msg}")
-
-        # ---------- DELETE TAB ----------
-        with tab_delete:
-            st.subheader("Delete Records")
-            st.warning("⚠️ **Warning:** Deleting records is permanent. Deletions may fail if the record is referenced by other data (e.g., deleting a Species that has Observations).")
-
-            table_to_manage = st.selectbox(
-                "Which data do you want to delete?", 
-                ["Select...", "Species", "Observers", "Locations", "Observations", "Conservation Actions"],
-                key="delete_table_select" # Add key to make it unique
-            )
-            
-            data = pd.DataFrame()
-            options = []
-            display_options = []
-            
-            if table_to_manage == "Species":
-                data = pd.DataFrame(fetch_all_species())
-                if not data.empty:
-                    st.dataframe(data, use_container_width=True)
-                    options = data['species_id']
-                    display_options = data.apply(lambda row: f"ID {row['species_id']}: {row['common_name']}", axis=1)
-            
-            elif table_to_manage == "Observers":
-                data = pd.DataFrame(fetch_all_observers())
-                if not data.empty:
-                    st.dataframe(data, use_container_width=True)
-                    options = data['observer_id']
-                    display_options = data.apply(lambda row: f"ID {row['observer_id']}: {row['name']} ({row['organization']})", axis=1)
-
-            elif table_to_manage == "Locations":
-                data = pd.DataFrame(fetch_all_locations())
-                if not data.empty:
-                    st.dataframe(data, use_container_width=True)
-                    options = data['location_id']
-                    display_options = data.apply(lambda row: f"ID {row['location_id']}: {row['location_name']}, {row['region']}", axis=1)
-
-            elif table_to_manage == "Observations":
-                data = fetch_all_observations_full()
-                if not data.empty:
-                    st.dataframe(data, use_container_width=True)
-                    options = data['obs_id']
-                    display_options = data.apply(lambda row: f"ID {row['obs_id']}: {row['common_name']} at {row['location_name']} ({row['obs_date']})", axis=1)
-
-            elif table_to_manage == "Conservation Actions":
-                data = fetch_all_actions_full()
-                if not data.empty:
-                    st.dataframe(data, use_container_width=True)
-                    options = data['action_id']
-                    display_options = data.apply(lambda row: f"ID {row['action_id']}: {row['action_type']} for {row['common_name']}", axis=1)
-
-            # Show delete controls if data is loaded
-            if not data.empty:
-                st.markdown("---")
-                selected_to_delete_display = st.multiselect(
-                    "Select record(s) to delete:", 
-                    options=display_options
-                )
-                
-                # Map display strings back to their corresponding IDs
-                id_map = dict(zip(display_options, options))
-                ids_to_delete = [id_map[display_val] for display_val in selected_to_delete_display]
-
-                if st.button("Delete Selected Records", type="primary"):
-                    if not ids_to_delete:
-                        st.error("Please select at least one record to delete.")
-                    else:
-                        success_count = 0
-                        fail_count = 0
-                        
-                        # Map UI selection to table name and ID column
-                        table_map = {
-                            "Species": ("Species", "species_id"),
-                            "Observers": ("Observer", "observer_id"),
-                            "Locations": ("Location", "location_id"),
-                            "Observations": ("Observation", "obs_id"),
-                            "Conservation Actions": ("Conservation_Action", "action_id")
-                        }
-                        table_name, id_column = table_map[table_to_manage]
-                        
-                        for record_id in ids_to_delete:
-                            ok, msg = delete_record(table_name, id_column, record_id)
-                            if ok:
-                                st.success(msg)
-                                success_count += 1
-                            else:
-                                st.error(f"Failed to delete ID {record_id}: {msg}")
-                                fail_count += 1
-                        
-                        st.info(f"Delete operation complete. {success_count} succeeded, {fail_count} failed.")
-                        st.rerun() # Refresh the data on the page
-            
-            elif table_to_manage != "Select...":
-                st.info("No data in this table to manage.")
+    views.render(menu, sys.modules[__name__], use_snapshot)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,340 @@
+# benchmark.py
+"""
+Benchmark harness for the app's data-access helpers and page renders.
+
+Every case is timed `repeats` times after a warm-up run. Cases marked cold clear the
+reference-data cache before each run so they measure the database rather than the cache.
+Page cases render a page of app.py headlessly with streamlit.testing (Streamlit 1.28+).
+Startup cases each start a fresh interpreter, so they measure what a new Streamlit process
+pays: importing app.py, and importing plus rendering one page for the first time.
+Results are appended to a JSON Lines file together with the git commit, the dataset
+size and the environment, so runs from different versions can be compared.
+
+Typical use against a local MySQL/MariaDB stand-in:
+    MARINE_DB_HOST=127.0.0.1 python synthetic_data.py 1e6 --seed 1
+    MARINE_DB_HOST=127.0.0.1 python benchmark.py run --label my-change
+    python benchmark.py compare            # latest run vs the one before; exit 1 on regressions
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import storage
+import views
+
+RESULTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "results.jsonl")
+DEFAULT_REPEATS = 5
+REGRESSION_THRESHOLD = 0.2      # flag cases whose median got this much slower
+MIN_REGRESSION_MS = 2.0         # ...and by at least this many milliseconds (ignores noise on tiny cases)
+
+PAGES = ["Dashboard", "Add Observation", "Search Species", "Conservation Actions", "Manage Data", "Reports"]
+
+# run in a fresh interpreter by the startup cases; argv[1] is app.py, argv[2] the page ("" = import only)
+STARTUP_PROBE = """
+import os, sys
+sys.path.insert(0, os.path.dirname(sys.argv[1]))
+if not sys.argv[2]:
+    import app
+    raise SystemExit(0)
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.session_state["menu"] = sys.argv[2]
+at.run()
+if at.exception:
+    sys.exit(at.exception[0].message)
+"""
+
+
+def _rows(result):
+    """Best-effort row count of a helper's return value."""
+    if isinstance(result, tuple):
+        result = result[0]
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+
+def cases(app):
+    """name -> (callable, cold). `cold` cases run with the reference cache cleared."""
+    def with_conn(fn):
+        def run():
+            conn = app.get_db_connection()
+            try:
+                return fn(conn)
+            finally:
+                conn.close()
+        return run
+
+    def deep_page():
+        # walk a few pages with the keyset cursor, as the Manage Data browser does
+        df, cursor = app.fetch_observations_page()
+        for _ in range(4):
+            if cursor is None:
+                break
+            df, cursor = app.fetch_observations_page(after=cursor)
+        return df
+
+    first_species = lambda: (app.fetch_all_species() or [{"species_id": 1}])[0]["species_id"]
+    result = {
+        "fetch_all_species": (app.fetch_all_species, True),
+        "fetch_all_species (cached)": (app.fetch_all_species, False),
+        "fetch_all_locations": (app.fetch_all_locations, True),
+        "fetch_all_observers": (app.fetch_all_observers, True),
+        "fetch_observations_page": (app.fetch_observations_page, False),
+        "fetch_observations_page (5 pages)": (deep_page, False),
+        "fetch_observations_page (species filter)": (lambda: app.fetch_observations_page(species_id=first_species()), False),
+        "fetch_all_actions_full": (app.fetch_all_actions_full, False),
+        "fetch_actions_for_species": (lambda: app.fetch_actions_for_species(first_species()), False),
+        "search_species_by_name (prefix)": (lambda: app.search_species_by_name("blue"), False),
+        "search_species_by_name (fuzzy)": (lambda: app.search_species_by_name("wale"), False),
+        "fetch_recent_observations": (app.fetch_recent_observations, False),
+        "fetch_dashboard_summary": (with_conn(app.fetch_dashboard_summary), False),
+        "fetch_observation_trend (week)": (app.fetch_observation_trend, False),
+        "fetch_observation_trend (month by species)": (lambda: app.fetch_observation_trend("month", by="species"), False),
+        "fetch_water_quality_stats (region)": (lambda: app.fetch_water_quality_stats("region"), False),
+        "fetch_water_quality_stats (location, 30 days)": (lambda: app.fetch_water_quality_stats(days=30), False),
+        "fetch_one_record": (lambda: app.fetch_one_record("Species", "species_id", first_species()), False),
+    }
+    for name in app.analytics.REPORTS:
+        result[f"run_report ({name})"] = (lambda name=name: app.run_report(name), False)
+    return result
+
+
+def write_cases(app):
+    """Cases that write; each leaves the dataset as it found it."""
+    species_id = (app.fetch_all_species() or [{"species_id": 1}])[0]["species_id"]
+    location_id = (app.fetch_all_locations() or [{"location_id": 1}])[0]["location_id"]
+    observer_id = (app.fetch_all_observers() or [{"observer_id": 1}])[0]["observer_id"]
+
+    def submit_and_delete(n):
+        def run():
+            ok, msg = app.submit_observations([{
+                "species_id": species_id, "location_id": location_id, "observer_id": observer_id,
+                "obs_date": time.strftime("%Y-%m-%d %H:%M:%S"), "count_observed": 1, "remarks": "benchmark",
+            }] * n)
+            if not ok:
+                raise RuntimeError(msg)
+            ok, outcomes = app.delete_records("Observation", "obs_id", [r["obs_id"] for r in msg])
+            left = [obs_id for obs_id, (status, _) in outcomes.items() if status != "deleted"] if ok else outcomes
+            if not ok or left or len(outcomes) != n:
+                # a leak would make the dataset drift between the runs being compared
+                raise RuntimeError(f"benchmark rows were not all deleted: {left}")
+            return outcomes
+        return run
+
+    return {
+        "submit_observations + delete_records (1)": (submit_and_delete(1), False),
+        "submit_observations + delete_records (100)": (submit_and_delete(100), False),
+    }
+
+
+def page_cases(app_path):
+    """One case per page, rendered headlessly; empty if streamlit.testing is unavailable."""
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        return {}
+
+    def render(page):
+        def run():
+            at = AppTest.from_file(app_path, default_timeout=120)
+            at.run()
+            at.sidebar.radio[0].set_value(page).run()
+            if at.exception:
+                raise RuntimeError(f"{page} raised: {at.exception[0].message}")
+            return None
+        return run
+
+    return {f"page: {page}": (render(page), False) for page in PAGES}
+
+
+def startup_cases(app_path):
+    """Cold-start cases: import app.py, and first render of each page, each in a new process."""
+    def start(page):
+        def run():
+            proc = subprocess.run([sys.executable, "-c", STARTUP_PROBE, app_path, page],
+                                  capture_output=True, text=True, timeout=300)
+            if proc.returncode:
+                raise RuntimeError((proc.stderr.strip().splitlines() or ["startup probe failed"])[-1])
+            return None
+        return run
+
+    result = {"startup: import app": (start(""), False)}
+    if not page_cases(app_path):    # first renders need streamlit.testing, like the page cases
+        return result
+    for page in views.MENU:
+        result[f"startup: first render {page}"] = (start(page), False)
+    return result
+
+
+def time_case(app, fn, cold, repeats):
+    samples = []
+    rows = None
+    fn()    # warm-up: connections, imports, plan caches
+    for _ in range(repeats):
+        if cold:
+            app.get_reference_cache().invalidate()
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+        rows = _rows(result)
+    samples.sort()
+    return {
+        "median_ms": statistics.median(samples),
+        "min_ms": samples[0],
+        "p95_ms": samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))],
+        "mean_ms": statistics.fmean(samples),
+        "repeats": repeats,
+        "rows": rows,
+    }
+
+
+def dataset_size(app):
+    conn = app.get_db_connection()
+    if not conn:
+        return {}
+    try:
+        cursor = conn.cursor()
+        sizes = {}
+        for table in ["Species", "Location", "Observer", "Water_Quality", "Observation", "Conservation_Action"]:
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            sizes[table] = cursor.fetchone()[0]
+        cursor.close()
+        return sizes
+    finally:
+        conn.close()
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(app, repeats=DEFAULT_REPEATS, include_writes=False, include_pages=False, include_startup=False,
+        only=None, label=None, on_case=None):
+    """Time every case and return the result record (see save_result)."""
+    app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    selected = cases(app)
+    if include_writes:
+        selected.update(write_cases(app))
+    if include_pages:
+        selected.update(page_cases(app_path))
+    if include_startup:
+        selected.update(startup_cases(app_path))
+    if only:
+        selected = {name: case for name, case in selected.items() if only in name}
+
+    results = {}
+    for name, (fn, cold) in selected.items():
+        try:
+            results[name] = time_case(app, fn, cold, repeats)
+        except (storage.Error, RuntimeError, subprocess.TimeoutExpired) as e:
+            results[name] = {"error": str(e)}
+        if on_case:
+            on_case(name, results[name])
+    return {
+        "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "label": label,
+        "commit": _git_commit(),
+        "dataset": dataset_size(app),
+        "environment": {"python": platform.python_version(), "machine": platform.machine(),
+                        "system": platform.system(), "db_host": app.DB_HOST},
+        "results": results,
+    }
+
+
+# ---------- RESULTS ----------
+def save_result(record, path=RESULTS_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def load_results(path=RESULTS_FILE):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare(baseline, current, threshold=REGRESSION_THRESHOLD, min_ms=MIN_REGRESSION_MS):
+    """[(case, baseline ms, current ms, change, regressed)] for cases present in both runs."""
+    rows = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if not before or "median_ms" not in before or "median_ms" not in result:
+            continue
+        old, new = before["median_ms"], result["median_ms"]
+        change = (new - old) / old if old else 0.0
+        rows.append((name, old, new, change, change > threshold and new - old > min_ms))
+    return rows
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the app's data-access helpers")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_cmd = sub.add_parser("run", help="time every case and append the results")
+    run_cmd.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    run_cmd.add_argument("--writes", action="store_true", help="include cases that insert and delete rows")
+    run_cmd.add_argument("--pages", action="store_true", help="include headless page renders")
+    run_cmd.add_argument("--startup", action="store_true",
+                         help="include cold-start cases (import and first page render in a new process)")
+    run_cmd.add_argument("--only", help="run only cases whose name contains this text")
+    run_cmd.add_argument("--label", help="free-form tag stored with the results")
+    run_cmd.add_argument("--results", default=RESULTS_FILE)
+    cmp_cmd = sub.add_parser("compare", help="compare two stored runs")
+    cmp_cmd.add_argument("--baseline", help="commit or label of the baseline run (default: the run before the latest)")
+    cmp_cmd.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    cmp_cmd.add_argument("--results", default=RESULTS_FILE)
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        history = load_results(args.results)
+        if len(history) < 2:
+            print("Need at least two stored runs to compare")
+            return 1
+        current = history[-1]
+        if args.baseline:
+            matches = [r for r in history[:-1] if args.baseline in (r.get("commit"), r.get("label"))]
+            if not matches:
+                print(f"No stored run with commit or label {args.baseline!r}")
+                return 1
+            baseline = matches[-1]
+        else:
+            baseline = history[-2]
+        if baseline.get("dataset") != current.get("dataset"):
+            print("Warning: the runs used different datasets", baseline.get("dataset"), current.get("dataset"))
+        regressions = 0
+        for name, old, new, change, regressed in compare(baseline, current, args.threshold):
+            regressions += regressed
+            print(f"{'!!' if regressed else '  '} {name:<48} {old:9.2f} ms -> {new:9.2f} ms ({change:+.0%})")
+        print(f"{regressions} regression(s) vs {baseline.get('commit') or baseline.get('label') or baseline['at']}")
+        return 1 if regressions else 0
+
+    import app  # deferred: only the CLI needs the app's connection settings
+
+    def report(name, result):
+        if "error" in result:
+            print(f"{name:<48} ERROR {result['error']}")
+        else:
+            print(f"{name:<48} median {result['median_ms']:9.2f} ms  p95 {result['p95_ms']:9.2f} ms  rows {result['rows']}")
+
+    record = run(app, repeats=args.repeats, include_writes=args.writes, include_pages=args.pages,
+                 include_startup=args.startup, only=args.only, label=args.label, on_case=report)
+    save_result(record, args.results)
+    print(f"Saved to {args.results} (dataset: {record['dataset']})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,325 @@
+# bulk_import.py
+"""
+Bulk import of observations and water-quality readings from CSV or Parquet files.
+
+Files are streamed in chunks. Species / location / observer names are resolved to IDs
+through an in-memory LookupIndex, and each chunk is written with one executemany()
+inside its own transaction. Rows that cannot be resolved or inserted are reported
+back with their file row number instead of aborting the import.
+
+Command line:
+    python bulk_import.py observations sightings.csv
+    python bulk_import.py water_quality readings.parquet --chunk-size 5000
+"""
+import argparse
+import os
+import time
+
+import lazy_import
+import storage
+
+pd = lazy_import.module("pandas")
+
+DEFAULT_CHUNK_SIZE = 2000
+CHUNK_RETRIES = 3             # whole-chunk retries after a deadlock or lock wait timeout
+
+IMPORT_KINDS = ["observations", "water_quality"]
+
+# Columns each kind needs, as (name column, id column) alternatives or plain columns
+REQUIRED_COLUMNS = {
+    "observations": [("species", "species_id"), ("location", "location_id"), ("observer", "observer_id"),
+                     "obs_date", "count_observed"],
+    "water_quality": [("location", "location_id"), "temperature", "pH", "salinity", "pollution_index"],
+}
+
+INSERT_SQL = {
+    "observations": ("INSERT INTO Observation (species_id, location_id, observer_id, quality_id, obs_date, count_observed, remarks) "
+                     "VALUES (%s, %s, %s, %s, %s, %s, %s)"),
+    "water_quality": ("INSERT INTO Water_Quality (location_id, temperature, pH, salinity, pollution_index, measured_at) "
+                      "VALUES (%s, %s, %s, %s, %s, %s)"),
+}
+
+
+# ---------- LOOKUP INDEX ----------
+def _normalize(value):
+    return str(value).strip().casefold()
+
+
+class LookupIndex:
+    """
+    Case-insensitive name -> ID maps for Species, Location and Observer.
+    Names that map to more than one ID are remembered as ambiguous and never resolved.
+    """
+    def __init__(self, species, locations, observers):
+        self.maps = {
+            "species": self._build(species, "species_id", ["common_name", "scientific_name"]),
+            "location": self._build(locations, "location_id", ["location_name"]),
+            "observer": self._build(observers, "observer_id", ["name"]),
+        }
+
+    @staticmethod
+    def _build(rows, id_column, name_columns):
+        index = {}
+        ambiguous = set()
+        for row in rows:
+            for col in name_columns:
+                if not row.get(col):
+                    continue
+                key = _normalize(row[col])
+                if key in index and index[key] != row[id_column]:
+                    ambiguous.add(key)
+                index[key] = row[id_column]
+        for key in ambiguous:
+            del index[key]
+        return index
+
+    def resolve(self, kind, names):
+        """Map a Series of names to IDs (NaN where the name is unknown or ambiguous)."""
+        return names.map(lambda v: self.maps[kind].get(_normalize(v)) if pd.notna(v) else None)
+
+
+# ---------- FILE READING ----------
+def detect_format(filename):
+    return "parquet" if os.path.splitext(str(filename))[1].lower() in (".parquet", ".pq") else "csv"
+
+
+def iter_chunks(source, chunk_size=DEFAULT_CHUNK_SIZE, file_format="csv"):
+    """Yield DataFrames of at most chunk_size rows from a CSV or Parquet path / file object."""
+    if file_format == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet import requires pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, chunksize=chunk_size)
+
+
+# ---------- CHUNK PREPARATION ----------
+def _python_values(series):
+    """Convert a Series to plain Python values mysql.connector accepts (NaN/NaT -> None)."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return [None if pd.isna(v) else v.to_pydatetime() for v in series]
+    return [None if pd.isna(v) else (v.item() if hasattr(v, "item") else v) for v in series]
+
+
+def _resolve_ids(chunk, lookup, kind, rejects):
+    """Return a Series of IDs for `kind`, taken from `<kind>_id` or resolved from the `<kind>` name column."""
+    id_col = f"{kind}_id"
+    if id_col in chunk:
+        ids = pd.to_numeric(chunk[id_col], errors="coerce")
+        if kind in chunk:
+            ids = ids.fillna(lookup.resolve(kind, chunk[kind]))
+    else:
+        ids = lookup.resolve(kind, chunk[kind])
+    ids = pd.to_numeric(ids, errors="coerce")
+    for idx in ids.index[ids.isna()]:
+        name = chunk.at[idx, kind] if kind in chunk else None
+        if name is None or pd.isna(name):
+            rejects[idx] = f"missing {kind}"
+        else:
+            rejects[idx] = f"unknown or ambiguous {kind}: {name!r}"
+    return ids
+
+
+def _numeric(chunk, column, rejects, required=True):
+    values = pd.to_numeric(chunk[column], errors="coerce") if column in chunk else pd.Series(float("nan"), index=chunk.index)
+    if required:
+        for idx in values.index[values.isna()]:
+            rejects.setdefault(idx, f"invalid or missing {column}")
+    return values
+
+
+def prepare_chunk(chunk, kind, lookup):
+    """
+    Validate one chunk and resolve names to IDs.
+    Returns (rows, row_numbers, rejects): parameter tuples for INSERT_SQL[kind], the
+    DataFrame index of each tuple, and {index: reason} for rows that were dropped.
+    """
+    rejects = {}
+    if kind == "observations":
+        species_ids = _resolve_ids(chunk, lookup, "species", rejects)
+        location_ids = _resolve_ids(chunk, lookup, "location", rejects)
+        observer_ids = _resolve_ids(chunk, lookup, "observer", rejects)
+        obs_dates = pd.to_datetime(chunk["obs_date"], errors="coerce")
+        for idx in obs_dates.index[obs_dates.isna()]:
+            rejects.setdefault(idx, "invalid or missing obs_date")
+        counts = _numeric(chunk, "count_observed", rejects)
+        for idx in counts.index[(counts < 0) | (counts % 1 != 0)]:
+            rejects.setdefault(idx, "count_observed must be a non-negative integer")
+        quality_ids = _numeric(chunk, "quality_id", rejects, required=False)
+        remarks = chunk["remarks"] if "remarks" in chunk else pd.Series(None, index=chunk.index, dtype=object)
+        columns = [species_ids, location_ids, observer_ids, quality_ids, obs_dates, counts, remarks]
+        int_columns = {0, 1, 2, 3, 5}
+    else:
+        location_ids = _resolve_ids(chunk, lookup, "location", rejects)
+        columns = [location_ids] + [_numeric(chunk, c, rejects) for c in ("temperature", "pH", "salinity", "pollution_index")]
+        # optional measured_at; blank means "now", anything unparseable is rejected
+        now = pd.Timestamp.now().floor("s")
+        if "measured_at" in chunk:
+            measured_at = pd.to_datetime(chunk["measured_at"], errors="coerce")
+            for idx in measured_at.index[measured_at.isna() & chunk["measured_at"].notna()]:
+                rejects.setdefault(idx, "invalid measured_at")
+            measured_at = measured_at.fillna(now)
+        else:
+            measured_at = pd.Series(now, index=chunk.index)
+        columns.append(measured_at)
+        int_columns = {0}
+
+    keep = ~chunk.index.isin(list(rejects))
+    values = []
+    for i, col in enumerate(columns):
+        col = col[keep]
+        if i in int_columns:
+            col = col.astype("Int64")
+        values.append(_python_values(col))
+    rows = list(zip(*values))
+    return rows, list(chunk.index[keep]), rejects
+
+
+# ---------- CHUNK INSERT ----------
+def insert_chunk(conn, kind, rows, row_numbers, retries=CHUNK_RETRIES):
+    """
+    Insert one chunk in a single transaction with executemany().
+    If the batch fails on a bad row (an integrity or data error, e.g. a foreign key violation),
+    the chunk is retried row by row so only the offending rows are rejected. A deadlock or lock
+    wait timeout rolls the chunk back and retries it whole, up to `retries` times; that and any
+    other error (e.g. a lost connection) is raised with nothing of the chunk written.
+    Returns (inserted, {row_number: reason}).
+    """
+    if not rows:
+        return 0, {}
+    sql = INSERT_SQL[kind]
+    cursor = conn.cursor()
+    try:
+        for attempt in range(retries + 1):
+            try:
+                return _insert_rows(conn, cursor, sql, rows, row_numbers)
+            except storage.Error as e:
+                conn.rollback()
+                if not isinstance(e, storage.LockError) or attempt == retries:
+                    raise
+    finally:
+        cursor.close()
+
+
+def _insert_rows(conn, cursor, sql, rows, row_numbers):
+    try:
+        cursor.executemany(sql, rows)
+        conn.commit()
+        return len(rows), {}
+    except (storage.IntegrityError, storage.DataError):
+        conn.rollback()
+
+    inserted = 0
+    rejects = {}
+    for row_number, row in zip(row_numbers, rows):
+        try:
+            cursor.execute(sql, row)
+            inserted += 1
+        except (storage.IntegrityError, storage.DataError) as e:
+            rejects[row_number] = str(e)    # only this statement failed; the transaction goes on
+    conn.commit()
+    return inserted, rejects
+
+
+def import_file(conn, source, kind, lookup, chunk_size=DEFAULT_CHUNK_SIZE, file_format="csv", on_chunk=None):
+    """
+    Stream `source` into the database chunk by chunk.
+    on_chunk(report) is called after every chunk with a dict of per-chunk and running totals.
+    Returns (success, result) where result holds the totals and a list of rejects
+    (1-based data row number, reason); on failure result is an error message.
+    """
+    if kind not in IMPORT_KINDS:
+        return False, f"Unknown import kind: {kind}"
+
+    started = time.perf_counter()
+    totals = {"rows": 0, "inserted": 0, "rejected": 0, "chunks": 0}
+    rejects = []
+    offset = 0
+    try:
+        for chunk in iter_chunks(source, chunk_size, file_format):
+            chunk_started = time.perf_counter()
+            chunk = chunk.reset_index(drop=True)
+            chunk.index = chunk.index + offset + 1
+            offset += len(chunk)
+
+            missing = [c for c in REQUIRED_COLUMNS[kind]
+                       if not (any(alt in chunk for alt in c) if isinstance(c, tuple) else c in chunk)]
+            if missing:
+                names = [" or ".join(c) if isinstance(c, tuple) else c for c in missing]
+                return False, f"Missing required column(s): {', '.join(names)}"
+
+            rows, row_numbers, chunk_rejects = prepare_chunk(chunk, kind, lookup)
+            inserted, insert_rejects = insert_chunk(conn, kind, rows, row_numbers)
+            chunk_rejects.update(insert_rejects)
+
+            elapsed = time.perf_counter() - chunk_started
+            totals["chunks"] += 1
+            totals["rows"] += len(chunk)
+            totals["inserted"] += inserted
+            totals["rejected"] += len(chunk_rejects)
+            rejects.extend(sorted(chunk_rejects.items()))
+            if on_chunk:
+                on_chunk({
+                    "chunk": totals["chunks"],
+                    "rows": len(chunk),
+                    "inserted": inserted,
+                    "rejected": len(chunk_rejects),
+                    "seconds": elapsed,
+                    "rows_per_sec": len(chunk) / elapsed if elapsed else 0.0,
+                    "total_rows": totals["rows"],
+                    "total_inserted": totals["inserted"],
+                })
+    except (storage.Error, RuntimeError, ValueError, OSError) as e:
+        conn.rollback()
+        return False, f"Import stopped after {totals['rows']} row(s): {e}"
+
+    totals["seconds"] = time.perf_counter() - started
+    totals["rows_per_sec"] = totals["rows"] / totals["seconds"] if totals["seconds"] else 0.0
+    totals["rejects"] = rejects
+    return True, totals
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import observations or water-quality readings")
+    parser.add_argument("kind", choices=IMPORT_KINDS)
+    parser.add_argument("path", help="CSV or Parquet file")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--format", choices=["csv", "parquet"], help="defaults to the file extension")
+    parser.add_argument("--rejects", help="write rejected rows (row, reason) to this CSV file")
+    args = parser.parse_args(argv)
+
+    import app  # deferred: only the CLI needs the app's connection settings
+
+    lookup = LookupIndex(app.fetch_all_species(), app.fetch_all_locations(), app.fetch_all_observers())
+    conn = app.get_db_connection()
+    if not conn:
+        print("Could not connect to the database")
+        return 1
+
+    def report(r):
+        print(f"chunk {r['chunk']}: {r['inserted']}/{r['rows']} inserted, {r['rejected']} rejected, "
+              f"{r['rows_per_sec']:.0f} rows/s ({r['total_inserted']} inserted so far)")
+
+    try:
+        ok, result = import_file(conn, args.path, args.kind, lookup, args.chunk_size,
+                                 args.format or detect_format(args.path), on_chunk=report)
+    finally:
+        conn.close()
+
+    if not ok:
+        print(result)
+        return 1
+    print(f"Done: {result['inserted']} of {result['rows']} row(s) inserted, {result['rejected']} rejected "
+          f"in {result['seconds']:.1f}s ({result['rows_per_sec']:.0f} rows/s)")
+    if args.rejects and result["rejects"]:
+        pd.DataFrame(result["rejects"], columns=["row", "reason"]).to_csv(args.rejects, index=False)
+        print(f"Rejected rows written to {args.rejects}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,206 @@
+# change_feed.py
+"""
+The Observation_Change log (migration 0004) and what reads it.
+
+Triggers append (change_id, obs_id, op) to the log for every insert, update and delete on
+Observation. A ChangeFeedMemo keeps the results of observation queries (the Dashboard's recent
+list) and reuses them until the newest change_id moves on, so an unchanged table costs one
+indexed lookup instead of the query.
+
+change_ids are handed out when a transaction writes, not when it commits, so change 11 can be
+visible before change 10 has committed (a bulk import chunk or an ingest batch can hold its ids
+for a long time). advance() and fill_gaps() track the ids a reader skipped as (first, last)
+runs, for readers that follow an id (the analytics export's high-water mark): a run is looked
+up again until it fills in or MAX_TRANSACTION_SECONDS pass, by when its transaction has rolled
+back (which leaves the id unused for good) or is longer than any this app runs.
+
+Command line:
+    python change_feed.py status
+    python change_feed.py prune --days 7
+"""
+import argparse
+import bisect
+import threading
+import time
+
+import storage
+
+CHANGE_TABLE = "Observation_Change"
+GAP_GRACE_SECONDS = 5        # cached() reuses nothing while the newest change is younger than this
+MAX_TRANSACTION_SECONDS = 900  # longest expected write transaction; skipped change_ids are watched this long
+PRUNE_BATCH = 10000
+DEFAULT_RETENTION_DAYS = 7
+
+
+# ---------- LOG ----------
+def _query_log(conn, sql, params=()):
+    """Rows of one query on the change log; None when the log does not exist (migration 0004 not applied)."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    except storage.Error as e:
+        if storage.is_missing_table(e):
+            return None
+        raise
+    finally:
+        cursor.close()
+
+
+def latest_change(conn):
+    """(change_id, age in seconds) of the newest change, (0, None) for an empty log, None without a log."""
+    rows = _query_log(conn, f"SELECT change_id, TIMESTAMPDIFF(SECOND, changed_at, NOW()) FROM {CHANGE_TABLE} "
+                            "ORDER BY change_id DESC LIMIT 1")
+    if rows is None:
+        return None
+    return tuple(rows[0]) if rows else (0, None)
+
+
+def fill_gaps(gaps, change_ids):
+    """`gaps` ((first, last) runs) without `change_ids`, which have turned up since."""
+    remaining = []
+    change_ids = sorted(change_ids)
+    for first, last in sorted(gaps):
+        start = bisect.bisect_left(change_ids, first)
+        for change_id in change_ids[start:bisect.bisect_right(change_ids, last)]:
+            if change_id > first:
+                remaining.append((first, change_id - 1))
+            first = change_id + 1
+        if first <= last:
+            remaining.append((first, last))
+    return remaining
+
+
+def advance(since, changes):
+    """
+    (version, gaps) after reading `changes` (rows starting with change_id, in order) from
+    version `since`: the newest change_id, and the runs of ids between `since` and it that
+    were missing, as [(first, last)].
+    """
+    version = since
+    gaps = []
+    for change in changes:
+        if change[0] > version + 1:
+            gaps.append((version + 1, change[0] - 1))
+        version = max(version, change[0])
+    return version, gaps
+
+
+def record_reset(conn):
+    """Tell every reader to reload, after rows changed without firing the triggers (e.g. EXCHANGE PARTITION)."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"INSERT INTO {CHANGE_TABLE} (obs_id, op) VALUES (0, 'reset')")
+        conn.commit()
+        return True
+    except storage.Error as e:
+        if storage.is_missing_table(e):
+            return False
+        raise
+    finally:
+        cursor.close()
+
+
+def prune(conn, older_than_days=DEFAULT_RETENTION_DAYS, batch=PRUNE_BATCH):
+    """Delete changes older than `older_than_days` in batches, always keeping the newest. Returns rows deleted."""
+    latest = latest_change(conn)
+    if not latest or not latest[0]:
+        return 0
+    deleted = 0
+    cursor = conn.cursor()
+    try:
+        while True:
+            cursor.execute(f"DELETE FROM {CHANGE_TABLE} WHERE changed_at < NOW() - INTERVAL %s DAY "
+                           "AND change_id < %s LIMIT %s", (older_than_days, latest[0], batch))
+            conn.commit()
+            deleted += cursor.rowcount
+            if cursor.rowcount < batch:
+                return deleted
+    finally:
+        cursor.close()
+
+
+def log_status(conn):
+    """{'oldest', 'newest', 'rows'} of the change log, or None without a log."""
+    rows = _query_log(conn, f"SELECT MIN(change_id), MAX(change_id), COUNT(*) FROM {CHANGE_TABLE}")
+    if rows is None:
+        return None
+    oldest, newest, count = rows[0]
+    return {"oldest": oldest, "newest": newest, "rows": count}
+
+
+# ---------- MEMO ----------
+class ChangeFeedMemo:
+    """
+    Results of observation queries, shared by every session and reused until the change log
+    moves on. Without a change log nothing is reused.
+    """
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self.version = None            # newest change_id seen
+        self._memo = {}                # name -> (change_id, stored_at, value)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "bypassed": 0}
+
+    def cached(self, conn, name, compute):
+        """
+        compute(), reused until the change log moves on or `ttl` expires. Nothing is reused
+        while the newest change is younger than the grace period (it may still have company).
+        """
+        latest = latest_change(conn)
+        if latest is None or (latest[1] is not None and latest[1] < GAP_GRACE_SECONDS):
+            with self._lock:
+                self._stats["bypassed"] += 1
+            return compute()
+        now = time.monotonic()
+        with self._lock:
+            self.version = latest[0]
+            hit = self._memo.get(name)
+            if hit and hit[0] == latest[0] and now - hit[1] <= self.ttl:
+                self._stats["hits"] += 1
+                return hit[2]
+            self._stats["misses"] += 1
+        value = compute()
+        with self._lock:
+            self._memo[name] = (latest[0], now, value)
+        return value
+
+    def clear_cached(self):
+        """Forget every cached value, e.g. after a species or location was renamed."""
+        with self._lock:
+            self._memo.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["version"] = self.version
+            stats["entries"] = len(self._memo)
+        return stats
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Observation change log")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="show the retained range of the log")
+    prune_cmd = sub.add_parser("prune", help="delete old changes")
+    prune_cmd.add_argument("--days", type=int, default=DEFAULT_RETENTION_DAYS)
+    args = parser.parse_args(argv)
+
+    import app  # deferred: only the CLI needs the app's connection settings
+
+    conn = app.open_dedicated_connection(app.DB_NAME)
+    try:
+        if args.command == "status":
+            status = log_status(conn)
+            print("No change log (apply migrations)" if status is None else
+                  f"{status['rows']} change(s), versions {status['oldest']}..{status['newest']}")
+            return 0
+        print(f"Deleted {prune(conn, args.days)} change(s) older than {args.days} day(s)")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
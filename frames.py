@@ -0,0 +1,186 @@
+# frames.py
+"""
+Query results streamed straight into compact DataFrames.
+
+read_frame(cursor) reads an executed query with fetchmany() in chunks of `chunk_size` rows and
+converts every chunk column by column into NumPy arrays before the next one is fetched, so no
+per-row dict or tuple outlives its chunk (a plain mysql.connector cursor is unbuffered, so the
+rows are not held by the driver either). Column dtypes:
+
+    strings         coded against a table of distinct values while streaming; a column with at
+                    most CATEGORY_MAX_RATIO distinct values per row becomes a categorical
+    integers        the smallest of int8/16/32/64 that fits; nullable Int* when there are NULLs
+    DECIMAL/floats  float64 (NULL -> NaN)
+    dates/datetimes datetime64[ns] (NULL -> NaT)
+    anything else   object
+
+max_rows and max_bytes stop reading early; the rest of the result is read and dropped so the
+connection stays usable, and the frame gets attrs["truncated"] = True. Put a LIMIT in the query
+as well when a row cap is known up front, so the server does not produce rows nobody keeps.
+"""
+import datetime
+import decimal
+
+import lazy_import
+
+np = lazy_import.module("numpy")
+pd = lazy_import.module("pandas")
+
+CHUNK_ROWS = 5000
+CATEGORY_MAX_RATIO = 0.5
+_INT_DTYPES = ["int8", "int16", "int32", "int64"]
+
+
+def _kind(value):
+    if isinstance(value, bool):
+        return "object"
+    if isinstance(value, str):
+        return "str"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, (float, decimal.Decimal)):
+        return "float"
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return "datetime"
+    return "object"
+
+
+class _Column:
+    """One column's converted chunks; strings are kept as int32 codes into `categories`."""
+    def __init__(self, name):
+        self.name = name
+        self.kind = None        # decided by the first non-NULL value
+        self.parts = []
+        self.masks = []         # int columns: True where NULL
+        self.codes = {}
+        self.categories = []
+        self.nbytes = 0
+        self.leading_nulls = 0  # NULLs seen before the kind was known
+
+    def _convert(self, values):
+        if self.kind == "str":
+            codes = self.codes
+            for v in values:
+                if v is not None and v not in codes:
+                    if not isinstance(v, str):
+                        raise TypeError(v)
+                    codes[v] = len(self.categories)
+                    self.categories.append(v)
+                    self.nbytes += len(v)
+            return np.fromiter((-1 if v is None else codes[v] for v in values), dtype="int32", count=len(values))
+        if self.kind == "int":
+            if any(isinstance(v, bool) or not (v is None or isinstance(v, int)) for v in values):
+                raise TypeError(values)
+            mask = np.fromiter((v is None for v in values), dtype=bool, count=len(values))
+            self.masks.append(mask)
+            return np.fromiter((0 if v is None else v for v in values), dtype="int64", count=len(values))
+        if self.kind == "float":
+            return np.fromiter((np.nan if v is None else float(v) for v in values), dtype="float64", count=len(values))
+        if self.kind == "datetime":
+            if any(not (v is None or isinstance(v, (datetime.datetime, datetime.date))) for v in values):
+                raise TypeError(values)
+            return np.array(values, dtype="datetime64[ns]")
+        part = np.empty(len(values), dtype=object)
+        part[:] = values
+        return part
+
+    def _as_objects(self):
+        """Every part so far as an object array (when a column turns out to hold mixed types)."""
+        if self.kind == "str":
+            lookup = np.array(self.categories + [None], dtype=object)     # code -1 -> None
+            parts = [lookup[p] for p in self.parts]
+        elif self.kind == "int":
+            parts = []
+            for p, m in zip(self.parts, self.masks):
+                objects = p.astype(object)
+                objects[m] = None
+                parts.append(objects)
+        elif self.kind == "float":
+            parts = [np.where(np.isnan(p), None, p.astype(object)) for p in self.parts]
+        elif self.kind == "datetime":
+            parts = [np.where(np.isnat(p), None, pd.to_datetime(p).to_pydatetime()) for p in self.parts]
+        else:
+            parts = self.parts
+        self.kind, self.parts, self.masks, self.codes, self.categories = "object", parts, [], {}, []
+        return parts
+
+    def add(self, values):
+        if self.kind is None:
+            first = next((v for v in values if v is not None), None)
+            if first is None:
+                self.leading_nulls += len(values)
+                return
+            self.kind = _kind(first)
+        try:
+            part = self._convert(values)
+        except (TypeError, ValueError, OverflowError):
+            self._as_objects()
+            part = self._convert(values)
+        self.parts.append(part)
+        self.nbytes += part.nbytes
+
+    def finish(self, rows, categorical):
+        if self.kind is None:
+            return np.full(rows, None, dtype=object)
+        if self.leading_nulls:
+            # NULLs that arrived before the first value: convert them like any other chunk
+            parts, masks = self.parts, self.masks
+            self.parts, self.masks = [], []
+            self.add([None] * self.leading_nulls)
+            self.parts += parts
+            self.masks += masks
+            self.leading_nulls = 0
+        values = np.concatenate(self.parts) if len(self.parts) > 1 else self.parts[0]
+        if self.kind == "str":
+            if categorical or len(self.categories) <= CATEGORY_MAX_RATIO * rows:
+                return pd.Categorical.from_codes(values, categories=self.categories)
+            return np.array(self.categories + [None], dtype=object)[values]
+        if self.kind == "int":
+            mask = np.concatenate(self.masks) if len(self.masks) > 1 else self.masks[0]
+            present = values[~mask]
+            dtype = _INT_DTYPES[-1]
+            if len(present):
+                low, high = present.min(), present.max()
+                dtype = next(t for t in _INT_DTYPES if np.iinfo(t).min <= low and high <= np.iinfo(t).max)
+            if mask.any():
+                return pd.arrays.IntegerArray(values.astype(dtype), mask)
+            return values.astype(dtype)
+        return values
+
+
+def read_frame(cursor, chunk_size=CHUNK_ROWS, max_rows=None, max_bytes=None, categorical=()):
+    """
+    The rest of an executed query's result as a DataFrame (see the module docstring).
+    `cursor` must return tuples (no dictionary=True). Columns named in `categorical` always
+    become categoricals. attrs: "truncated" (a cap was hit) and "nbytes" (approximate size).
+    """
+    names = [d[0] for d in cursor.description or []]
+    columns = [_Column(name) for name in names]
+    rows = 0
+    nbytes = 0
+    truncated = False
+    while True:
+        want = chunk_size if max_rows is None else min(chunk_size, max_rows - rows)
+        if want <= 0:
+            truncated = bool(cursor.fetchmany(1))
+            break
+        chunk = cursor.fetchmany(want)
+        if not chunk:
+            break
+        if isinstance(chunk[0], dict):
+            chunk = [tuple(row.values()) for row in chunk]
+        for column, values in zip(columns, zip(*chunk)):
+            column.add(list(values))
+        rows += len(chunk)
+        del chunk
+        nbytes = sum(c.nbytes for c in columns)
+        if max_bytes is not None and nbytes >= max_bytes:
+            truncated = bool(cursor.fetchmany(1))
+            break
+    if truncated:
+        while cursor.fetchmany(chunk_size):
+            pass    # drain: an unread result would poison the connection for its next user
+    frame = pd.DataFrame({c.name: c.finish(rows, c.name in categorical) for c in columns}, columns=names)
+    frame.attrs["truncated"] = truncated
+    frame.attrs["nbytes"] = nbytes
+    return frame
@@ -0,0 +1,565 @@
+# ingest.py
+"""
+Ingest service for buoys and tagging receivers: observations and water-quality readings over HTTP.
+
+    POST /observations    a JSON object or array of them: species_id, location_id, observer_id,
+                          count_observed[, obs_date][, remarks][, water_quality: {temperature, pH,
+                          salinity, pollution_index[, measured_at]}]
+    POST /water-quality   a JSON object or array of them: location_id, temperature, pH, salinity,
+                          pollution_index[, measured_at]
+    GET  /health          queue depth, checkpoint and counters as JSON
+
+A request is validated as a whole (400 if any record is invalid), appended to the journal with
+one fsync and queued, then answered 202 with the sequence number of its last record. Missing
+timestamps are filled in at that point, so a replay writes the same values; timestamps with a
+UTC offset are converted to the server's local time, as DATETIME columns take no offsets. When
+MAX_PENDING records are waiting, a request waits up to ENQUEUE_TIMEOUT seconds for room and is
+then answered 503 with Retry-After: senders slow down instead of the service running out of memory.
+
+A flusher thread writes the queue in batches of up to BATCH_SIZE records, at least every
+FLUSH_INTERVAL seconds, one transaction per batch. The same transaction stores the batch's last
+sequence number in Ingest_Checkpoint (migration 0006), and on start the journal is replayed from
+the record after the checkpoint, so a crash loses nothing and writes nothing twice. Lost
+connections, lock timeouts and deadlocks are retried with back-off. A record the database refuses
+(e.g. an unknown species) is moved to <journal>.rejects so it cannot hold up the records behind
+it. Once the journal is larger than JOURNAL_ROTATE_BYTES, the records still queued are copied to a
+new file that replaces it, so the journal stays bounded under a steady stream of records.
+
+The checkpoint is keyed by the journal's file name, so run one service per journal name.
+
+Command line:
+    python ingest.py serve [--port 8502] [--journal ingest.journal]
+    python ingest.py replay [--journal ingest.journal]     # write what the journal still holds, then exit
+"""
+import argparse
+import collections
+import datetime
+import itertools
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import storage
+
+DEFAULT_PORT = 8502
+DEFAULT_JOURNAL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ingest.journal")
+MAX_PENDING = 10000               # records accepted but not yet written
+BATCH_SIZE = 500                  # records per transaction
+FLUSH_INTERVAL = 1.0              # seconds; a partial batch is written at least this often
+ENQUEUE_TIMEOUT = 2.0             # seconds a request waits for queue room before getting a 503
+MAX_BODY_BYTES = 1024 * 1024
+JOURNAL_ROTATE_BYTES = 64 * 1024 * 1024
+RETRY_DELAYS = [0.5, 1, 2, 5, 10]  # seconds between attempts after a transient failure (the last repeats)
+
+OBSERVATION = "observation"
+WATER_QUALITY = "water_quality"
+_READINGS = ("temperature", "pH", "salinity", "pollution_index")
+
+_WQ_SQL = ("INSERT INTO Water_Quality (location_id, temperature, pH, salinity, pollution_index, measured_at) "
+           "VALUES (%s, %s, %s, %s, %s, %s)")
+_OBS_SQL = ("INSERT INTO Observation (species_id, location_id, observer_id, quality_id, obs_date, count_observed, remarks) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s)")
+
+
+# ---------- VALIDATION ----------
+class InvalidRecord(ValueError):
+    """A record that cannot be accepted; the message says which field is wrong."""
+
+
+def _integer(record, field, minimum=None):
+    value = record.get(field)
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise InvalidRecord(f"{field} must be an integer")
+    if minimum is not None and value < minimum:
+        raise InvalidRecord(f"{field} must be at least {minimum}")
+    return value
+
+
+def _reading(record, field):
+    value = record.get(field)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise InvalidRecord(f"{field} must be a number")
+    return float(value)
+
+
+def _timestamp(record, field, default):
+    value = record.get(field)
+    if value is None:
+        return default
+    try:
+        parsed = datetime.datetime.fromisoformat(str(value))
+    except ValueError:
+        raise InvalidRecord(f"{field} must be an ISO date or date-time") from None
+    if parsed.tzinfo is not None:
+        # DATETIME columns hold naive local time; MySQL < 8.0.19, MariaDB and SQLite take no offsets
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed.isoformat(" ", "seconds")
+
+
+def validate(kind, record, now=None):
+    """`record` normalized for the journal and the INSERTs; raises InvalidRecord."""
+    if not isinstance(record, dict):
+        raise InvalidRecord("each record must be a JSON object")
+    now = now or datetime.datetime.now().isoformat(" ", "seconds")
+    if kind == WATER_QUALITY:
+        out = {"location_id": _integer(record, "location_id")}
+        for field in _READINGS:
+            out[field] = _reading(record, field)
+        if all(out[field] is None for field in _READINGS):
+            raise InvalidRecord("a water-quality record needs at least one reading")
+        out["measured_at"] = _timestamp(record, "measured_at", now)
+        return out
+    remarks = record.get("remarks")
+    if remarks is not None and not isinstance(remarks, str):
+        raise InvalidRecord("remarks must be a string")
+    out = {
+        "species_id": _integer(record, "species_id"),
+        "location_id": _integer(record, "location_id"),
+        "observer_id": _integer(record, "observer_id"),
+        "obs_date": _timestamp(record, "obs_date", now),
+        "count_observed": _integer(record, "count_observed", minimum=0),
+        "remarks": remarks[:255] if remarks else remarks,
+    }
+    wq = record.get("water_quality")
+    if wq is not None:
+        if not isinstance(wq, dict):
+            raise InvalidRecord("water_quality must be a JSON object")
+        out["water_quality"] = validate(WATER_QUALITY, {**wq, "location_id": out["location_id"]},
+                                        now=out["obs_date"])
+    return out
+
+
+# ---------- JOURNAL ----------
+def _encode(entries):
+    return "".join(json.dumps({"seq": seq, "kind": kind, "record": record}, separators=(",", ":")) + "\n"
+                   for seq, kind, record in entries).encode()
+
+
+class Journal:
+    """
+    Append-only JSON Lines file of accepted records, one {"seq", "kind", "record"} per line.
+    A line cut short by a crash is dropped when the journal is opened. rotate() replaces the
+    file with just the records that still have to be written, so it does not grow without bound.
+    """
+    def __init__(self, path, fsync=True):
+        self.path = path
+        self.fsync = fsync
+        self.last_seq = self._recover()
+        self._file = open(path, "ab")
+
+    def _lines(self):
+        """(entry, line length) for each complete line on disk, stopping at the first torn or unreadable one."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    return
+                try:
+                    entry = json.loads(line)
+                    entry = (entry["seq"], entry["kind"], entry["record"])
+                except (ValueError, KeyError):
+                    return
+                yield entry, len(line)
+
+    def _recover(self):
+        """The last complete entry's seq (0 when empty); a torn tail is cut off so new lines start clean."""
+        good = 0
+        last_seq = 0
+        for entry, length in self._lines():
+            good += length
+            last_seq = entry[0]
+        if os.path.exists(self.path) and good < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(good)
+        return last_seq
+
+    def read(self, after=0):
+        """The entries with a seq above `after`, read from disk one line at a time."""
+        return [entry for entry, _ in self._lines() if entry[0] > after]
+
+    def append(self, entries):
+        self._file.write(_encode(entries))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def size(self):
+        return os.path.getsize(self.path)
+
+    def rotate(self, entries):
+        """
+        Replace the journal with `entries` (every record not yet in the database): they are
+        written to a new file, synced and renamed over the journal, so a crash leaves either file.
+        """
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_encode(entries))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._file.close()
+        if self.fsync and hasattr(os, "O_DIRECTORY"):
+            fd = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        self._file = open(self.path, "ab")
+
+    def close(self):
+        self._file.close()
+
+
+# ---------- SERVICE ----------
+class IngestService:
+    """Bounded write-behind queue between the HTTP handlers and the database (see the module docstring)."""
+    def __init__(self, connect, journal_path=DEFAULT_JOURNAL, max_pending=MAX_PENDING, batch_size=BATCH_SIZE,
+                 flush_interval=FLUSH_INTERVAL, enqueue_timeout=ENQUEUE_TIMEOUT,
+                 rotate_bytes=JOURNAL_ROTATE_BYTES, fsync=True):
+        self.connect = connect
+        self.name = os.path.basename(journal_path)      # Ingest_Checkpoint key
+        self.rejects_path = journal_path + ".rejects"
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.rotate_bytes = rotate_bytes
+        self.journal = Journal(journal_path, fsync)
+        self.checkpoint = 0
+        self.last_error = None
+        self._seq = 0
+        self._pending = collections.deque()             # (seq, kind, record), oldest first
+        self._cond = threading.Condition()
+        self._conn = None
+        self._failures = 0
+        self._stopping = False
+        self._thread = None
+        self._stats = {"accepted": 0, "throttled": 0, "written": 0, "rejected": 0,
+                       "batches": 0, "retries": 0, "replayed": 0}
+
+    # ---------- LIFECYCLE ----------
+    def start(self):
+        """Read the checkpoint, queue the journal records after it and start the flusher thread."""
+        self.checkpoint = self._read_checkpoint()
+        self._seq = max(self.checkpoint, self.journal.last_seq)
+        replay = self.journal.read(after=self.checkpoint)
+        self._pending.extend(replay)
+        self._stats["replayed"] = len(replay)
+        self._thread = threading.Thread(target=self._run, name="ingest-flusher", daemon=True)
+        self._thread.start()
+        return len(replay)
+
+    def stop(self, timeout=30):
+        """Write what is queued (unless the database is failing), then stop. The journal keeps the rest."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._drop_connection()
+        self.journal.close()
+
+    # ---------- INTAKE ----------
+    def submit(self, kind, records):
+        """
+        Validate, journal and queue `records` (all or none). Returns the last record's sequence
+        number, or None when the queue stayed full for enqueue_timeout (try again later).
+        Raises InvalidRecord.
+        """
+        if not records:
+            raise InvalidRecord("no records")
+        if len(records) > self.max_pending:
+            raise InvalidRecord(f"at most {self.max_pending} records per request")
+        normalized = []
+        for i, record in enumerate(records):
+            try:
+                normalized.append(validate(kind, record))
+            except InvalidRecord as e:
+                raise InvalidRecord(f"record {i}: {e}") from None
+        with self._cond:
+            room = lambda: self._stopping or len(self._pending) + len(normalized) <= self.max_pending
+            if not self._cond.wait_for(room, self.enqueue_timeout) or self._stopping:
+                self._stats["throttled"] += 1
+                return None
+            entries = [(self._seq + i, kind, record) for i, record in enumerate(normalized, 1)]
+            self.journal.append(entries)
+            self._seq += len(entries)
+            self._pending.extend(entries)
+            self._stats["accepted"] += len(entries)
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+        return entries[-1][0]
+
+    # ---------- FLUSHING ----------
+    def _run(self):
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval
+                while len(self._pending) < self.batch_size and not self._stopping:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._stopping and (not self._pending or self._failures):
+                    return
+                batch = list(itertools.islice(self._pending, self.batch_size))
+            if batch:
+                try:
+                    self._flush(batch)
+                except Exception as e:     # keep the flusher alive; the batch stays queued
+                    self._backoff(e)
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = self.connect()
+        return self._conn
+
+    def _drop_connection(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except storage.Error:
+                pass
+            self._conn = None
+
+    def _rollback(self):
+        if self._conn is None:
+            return
+        try:
+            self._conn.rollback()
+        except storage.Error:
+            self._drop_connection()
+
+    def _read_checkpoint(self):
+        """This journal's checkpoint; its row is created (at 0) on first use so _write only has to UPDATE it."""
+        conn = self._connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT seq FROM Ingest_Checkpoint WHERE journal = %s", (self.name,))
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute("INSERT INTO Ingest_Checkpoint (journal, seq) VALUES (%s, 0)", (self.name,))
+            conn.commit()
+        finally:
+            cursor.close()
+        return row[0] if row else 0
+
+    def _write(self, entries, upto):
+        """Insert `entries` and move the checkpoint to `upto`, in one transaction."""
+        conn = self._connection()
+        cursor = conn.cursor()
+        try:
+            wq_rows, obs_rows = [], []
+            for _, kind, r in entries:
+                if kind == WATER_QUALITY:
+                    wq_rows.append((r["location_id"], *(r[f] for f in _READINGS), r["measured_at"]))
+                    continue
+                quality_id = None
+                wq = r.get("water_quality")
+                if wq:
+                    cursor.execute(_WQ_SQL, (wq["location_id"], *(wq[f] for f in _READINGS), wq["measured_at"]))
+                    quality_id = cursor.lastrowid
+                obs_rows.append((r["species_id"], r["location_id"], r["observer_id"], quality_id,
+                                 r["obs_date"], r["count_observed"], r["remarks"]))
+            if wq_rows:
+                cursor.executemany(_WQ_SQL, wq_rows)
+            if obs_rows:
+                cursor.executemany(_OBS_SQL, obs_rows)
+            cursor.execute("UPDATE Ingest_Checkpoint SET seq = %s, updated_at = NOW() WHERE journal = %s",
+                           (upto, self.name))
+            conn.commit()
+        finally:
+            cursor.close()
+
+    def _flush(self, batch):
+        try:
+            self._write(batch, batch[-1][0])
+        except storage.Error as e:
+            self._rollback()
+            if self._conn is None or storage.is_transient(e):
+                return self._backoff(e)
+        else:
+            self._stats["written"] += len(batch)
+            return self._done(batch)
+        # the database refuses one of the records: write them one at a time to set it aside
+        for entry in batch:
+            try:
+                try:
+                    self._write([entry], entry[0])
+                    self._stats["written"] += 1
+                except storage.Error as e:
+                    self._rollback()
+                    if self._conn is None or storage.is_transient(e):
+                        raise
+                    # only blame the record if a write without it works (not e.g. a read-only server)
+                    self._write([], self.checkpoint)
+                    self._reject(entry, e)
+                    self._write([], entry[0])
+            except storage.Error as e:
+                self._rollback()
+                return self._backoff(e)
+            self._done([entry])
+
+    def _reject(self, entry, error):
+        seq, kind, record = entry
+        with open(self.rejects_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"seq": seq, "kind": kind, "record": record, "error": str(error)}) + "\n")
+        self._stats["rejected"] += 1
+        self.last_error = f"record {seq} rejected: {error}"
+
+    def _backoff(self, error):
+        self.last_error = str(error)
+        self._stats["retries"] += 1
+        if storage.is_transient(error):
+            self._drop_connection()
+        delay = RETRY_DELAYS[min(self._failures, len(RETRY_DELAYS) - 1)]
+        self._failures += 1
+        with self._cond:
+            # submit() and _done() notify too: only shutdown may cut the back-off short
+            self._cond.wait_for(lambda: self._stopping, delay)
+
+    def _done(self, entries):
+        """`entries` (the oldest queued ones) are in the database: dequeue them and make room."""
+        with self._cond:
+            for _ in entries:
+                self._pending.popleft()
+            self.checkpoint = entries[-1][0]
+            self._failures = 0
+            self._stats["batches"] += 1
+            if self.journal.size() >= self.rotate_bytes:
+                # submit() appends under this lock too, so the queue is exactly what is left to write
+                try:
+                    self.journal.rotate(self._pending)
+                except OSError as e:     # the old journal is still intact; try again after the next batch
+                    self.last_error = f"journal rotation failed: {e}"
+            self._cond.notify_all()
+
+    # ---------- STATUS ----------
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._pending)
+            stats["max_pending"] = self.max_pending
+            stats["last_seq"] = self._seq
+            stats["checkpoint"] = self.checkpoint
+            stats["journal_bytes"] = self.journal.size()
+        stats["last_error"] = self.last_error
+        return stats
+
+
+# ---------- HTTP ----------
+def make_server(service, port=DEFAULT_PORT, host="0.0.0.0"):
+    """An HTTP server for `service` (see the module docstring); call serve_forever() on it."""
+    routes = {"/observations": OBSERVATION, "/water-quality": WATER_QUALITY}
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status, payload, headers=()):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/health":
+                self.send_error(404)
+                return
+            self._reply(200, service.stats())
+
+        def do_POST(self):
+            kind = routes.get(self.path.split("?")[0])
+            if kind is None:
+                self.send_error(404)
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                self.close_connection = True    # the body's end is unknown
+                self._reply(400, {"error": "Content-Length must be a non-negative integer"})
+                return
+            if length > MAX_BODY_BYTES:
+                self._reply(413, {"error": f"body larger than {MAX_BODY_BYTES} bytes"})
+                return
+            try:
+                payload = json.loads(self.rfile.read(length) or b"null")
+            except ValueError:
+                self._reply(400, {"error": "body is not valid JSON"})
+                return
+            records = payload if isinstance(payload, list) else [payload]
+            try:
+                seq = service.submit(kind, records)
+            except InvalidRecord as e:
+                self._reply(400, {"error": str(e)})
+                return
+            if seq is None:
+                self._reply(503, {"error": "ingest queue is full, retry later"},
+                            headers=[("Retry-After", str(max(1, round(service.flush_interval))))])
+                return
+            self._reply(202, {"accepted": len(records), "seq": seq})
+
+        def log_message(self, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Observation and water-quality ingest service")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_cmd = sub.add_parser("serve", help="accept records over HTTP")
+    serve_cmd.add_argument("--host", default="0.0.0.0")
+    serve_cmd.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_cmd.add_argument("--max-pending", type=int, default=MAX_PENDING)
+    serve_cmd.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    serve_cmd.add_argument("--flush-interval", type=float, default=FLUSH_INTERVAL)
+    replay_cmd = sub.add_parser("replay", help="write the records the journal still holds, then exit")
+    for cmd in (serve_cmd, replay_cmd):
+        cmd.add_argument("--journal", default=DEFAULT_JOURNAL)
+    args = parser.parse_args(argv)
+
+    import app  # deferred: only the CLI needs the app's connection settings
+
+    options = {}
+    if args.command == "serve":
+        options = {"max_pending": args.max_pending, "batch_size": args.batch_size,
+                   "flush_interval": args.flush_interval}
+    service = IngestService(lambda: app.open_dedicated_connection(app.DB_NAME), args.journal, **options)
+    try:
+        replayed = service.start()
+    except storage.Error as e:
+        hint = " (apply migration 0006 on DB Init)" if storage.is_missing_table(e) else ""
+        print(f"Cannot read the ingest checkpoint: {e}{hint}")
+        return 1
+    if args.command == "replay":
+        service.stop(timeout=None)
+        stats = service.stats()
+        print(f"Replayed {replayed} record(s): {stats['written']} written, {stats['rejected']} rejected, "
+              f"{stats['pending']} still pending")
+        return 1 if stats["pending"] else 0
+
+    server = make_server(service, args.port, args.host)
+    print(f"Listening on http://{args.host}:{args.port} (journal {args.journal}, {replayed} record(s) replayed)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
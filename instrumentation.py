@@ -0,0 +1,318 @@
+# instrumentation.py
+"""
+Timing and row counts for every database call the app makes.
+
+Measurements are tagged with the helper that ran them (see `helper`) and the page that
+was being rendered (see `set_page`) and kept as fixed-bucket histograms:
+  query_seconds      cursor execute / executemany / callproc
+  fetch_seconds      fetchone / fetchmany / fetchall
+  rows               rows fetched per call
+  acquire_seconds    waiting for a pooled connection
+  dataframe_seconds  building DataFrames from result rows
+Statements slower than the slow-query threshold are EXPLAINed in the background and logged
+to the "marine.slow_query" logger.
+
+render_prometheus() returns everything in the Prometheus text format; start_http_server()
+serves it on /metrics.
+"""
+import contextvars
+import functools
+import logging
+import queue
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram upper bounds in seconds (rows use ROW_BUCKETS)
+SECONDS_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+ROW_BUCKETS = [0, 1, 10, 100, 1000, 10000, 100000]
+SLOW_LOG_SIZE = 100
+
+slow_query_logger = logging.getLogger("marine.slow_query")
+
+_helper = contextvars.ContextVar("instrumented_helper", default=None)
+_page = contextvars.ContextVar("instrumented_page", default=None)
+_EXPLAINABLE_RE = re.compile(r"^\s*(SELECT|WITH|UPDATE|DELETE|INSERT|REPLACE)\b", re.IGNORECASE)
+
+
+# ---------- TAGS ----------
+def set_page(page):
+    """Tag everything measured from here on in this context with `page`."""
+    _page.set(page)
+
+
+def tags():
+    return _helper.get() or "other", _page.get() or "none"
+
+
+def helper(fn):
+    """Decorator: measurements inside fn are tagged with its name (the outermost helper wins)."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if _helper.get() is not None:
+            return fn(*args, **kwargs)
+        token = _helper.set(fn.__name__)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _helper.reset(token)
+    return wrapper
+
+
+# ---------- HISTOGRAMS ----------
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)    # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation (None if empty)."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + [float("inf")], self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+class Registry:
+    """Thread-safe histograms keyed by (metric, helper, page), plus an error counter."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._errors = {}
+        self.started_at = time.time()
+
+    def observe(self, metric, value, helper_name=None, page=None):
+        if helper_name is None:
+            helper_name, page = tags()
+        buckets = ROW_BUCKETS if metric == "rows" else SECONDS_BUCKETS
+        with self._lock:
+            key = (metric, helper_name, page)
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram(buckets)
+            hist.observe(value)
+
+    def error(self):
+        key = tags()
+        with self._lock:
+            self._errors[key] = self._errors.get(key, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._errors.clear()
+            self.started_at = time.time()
+
+    def snapshot(self):
+        """[(metric, helper, page, Histogram copy)] and {(helper, page): errors}."""
+        with self._lock:
+            items = []
+            for (metric, helper_name, page), hist in sorted(self._histograms.items()):
+                copy = Histogram(hist.buckets)
+                copy.counts, copy.count, copy.sum = list(hist.counts), hist.count, hist.sum
+                items.append((metric, helper_name, page, copy))
+            return items, dict(self._errors)
+
+    def summary(self):
+        """One dict per (helper, page) with counts, latency percentiles and rows; for the Diagnostics page."""
+        items, errors = self.snapshot()
+        rows = {}
+        for metric, helper_name, page, hist in items:
+            row = rows.setdefault((helper_name, page), {"helper": helper_name, "page": page})
+            if metric == "rows":
+                row["rows_total"] = int(hist.sum)
+                continue
+            row[f"{metric}_count"] = hist.count
+            row[f"{metric}_avg_ms"] = hist.sum / hist.count * 1000 if hist.count else 0.0
+            row[f"{metric}_p95_ms"] = hist.quantile(0.95) * 1000
+        for (helper_name, page), n in errors.items():
+            rows.setdefault((helper_name, page), {"helper": helper_name, "page": page})["errors"] = n
+        return list(rows.values())
+
+
+registry = Registry()
+
+
+@contextmanager
+def timer(metric):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe(metric, time.perf_counter() - start)
+
+
+# ---------- SLOW QUERIES ----------
+class SlowQueryLog:
+    """
+    Statements slower than `threshold` seconds are queued and EXPLAINed on a background thread
+    with explain(sql, params) -> plan rows, so the slow request is not delayed further.
+    The last SLOW_LOG_SIZE entries are kept for the Diagnostics page.
+    """
+    def __init__(self, threshold, explain=None):
+        self.threshold = threshold
+        self.explain = explain
+        self.entries = deque(maxlen=SLOW_LOG_SIZE)
+        self._queue = queue.Queue(maxsize=SLOW_LOG_SIZE)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def check(self, sql, params, seconds):
+        if self.threshold is None or seconds < self.threshold:
+            return
+        helper_name, page = tags()
+        entry = {"at": time.time(), "helper": helper_name, "page": page, "seconds": seconds,
+                 "sql": " ".join(str(sql).split())[:2000], "plan": None}
+        try:
+            self._queue.put_nowait((entry, sql, params))
+        except queue.Full:
+            return    # a burst of slow queries: keep serving requests, skip the extra ones
+        self._ensure_worker()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="slow-query-explain", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            entry, sql, params = self._queue.get()
+            if self.explain and _EXPLAINABLE_RE.match(str(sql)):
+                try:
+                    entry["plan"] = self.explain(sql, params)
+                except Exception as e:    # EXPLAIN is best effort; the timing is still logged
+                    entry["plan"] = f"EXPLAIN failed: {e}"
+            self.entries.append(entry)
+            slow_query_logger.warning("slow query %.3fs helper=%s page=%s: %s | plan=%s",
+                                      entry["seconds"], entry["helper"], entry["page"], entry["sql"], entry["plan"])
+
+
+slow_queries = SlowQueryLog(threshold=None)
+
+
+# ---------- CURSOR ----------
+class InstrumentedCursor:
+    """Cursor wrapper that times statements and fetches and counts rows."""
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def _timed(self, method, sql, params, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(sql, params, *args, **kwargs)
+        except Exception:
+            registry.error()
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            registry.observe("query_seconds", elapsed)
+            slow_queries.check(sql, params, elapsed)
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        return self._timed(self._cursor.execute, operation, params, *args, **kwargs)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        return self._timed(self._cursor.executemany, operation, seq_params, *args, **kwargs)
+
+    def callproc(self, procname, args=()):
+        return self._timed(self._cursor.callproc, procname, args)
+
+    def _fetch(self, method, *args):
+        start = time.perf_counter()
+        result = method(*args)
+        registry.observe("fetch_seconds", time.perf_counter() - start)
+        if isinstance(result, list):
+            registry.observe("rows", len(result))
+        elif result is not None:
+            registry.observe("rows", 1)
+        return result
+
+    def fetchone(self):
+        return self._fetch(self._cursor.fetchone)
+
+    def fetchmany(self, *args):
+        return self._fetch(self._cursor.fetchmany, *args)
+
+    def fetchall(self):
+        return self._fetch(self._cursor.fetchall)
+
+
+# ---------- EXPORT ----------
+def _labels(helper_name, page, extra=""):
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"')
+    return f'{{helper="{esc(helper_name)}",page="{esc(page)}"{extra}}}'
+
+
+def render_prometheus(extra_gauges=None):
+    """All histograms (and optional {name: value} gauges) in the Prometheus text format."""
+    items, errors = registry.snapshot()
+    lines = []
+    declared = set()
+    for metric, helper_name, page, hist in items:
+        name = f"marine_db_{metric}"
+        if name not in declared:
+            declared.add(name)
+            lines.append(f"# TYPE {name} histogram")
+        cumulative = 0
+        for bound, n in zip(hist.buckets + [None], hist.counts):
+            cumulative += n
+            le = "+Inf" if bound is None else repr(float(bound))
+            labels = _labels(helper_name, page, ',le="' + le + '"')
+            lines.append(f"{name}_bucket{labels} {cumulative}")
+        lines.append(f"{name}_sum{_labels(helper_name, page)} {hist.sum}")
+        lines.append(f"{name}_count{_labels(helper_name, page)} {hist.count}")
+    if errors:
+        lines.append("# TYPE marine_db_errors_total counter")
+        for (helper_name, page), n in sorted(errors.items()):
+            lines.append(f"marine_db_errors_total{_labels(helper_name, page)} {n}")
+    for name, value in (extra_gauges or {}).items():
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def start_http_server(port, extra_gauges=None, host="0.0.0.0"):
+    """Serve render_prometheus() on http://host:port/metrics from a daemon thread."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus(extra_gauges() if extra_gauges else None).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,47 @@
+# lazy_import.py
+"""
+Deferred imports for heavy dependencies (pandas, mysql.connector).
+
+    pd = lazy_import.module("pandas")
+
+binds a stand-in that imports pandas the first time one of its attributes is used
+(pd.DataFrame, pd.to_datetime, ...). A Streamlit process then only pays for the
+libraries the pages it actually renders need. The real import runs under Python's
+import lock, so the first use may come from any thread.
+"""
+import importlib
+import sys
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access."""
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = importlib.import_module(self._name)
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def module(name):
+    """The module itself if it is already imported, otherwise a LazyModule for it."""
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def loaded(name):
+    """True once `name` has really been imported (by a LazyModule or anyone else)."""
+    return name in sys.modules
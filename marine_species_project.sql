@@ -112,6 +112,20 @@ CREATE TABLE Action_Log (
     log_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Pre-aggregated dashboard metrics, kept current by the *_Summary_* triggers below.
+--   metric = 'total'     : dimension = table name, value_count = row count
+--   metric = 'status'    : dimension = conservation_status, value_count = species count
+--   metric = 'pollution' : dimension = region, value_count / value_sum = readings / sum of pollution_index
+--   metric = 'meta'      : dimension = 'last_refresh', refreshed_at = last full rebuild
+CREATE TABLE Dashboard_Summary (
+    metric VARCHAR(20) NOT NULL,
+    dimension VARCHAR(100) NOT NULL,
+    value_count BIGINT NOT NULL DEFAULT 0,
+    value_sum DECIMAL(18,2) NOT NULL DEFAULT 0,
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (metric, dimension)
+);
+
 -- -------------------------------
 -- STEP 3: SAMPLE DATA INSERTS (DML)
 -- -------------------------------
@@ -230,6 +244,148 @@ BEGIN
 END //
 DELIMITER ;
 
+-- Dashboard summary: incremental maintenance helpers
+DELIMITER //
+CREATE PROCEDURE BumpDashboardSummary(IN p_metric VARCHAR(20), IN p_dimension VARCHAR(100),
+                                      IN p_count BIGINT, IN p_sum DECIMAL(18,2))
+BEGIN
+    INSERT INTO Dashboard_Summary (metric, dimension, value_count, value_sum)
+    VALUES (p_metric, COALESCE(p_dimension, 'Unknown'), p_count, p_sum)
+    ON DUPLICATE KEY UPDATE value_count = value_count + p_count, value_sum = value_sum + p_sum;
+END //
+
+CREATE PROCEDURE BumpRegionPollution(IN p_location_id INT, IN p_sign INT, IN p_pollution DECIMAL(5,2))
+BEGIN
+    DECLARE v_region VARCHAR(100);
+    IF p_location_id IS NOT NULL AND p_pollution IS NOT NULL THEN
+        SELECT COALESCE(region, 'Unknown') INTO v_region FROM Location WHERE location_id = p_location_id;
+        IF v_region IS NOT NULL THEN
+            CALL BumpDashboardSummary('pollution', v_region, p_sign, p_sign * p_pollution);
+        END IF;
+    END IF;
+END //
+
+-- Full rebuild; also used as the periodic refresh job for drift (e.g. rows loaded with triggers disabled)
+CREATE PROCEDURE RefreshDashboardSummary()
+BEGIN
+    DELETE FROM Dashboard_Summary;
+    INSERT INTO Dashboard_Summary (metric, dimension, value_count)
+        SELECT 'total', 'Species', COUNT(*) FROM Species
+        UNION ALL SELECT 'total', 'Location', COUNT(*) FROM Location
+        UNION ALL SELECT 'total', 'Observation', COUNT(*) FROM Observation
+        UNION ALL SELECT 'total', 'Conservation_Action', COUNT(*) FROM Conservation_Action;
+    INSERT INTO Dashboard_Summary (metric, dimension, value_count)
+        SELECT 'status', COALESCE(conservation_status, 'Unknown'), COUNT(*)
+        FROM Species
+        GROUP BY COALESCE(conservation_status, 'Unknown');
+    INSERT INTO Dashboard_Summary (metric, dimension, value_count, value_sum)
+        SELECT 'pollution', COALESCE(l.region, 'Unknown'), COUNT(wq.pollution_index), COALESCE(SUM(wq.pollution_index), 0)
+        FROM Water_Quality wq
+        JOIN Location l ON wq.location_id = l.location_id
+        GROUP BY COALESCE(l.region, 'Unknown');
+    INSERT INTO Dashboard_Summary (metric, dimension) VALUES ('meta', 'last_refresh');
+END //
+DELIMITER ;
+
+-- Dashboard summary triggers
+DELIMITER //
+CREATE TRIGGER Species_Summary_Insert AFTER INSERT ON Species
+FOR EACH ROW
+BEGIN
+    CALL BumpDashboardSummary('total', 'Species', 1, 0);
+    CALL BumpDashboardSummary('status', NEW.conservation_status, 1, 0);
+END //
+
+CREATE TRIGGER Species_Summary_Update AFTER UPDATE ON Species
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.conservation_status <=> NEW.conservation_status) THEN
+        CALL BumpDashboardSummary('status', OLD.conservation_status, -1, 0);
+        CALL BumpDashboardSummary('status', NEW.conservation_status, 1, 0);
+    END IF;
+END //
+
+CREATE TRIGGER Species_Summary_Delete AFTER DELETE ON Species
+FOR EACH ROW
+BEGIN
+    CALL BumpDashboardSummary('total', 'Species', -1, 0);
+    CALL BumpDashboardSummary('status', OLD.conservation_status, -1, 0);
+END //
+
+CREATE TRIGGER Location_Summary_Insert AFTER INSERT ON Location
+FOR EACH ROW
+BEGIN
+    CALL BumpDashboardSummary('total', 'Location', 1, 0);
+END //
+
+CREATE TRIGGER Location_Summary_Update AFTER UPDATE ON Location
+FOR EACH ROW
+BEGIN
+    DECLARE v_count BIGINT;
+    DECLARE v_sum DECIMAL(18,2);
+    IF NOT (OLD.region <=> NEW.region) THEN
+        SELECT COUNT(pollution_index), COALESCE(SUM(pollution_index), 0) INTO v_count, v_sum
+        FROM Water_Quality WHERE location_id = NEW.location_id;
+        IF v_count > 0 THEN
+            CALL BumpDashboardSummary('pollution', OLD.region, -v_count, -v_sum);
+            CALL BumpDashboardSummary('pollution', NEW.region, v_count, v_sum);
+        END IF;
+    END IF;
+END //
+
+CREATE TRIGGER Location_Summary_Delete AFTER DELETE ON Location
+FOR EACH ROW
+BEGIN
+    CALL BumpDashboardSummary('total', 'Location', -1, 0);
+END //
+
+CREATE TRIGGER Observation_Summary_Insert AFTER INSERT ON Observation
+FOR EACH ROW
+BEGIN
+    CALL BumpDashboardSummary('total', 'Observation', 1, 0);
+END //
+
+CREATE TRIGGER Observation_Summary_Delete AFTER DELETE ON Observation
+FOR EACH ROW
+BEGIN
+    CALL BumpDashboardSummary('total', 'Observation', -1, 0);
+END //
+
+CREATE TRIGGER Action_Summary_Insert AFTER INSERT ON Conservation_Action
+FOR EACH ROW
+BEGIN
+    CALL BumpDashboardSummary('total', 'Conservation_Action', 1, 0);
+END //
+
+CREATE TRIGGER Action_Summary_Delete AFTER DELETE ON Conservation_Action
+FOR EACH ROW
+BEGIN
+    CALL BumpDashboardSummary('total', 'Conservation_Action', -1, 0);
+END //
+
+CREATE TRIGGER Water_Quality_Summary_Insert AFTER INSERT ON Water_Quality
+FOR EACH ROW
+BEGIN
+    CALL BumpRegionPollution(NEW.location_id, 1, NEW.pollution_index);
+END //
+
+CREATE TRIGGER Water_Quality_Summary_Update AFTER UPDATE ON Water_Quality
+FOR EACH ROW
+BEGIN
+    CALL BumpRegionPollution(OLD.location_id, -1, OLD.pollution_index);
+    CALL BumpRegionPollution(NEW.location_id, 1, NEW.pollution_index);
+END //
+
+CREATE TRIGGER Water_Quality_Summary_Delete AFTER DELETE ON Water_Quality
+FOR EACH ROW
+BEGIN
+    CALL BumpRegionPollution(OLD.location_id, -1, OLD.pollution_index);
+END //
+DELIMITER ;
+
+-- Sample data above was inserted before the triggers existed
+CALL RefreshDashboardSummary();
+
 -- -------------------------------
 -- STEP 5: VIEW CREATION
 -- -------------------------------
@@ -0,0 +1,19 @@
+-- ==========================================================
+--  0001: indexes for the app's hot queries
+-- ==========================================================
+
+-- Recent observations, the Manage Data browser (keyset on obs_date, obs_id)
+CREATE INDEX idx_observation_date ON Observation (obs_date, obs_id);
+
+-- Per-species and per-location observation history / counts
+CREATE INDEX idx_observation_species_date ON Observation (species_id, obs_date);
+CREATE INDEX idx_observation_location_date ON Observation (location_id, obs_date);
+
+-- Conservation Actions listing (ORDER BY start_date)
+CREATE INDEX idx_action_start_date ON Conservation_Action (start_date);
+
+-- AvgPollution() looks locations up by name
+CREATE INDEX idx_location_name ON Location (location_name);
+
+-- Species search
+CREATE FULLTEXT INDEX ftx_species_names ON Species (common_name, scientific_name);
@@ -0,0 +1,95 @@
+-- ==========================================================
+--  0002: daily / weekly / monthly observation rollups
+-- ==========================================================
+
+-- count_observed per species and location per time bucket, kept current by the
+-- Observation_Rollup_* triggers below so trend queries never scan Observation.
+--   grain        : 'day', 'week' (buckets start on Monday) or 'month'
+--   bucket_start : first day of the bucket
+--   species_id / location_id : 0 when the observation has none
+--   sightings    : number of Observation rows, total_count : SUM(count_observed)
+CREATE TABLE Observation_Rollup (
+    grain ENUM('day', 'week', 'month') NOT NULL,
+    bucket_start DATE NOT NULL,
+    species_id INT NOT NULL,
+    location_id INT NOT NULL,
+    sightings INT NOT NULL DEFAULT 0,
+    total_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (grain, species_id, bucket_start, location_id),
+    KEY idx_rollup_location (grain, location_id, bucket_start),
+    KEY idx_rollup_bucket (grain, bucket_start)
+);
+
+DELIMITER //
+
+-- Add (p_sign = 1) or remove (p_sign = -1) one observation from its day, week and month buckets
+CREATE PROCEDURE BumpObservationRollup(IN p_species_id INT, IN p_location_id INT, IN p_obs_date DATETIME,
+                                       IN p_sign INT, IN p_count INT)
+BEGIN
+    DECLARE v_day DATE;
+    IF p_obs_date IS NOT NULL THEN
+        SET v_day = DATE(p_obs_date);
+        INSERT INTO Observation_Rollup (grain, bucket_start, species_id, location_id, sightings, total_count)
+        VALUES ('day', v_day, COALESCE(p_species_id, 0), COALESCE(p_location_id, 0), p_sign, p_sign * COALESCE(p_count, 0)),
+               ('week', DATE_SUB(v_day, INTERVAL WEEKDAY(v_day) DAY), COALESCE(p_species_id, 0), COALESCE(p_location_id, 0),
+                p_sign, p_sign * COALESCE(p_count, 0)),
+               ('month', DATE_SUB(v_day, INTERVAL DAYOFMONTH(v_day) - 1 DAY), COALESCE(p_species_id, 0), COALESCE(p_location_id, 0),
+                p_sign, p_sign * COALESCE(p_count, 0))
+        ON DUPLICATE KEY UPDATE sightings = sightings + VALUES(sightings), total_count = total_count + VALUES(total_count);
+        IF p_sign < 0 THEN
+            DELETE FROM Observation_Rollup
+            WHERE species_id = COALESCE(p_species_id, 0) AND location_id = COALESCE(p_location_id, 0)
+              AND sightings <= 0
+              AND ((grain = 'day' AND bucket_start = v_day)
+                OR (grain = 'week' AND bucket_start = DATE_SUB(v_day, INTERVAL WEEKDAY(v_day) DAY))
+                OR (grain = 'month' AND bucket_start = DATE_SUB(v_day, INTERVAL DAYOFMONTH(v_day) - 1 DAY)));
+        END IF;
+    END IF;
+END //
+
+-- Full rebuild from Observation; also repairs drift (e.g. rows loaded with triggers disabled)
+CREATE PROCEDURE RebuildObservationRollups()
+BEGIN
+    DELETE FROM Observation_Rollup;
+    INSERT INTO Observation_Rollup (grain, bucket_start, species_id, location_id, sightings, total_count)
+        SELECT 'day', DATE(obs_date), COALESCE(species_id, 0), COALESCE(location_id, 0),
+               COUNT(*), COALESCE(SUM(count_observed), 0)
+        FROM Observation WHERE obs_date IS NOT NULL
+        GROUP BY DATE(obs_date), COALESCE(species_id, 0), COALESCE(location_id, 0);
+    INSERT INTO Observation_Rollup (grain, bucket_start, species_id, location_id, sightings, total_count)
+        SELECT 'week', DATE_SUB(bucket_start, INTERVAL WEEKDAY(bucket_start) DAY), species_id, location_id,
+               SUM(sightings), SUM(total_count)
+        FROM Observation_Rollup WHERE grain = 'day'
+        GROUP BY DATE_SUB(bucket_start, INTERVAL WEEKDAY(bucket_start) DAY), species_id, location_id;
+    INSERT INTO Observation_Rollup (grain, bucket_start, species_id, location_id, sightings, total_count)
+        SELECT 'month', DATE_SUB(bucket_start, INTERVAL DAYOFMONTH(bucket_start) - 1 DAY), species_id, location_id,
+               SUM(sightings), SUM(total_count)
+        FROM Observation_Rollup WHERE grain = 'day'
+        GROUP BY DATE_SUB(bucket_start, INTERVAL DAYOFMONTH(bucket_start) - 1 DAY), species_id, location_id;
+END //
+
+CREATE TRIGGER Observation_Rollup_Insert AFTER INSERT ON Observation
+FOR EACH ROW
+BEGIN
+    CALL BumpObservationRollup(NEW.species_id, NEW.location_id, NEW.obs_date, 1, NEW.count_observed);
+END //
+
+CREATE TRIGGER Observation_Rollup_Update AFTER UPDATE ON Observation
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.species_id <=> NEW.species_id AND OLD.location_id <=> NEW.location_id
+            AND OLD.obs_date <=> NEW.obs_date AND OLD.count_observed <=> NEW.count_observed) THEN
+        CALL BumpObservationRollup(OLD.species_id, OLD.location_id, OLD.obs_date, -1, OLD.count_observed);
+        CALL BumpObservationRollup(NEW.species_id, NEW.location_id, NEW.obs_date, 1, NEW.count_observed);
+    END IF;
+END //
+
+CREATE TRIGGER Observation_Rollup_Delete AFTER DELETE ON Observation
+FOR EACH ROW
+BEGIN
+    CALL BumpObservationRollup(OLD.species_id, OLD.location_id, OLD.obs_date, -1, OLD.count_observed);
+END //
+
+DELIMITER ;
+
+CALL RebuildObservationRollups();
@@ -0,0 +1,128 @@
+-- ==========================================================
+--  0003: prepare Observation and Water_Quality for monthly range partitions
+-- ==========================================================
+-- MySQL cannot partition a table that has foreign keys (or is referenced by one), and every
+-- unique key has to include the partitioning column. So this migration:
+--   * adds Water_Quality.measured_at (backfilled from the first observation that used the reading)
+--   * makes obs_date NOT NULL (missing dates become 1970-01-01) and puts the date columns into
+--     the primary keys
+--   * replaces the foreign keys on both tables with triggers that raise the same errors
+--     (1452 on a missing parent, 1451 when deleting a parent that is still referenced)
+-- The partitions themselves are created and rolled forward by partitions.py.
+
+ALTER TABLE Water_Quality ADD COLUMN measured_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+UPDATE Water_Quality wq
+SET measured_at = COALESCE((SELECT MIN(o.obs_date) FROM Observation o WHERE o.quality_id = wq.quality_id), measured_at);
+
+DELIMITER //
+
+CREATE PROCEDURE DropForeignKeys(IN p_table VARCHAR(64))
+BEGIN
+    SET @drops = NULL;
+    SELECT GROUP_CONCAT(CONCAT('DROP FOREIGN KEY `', CONSTRAINT_NAME, '`') SEPARATOR ', ') INTO @drops
+    FROM information_schema.TABLE_CONSTRAINTS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = p_table AND CONSTRAINT_TYPE = 'FOREIGN KEY';
+    IF @drops IS NOT NULL THEN
+        SET @ddl = CONCAT('ALTER TABLE `', p_table, '` ', @drops);
+        PREPARE stmt FROM @ddl;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+    END IF;
+END //
+
+DELIMITER ;
+
+CALL DropForeignKeys('Observation');
+CALL DropForeignKeys('Water_Quality');
+DROP PROCEDURE DropForeignKeys;
+
+UPDATE Observation SET obs_date = '1970-01-01 00:00:00' WHERE obs_date IS NULL;
+
+ALTER TABLE Observation MODIFY obs_date DATETIME NOT NULL, DROP PRIMARY KEY, ADD PRIMARY KEY (obs_id, obs_date);
+ALTER TABLE Water_Quality DROP PRIMARY KEY, ADD PRIMARY KEY (quality_id, measured_at);
+CREATE INDEX idx_water_quality_location_time ON Water_Quality (location_id, measured_at);
+
+DELIMITER //
+
+-- ---------- referential checks that used to be foreign keys ----------
+CREATE PROCEDURE CheckObservationParents(IN p_species_id INT, IN p_location_id INT,
+                                         IN p_observer_id INT, IN p_quality_id INT)
+BEGIN
+    IF (p_species_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM Species WHERE species_id = p_species_id))
+       OR (p_location_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM Location WHERE location_id = p_location_id))
+       OR (p_observer_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM Observer WHERE observer_id = p_observer_id))
+       OR (p_quality_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM Water_Quality WHERE quality_id = p_quality_id)) THEN
+        SIGNAL SQLSTATE '23000' SET MYSQL_ERRNO = 1452,
+            MESSAGE_TEXT = 'Cannot add or update a child row: Observation references a missing Species, Location, Observer or Water_Quality row';
+    END IF;
+END //
+
+CREATE TRIGGER Observation_Parents_Insert BEFORE INSERT ON Observation
+FOR EACH ROW
+BEGIN
+    CALL CheckObservationParents(NEW.species_id, NEW.location_id, NEW.observer_id, NEW.quality_id);
+END //
+
+CREATE TRIGGER Observation_Parents_Update BEFORE UPDATE ON Observation
+FOR EACH ROW
+BEGIN
+    CALL CheckObservationParents(NEW.species_id, NEW.location_id, NEW.observer_id, NEW.quality_id);
+END //
+
+CREATE TRIGGER Water_Quality_Parents_Insert BEFORE INSERT ON Water_Quality
+FOR EACH ROW
+BEGIN
+    IF NEW.location_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM Location WHERE location_id = NEW.location_id) THEN
+        SIGNAL SQLSTATE '23000' SET MYSQL_ERRNO = 1452,
+            MESSAGE_TEXT = 'Cannot add or update a child row: Water_Quality references a missing Location';
+    END IF;
+END //
+
+CREATE TRIGGER Water_Quality_Parents_Update BEFORE UPDATE ON Water_Quality
+FOR EACH ROW
+BEGIN
+    IF NEW.location_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM Location WHERE location_id = NEW.location_id) THEN
+        SIGNAL SQLSTATE '23000' SET MYSQL_ERRNO = 1452,
+            MESSAGE_TEXT = 'Cannot add or update a child row: Water_Quality references a missing Location';
+    END IF;
+END //
+
+CREATE TRIGGER Species_Children_Delete BEFORE DELETE ON Species
+FOR EACH ROW
+BEGIN
+    IF EXISTS (SELECT 1 FROM Observation WHERE species_id = OLD.species_id) THEN
+        SIGNAL SQLSTATE '23000' SET MYSQL_ERRNO = 1451,
+            MESSAGE_TEXT = 'Cannot delete or update a parent row: Species is referenced by Observation';
+    END IF;
+END //
+
+CREATE TRIGGER Location_Children_Delete BEFORE DELETE ON Location
+FOR EACH ROW
+BEGIN
+    IF EXISTS (SELECT 1 FROM Observation WHERE location_id = OLD.location_id)
+       OR EXISTS (SELECT 1 FROM Water_Quality WHERE location_id = OLD.location_id) THEN
+        SIGNAL SQLSTATE '23000' SET MYSQL_ERRNO = 1451,
+            MESSAGE_TEXT = 'Cannot delete or update a parent row: Location is referenced by Observation or Water_Quality';
+    END IF;
+END //
+
+CREATE TRIGGER Observer_Children_Delete BEFORE DELETE ON Observer
+FOR EACH ROW
+BEGIN
+    IF EXISTS (SELECT 1 FROM Observation WHERE observer_id = OLD.observer_id) THEN
+        SIGNAL SQLSTATE '23000' SET MYSQL_ERRNO = 1451,
+            MESSAGE_TEXT = 'Cannot delete or update a parent row: Observer is referenced by Observation';
+    END IF;
+END //
+
+CREATE TRIGGER Water_Quality_Children_Delete BEFORE DELETE ON Water_Quality
+FOR EACH ROW
+BEGIN
+    IF EXISTS (SELECT 1 FROM Observation WHERE quality_id = OLD.quality_id) THEN
+        SIGNAL SQLSTATE '23000' SET MYSQL_ERRNO = 1451,
+            MESSAGE_TEXT = 'Cannot delete or update a parent row: Water_Quality is referenced by Observation';
+    END IF;
+END //
+
+DELIMITER ;
@@ -0,0 +1,41 @@
+-- ==========================================================
+--  0004: change log for Observation ("what's new since version N")
+-- ==========================================================
+
+-- One row per inserted, updated or deleted observation, written by the triggers below.
+-- change_id is the version readers remember; see change_feed.py.
+--   op = 'upsert' : the row was inserted or changed, re-read it
+--   op = 'delete' : tombstone, drop the row
+--   op = 'reset'  : rows changed without triggers (e.g. an archived partition), reload everything
+CREATE TABLE Observation_Change (
+    change_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    obs_id INT NOT NULL,
+    op ENUM('upsert', 'delete', 'reset') NOT NULL,
+    changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    KEY idx_observation_change_time (changed_at)
+);
+
+DELIMITER //
+
+CREATE TRIGGER Observation_Change_Insert AFTER INSERT ON Observation
+FOR EACH ROW
+BEGIN
+    INSERT INTO Observation_Change (obs_id, op) VALUES (NEW.obs_id, 'upsert');
+END //
+
+CREATE TRIGGER Observation_Change_Update AFTER UPDATE ON Observation
+FOR EACH ROW
+BEGIN
+    IF OLD.obs_id <> NEW.obs_id THEN
+        INSERT INTO Observation_Change (obs_id, op) VALUES (OLD.obs_id, 'delete');
+    END IF;
+    INSERT INTO Observation_Change (obs_id, op) VALUES (NEW.obs_id, 'upsert');
+END //
+
+CREATE TRIGGER Observation_Change_Delete AFTER DELETE ON Observation
+FOR EACH ROW
+BEGIN
+    INSERT INTO Observation_Change (obs_id, op) VALUES (OLD.obs_id, 'delete');
+END //
+
+DELIMITER ;
@@ -0,0 +1,227 @@
+-- ==========================================================
+--  0005: running per-location Water_Quality statistics
+-- ==========================================================
+
+-- Count, sum, sum of squares, min and max of every reading per location, kept current by the
+-- Water_Quality_Stats_* triggers below, so averages, spreads and extremes never scan Water_Quality.
+--   grain = 'all' : one row per location (bucket_start is always 1970-01-01)
+--   grain = 'day' : one row per location and day of measured_at, summed for windows like "last 30 days"
+-- Region figures are the location rows grouped by Location.region, so a region change needs no bookkeeping.
+-- Inserts cost O(1). Removing a reading that was a bucket's min or max re-reads that bucket's readings.
+CREATE TABLE Water_Quality_Stats (
+    grain ENUM('all', 'day') NOT NULL,
+    location_id INT NOT NULL,
+    bucket_start DATE NOT NULL,
+    readings INT NOT NULL DEFAULT 0,
+    temperature_n INT NOT NULL DEFAULT 0,
+    temperature_sum DECIMAL(20,2) NOT NULL DEFAULT 0,
+    temperature_sumsq DECIMAL(30,4) NOT NULL DEFAULT 0,
+    temperature_min DECIMAL(6,2),
+    temperature_max DECIMAL(6,2),
+    ph_n INT NOT NULL DEFAULT 0,
+    ph_sum DECIMAL(20,2) NOT NULL DEFAULT 0,
+    ph_sumsq DECIMAL(30,4) NOT NULL DEFAULT 0,
+    ph_min DECIMAL(6,2),
+    ph_max DECIMAL(6,2),
+    salinity_n INT NOT NULL DEFAULT 0,
+    salinity_sum DECIMAL(20,2) NOT NULL DEFAULT 0,
+    salinity_sumsq DECIMAL(30,4) NOT NULL DEFAULT 0,
+    salinity_min DECIMAL(6,2),
+    salinity_max DECIMAL(6,2),
+    pollution_n INT NOT NULL DEFAULT 0,
+    pollution_sum DECIMAL(20,2) NOT NULL DEFAULT 0,
+    pollution_sumsq DECIMAL(30,4) NOT NULL DEFAULT 0,
+    pollution_min DECIMAL(6,2),
+    pollution_max DECIMAL(6,2),
+    PRIMARY KEY (grain, location_id, bucket_start),
+    KEY idx_water_quality_stats_bucket (grain, bucket_start)
+);
+
+DELIMITER //
+
+CREATE PROCEDURE AddWaterQualityStats(IN p_grain VARCHAR(3), IN p_location_id INT, IN p_bucket DATE,
+                                      IN p_temperature DECIMAL(6,2), IN p_ph DECIMAL(6,2), IN p_salinity DECIMAL(6,2), IN p_pollution DECIMAL(6,2))
+BEGIN
+    INSERT INTO Water_Quality_Stats (grain, location_id, bucket_start, readings,
+            temperature_n, temperature_sum, temperature_sumsq, temperature_min, temperature_max,
+            ph_n, ph_sum, ph_sumsq, ph_min, ph_max,
+            salinity_n, salinity_sum, salinity_sumsq, salinity_min, salinity_max,
+            pollution_n, pollution_sum, pollution_sumsq, pollution_min, pollution_max)
+    VALUES (p_grain, p_location_id, p_bucket, 1,
+            p_temperature IS NOT NULL, COALESCE(p_temperature, 0), COALESCE(p_temperature * p_temperature, 0), p_temperature, p_temperature,
+            p_ph IS NOT NULL, COALESCE(p_ph, 0), COALESCE(p_ph * p_ph, 0), p_ph, p_ph,
+            p_salinity IS NOT NULL, COALESCE(p_salinity, 0), COALESCE(p_salinity * p_salinity, 0), p_salinity, p_salinity,
+            p_pollution IS NOT NULL, COALESCE(p_pollution, 0), COALESCE(p_pollution * p_pollution, 0), p_pollution, p_pollution)
+    ON DUPLICATE KEY UPDATE
+        readings = readings + 1,
+        temperature_n = temperature_n + (p_temperature IS NOT NULL), temperature_sum = temperature_sum + COALESCE(p_temperature, 0), temperature_sumsq = temperature_sumsq + COALESCE(p_temperature * p_temperature, 0),
+        temperature_min = COALESCE(LEAST(temperature_min, p_temperature), temperature_min, p_temperature), temperature_max = COALESCE(GREATEST(temperature_max, p_temperature), temperature_max, p_temperature),
+        ph_n = ph_n + (p_ph IS NOT NULL), ph_sum = ph_sum + COALESCE(p_ph, 0), ph_sumsq = ph_sumsq + COALESCE(p_ph * p_ph, 0),
+        ph_min = COALESCE(LEAST(ph_min, p_ph), ph_min, p_ph), ph_max = COALESCE(GREATEST(ph_max, p_ph), ph_max, p_ph),
+        salinity_n = salinity_n + (p_salinity IS NOT NULL), salinity_sum = salinity_sum + COALESCE(p_salinity, 0), salinity_sumsq = salinity_sumsq + COALESCE(p_salinity * p_salinity, 0),
+        salinity_min = COALESCE(LEAST(salinity_min, p_salinity), salinity_min, p_salinity), salinity_max = COALESCE(GREATEST(salinity_max, p_salinity), salinity_max, p_salinity),
+        pollution_n = pollution_n + (p_pollution IS NOT NULL), pollution_sum = pollution_sum + COALESCE(p_pollution, 0), pollution_sumsq = pollution_sumsq + COALESCE(p_pollution * p_pollution, 0),
+        pollution_min = COALESCE(LEAST(pollution_min, p_pollution), pollution_min, p_pollution), pollution_max = COALESCE(GREATEST(pollution_max, p_pollution), pollution_max, p_pollution);
+END //
+
+-- Recompute min / max of one bucket from the readings (after one of its extremes was removed)
+CREATE PROCEDURE RecomputeWaterQualityExtremes(IN p_grain VARCHAR(3), IN p_location_id INT, IN p_bucket DATE)
+BEGIN
+    UPDATE Water_Quality_Stats st
+    JOIN (
+        SELECT MIN(temperature) AS temperature_min, MAX(temperature) AS temperature_max,
+               MIN(pH) AS ph_min, MAX(pH) AS ph_max,
+               MIN(salinity) AS salinity_min, MAX(salinity) AS salinity_max,
+               MIN(pollution_index) AS pollution_min, MAX(pollution_index) AS pollution_max
+        FROM Water_Quality
+        WHERE location_id = p_location_id
+          AND (p_grain = 'all' OR (measured_at >= p_bucket AND measured_at < p_bucket + INTERVAL 1 DAY))
+    ) x
+    SET st.temperature_min = x.temperature_min, st.temperature_max = x.temperature_max,
+        st.ph_min = x.ph_min, st.ph_max = x.ph_max,
+        st.salinity_min = x.salinity_min, st.salinity_max = x.salinity_max,
+        st.pollution_min = x.pollution_min, st.pollution_max = x.pollution_max
+    WHERE st.grain = p_grain AND st.location_id = p_location_id AND st.bucket_start = p_bucket;
+END //
+
+CREATE PROCEDURE RemoveWaterQualityStats(IN p_grain VARCHAR(3), IN p_location_id INT, IN p_bucket DATE,
+                                         IN p_temperature DECIMAL(6,2), IN p_ph DECIMAL(6,2), IN p_salinity DECIMAL(6,2), IN p_pollution DECIMAL(6,2))
+BEGIN
+    UPDATE Water_Quality_Stats SET
+        readings = readings - 1,
+        temperature_n = temperature_n - (p_temperature IS NOT NULL), temperature_sum = temperature_sum - COALESCE(p_temperature, 0), temperature_sumsq = temperature_sumsq - COALESCE(p_temperature * p_temperature, 0),
+        ph_n = ph_n - (p_ph IS NOT NULL), ph_sum = ph_sum - COALESCE(p_ph, 0), ph_sumsq = ph_sumsq - COALESCE(p_ph * p_ph, 0),
+        salinity_n = salinity_n - (p_salinity IS NOT NULL), salinity_sum = salinity_sum - COALESCE(p_salinity, 0), salinity_sumsq = salinity_sumsq - COALESCE(p_salinity * p_salinity, 0),
+        pollution_n = pollution_n - (p_pollution IS NOT NULL), pollution_sum = pollution_sum - COALESCE(p_pollution, 0), pollution_sumsq = pollution_sumsq - COALESCE(p_pollution * p_pollution, 0)
+    WHERE grain = p_grain AND location_id = p_location_id AND bucket_start = p_bucket;
+    DELETE FROM Water_Quality_Stats
+    WHERE grain = p_grain AND location_id = p_location_id AND bucket_start = p_bucket AND readings <= 0;
+    IF ROW_COUNT() = 0 AND EXISTS (
+        SELECT 1 FROM Water_Quality_Stats
+        WHERE grain = p_grain AND location_id = p_location_id AND bucket_start = p_bucket
+          AND (temperature_min = p_temperature OR temperature_max = p_temperature OR ph_min = p_ph OR ph_max = p_ph OR salinity_min = p_salinity OR salinity_max = p_salinity OR pollution_min = p_pollution OR pollution_max = p_pollution)
+    ) THEN
+        CALL RecomputeWaterQualityExtremes(p_grain, p_location_id, p_bucket);
+    END IF;
+END //
+
+-- Add (p_sign = 1) or remove (p_sign = -1) one reading from its location's 'all' and 'day' rows
+CREATE PROCEDURE BumpWaterQualityStats(IN p_location_id INT, IN p_measured_at DATETIME, IN p_sign INT,
+                                       IN p_temperature DECIMAL(6,2), IN p_ph DECIMAL(6,2), IN p_salinity DECIMAL(6,2), IN p_pollution DECIMAL(6,2))
+BEGIN
+    IF p_location_id IS NOT NULL THEN
+        IF p_sign > 0 THEN
+            CALL AddWaterQualityStats('all', p_location_id, '1970-01-01', p_temperature, p_ph, p_salinity, p_pollution);
+            CALL AddWaterQualityStats('day', p_location_id, DATE(p_measured_at), p_temperature, p_ph, p_salinity, p_pollution);
+        ELSE
+            CALL RemoveWaterQualityStats('all', p_location_id, '1970-01-01', p_temperature, p_ph, p_salinity, p_pollution);
+            CALL RemoveWaterQualityStats('day', p_location_id, DATE(p_measured_at), p_temperature, p_ph, p_salinity, p_pollution);
+        END IF;
+    END IF;
+END //
+
+-- Full rebuild, for drift (e.g. rows loaded with triggers disabled)
+CREATE PROCEDURE RebuildWaterQualityStats()
+BEGIN
+    DELETE FROM Water_Quality_Stats;
+    INSERT INTO Water_Quality_Stats (grain, location_id, bucket_start, readings,
+            temperature_n, temperature_sum, temperature_sumsq, temperature_min, temperature_max,
+            ph_n, ph_sum, ph_sumsq, ph_min, ph_max,
+            salinity_n, salinity_sum, salinity_sumsq, salinity_min, salinity_max,
+            pollution_n, pollution_sum, pollution_sumsq, pollution_min, pollution_max)
+        SELECT 'all', location_id, '1970-01-01', COUNT(*),
+               COUNT(temperature), COALESCE(SUM(temperature), 0), COALESCE(SUM(temperature * temperature), 0), MIN(temperature), MAX(temperature),
+               COUNT(pH), COALESCE(SUM(pH), 0), COALESCE(SUM(pH * pH), 0), MIN(pH), MAX(pH),
+               COUNT(salinity), COALESCE(SUM(salinity), 0), COALESCE(SUM(salinity * salinity), 0), MIN(salinity), MAX(salinity),
+               COUNT(pollution_index), COALESCE(SUM(pollution_index), 0), COALESCE(SUM(pollution_index * pollution_index), 0), MIN(pollution_index), MAX(pollution_index)
+        FROM Water_Quality
+        WHERE location_id IS NOT NULL
+        GROUP BY location_id;
+    INSERT INTO Water_Quality_Stats (grain, location_id, bucket_start, readings,
+            temperature_n, temperature_sum, temperature_sumsq, temperature_min, temperature_max,
+            ph_n, ph_sum, ph_sumsq, ph_min, ph_max,
+            salinity_n, salinity_sum, salinity_sumsq, salinity_min, salinity_max,
+            pollution_n, pollution_sum, pollution_sumsq, pollution_min, pollution_max)
+        SELECT 'day', location_id, DATE(measured_at), COUNT(*),
+               COUNT(temperature), COALESCE(SUM(temperature), 0), COALESCE(SUM(temperature * temperature), 0), MIN(temperature), MAX(temperature),
+               COUNT(pH), COALESCE(SUM(pH), 0), COALESCE(SUM(pH * pH), 0), MIN(pH), MAX(pH),
+               COUNT(salinity), COALESCE(SUM(salinity), 0), COALESCE(SUM(salinity * salinity), 0), MIN(salinity), MAX(salinity),
+               COUNT(pollution_index), COALESCE(SUM(pollution_index), 0), COALESCE(SUM(pollution_index * pollution_index), 0), MIN(pollution_index), MAX(pollution_index)
+        FROM Water_Quality
+        WHERE location_id IS NOT NULL
+        GROUP BY location_id, DATE(measured_at);
+END //
+
+CREATE TRIGGER Water_Quality_Stats_Insert AFTER INSERT ON Water_Quality
+FOR EACH ROW
+BEGIN
+    CALL BumpWaterQualityStats(NEW.location_id, NEW.measured_at, 1, NEW.temperature, NEW.pH, NEW.salinity, NEW.pollution_index);
+END //
+
+CREATE TRIGGER Water_Quality_Stats_Update AFTER UPDATE ON Water_Quality
+FOR EACH ROW
+BEGIN
+    CALL BumpWaterQualityStats(OLD.location_id, OLD.measured_at, -1, OLD.temperature, OLD.pH, OLD.salinity, OLD.pollution_index);
+    CALL BumpWaterQualityStats(NEW.location_id, NEW.measured_at, 1, NEW.temperature, NEW.pH, NEW.salinity, NEW.pollution_index);
+END //
+
+CREATE TRIGGER Water_Quality_Stats_Delete AFTER DELETE ON Water_Quality
+FOR EACH ROW
+BEGIN
+    CALL BumpWaterQualityStats(OLD.location_id, OLD.measured_at, -1, OLD.temperature, OLD.pH, OLD.salinity, OLD.pollution_index);
+END //
+
+-- ---------- readers ----------
+DROP FUNCTION IF EXISTS AvgPollution //
+
+-- Average pollution index for a location, from the running totals
+CREATE FUNCTION AvgPollution(locName VARCHAR(100)) RETURNS DECIMAL(5,2)
+READS SQL DATA
+BEGIN
+    DECLARE avgPoll DECIMAL(5,2);
+    SELECT SUM(st.pollution_sum) / NULLIF(SUM(st.pollution_n), 0) INTO avgPoll
+    FROM Location l
+    JOIN Water_Quality_Stats st ON st.location_id = l.location_id AND st.grain = 'all'
+    WHERE l.location_name = locName;
+    RETURN avgPoll;
+END //
+
+-- Same over the last p_days days (today included)
+CREATE FUNCTION AvgPollutionSince(locName VARCHAR(100), p_days INT) RETURNS DECIMAL(5,2)
+READS SQL DATA
+BEGIN
+    DECLARE avgPoll DECIMAL(5,2);
+    SELECT SUM(st.pollution_sum) / NULLIF(SUM(st.pollution_n), 0) INTO avgPoll
+    FROM Location l
+    JOIN Water_Quality_Stats st ON st.location_id = l.location_id AND st.grain = 'day'
+    WHERE l.location_name = locName AND st.bucket_start > CURDATE() - INTERVAL p_days DAY;
+    RETURN avgPoll;
+END //
+
+-- ---------- Dashboard_Summary no longer tracks pollution ----------
+DROP TRIGGER IF EXISTS Water_Quality_Summary_Insert //
+DROP TRIGGER IF EXISTS Water_Quality_Summary_Update //
+DROP TRIGGER IF EXISTS Water_Quality_Summary_Delete //
+DROP TRIGGER IF EXISTS Location_Summary_Update //
+DROP PROCEDURE IF EXISTS BumpRegionPollution //
+DROP PROCEDURE IF EXISTS RefreshDashboardSummary //
+
+CREATE PROCEDURE RefreshDashboardSummary()
+BEGIN
+    DELETE FROM Dashboard_Summary;
+    INSERT INTO Dashboard_Summary (metric, dimension, value_count)
+        SELECT 'total', 'Species', COUNT(*) FROM Species
+        UNION ALL SELECT 'total', 'Location', COUNT(*) FROM Location
+        UNION ALL SELECT 'total', 'Observation', COUNT(*) FROM Observation
+        UNION ALL SELECT 'total', 'Conservation_Action', COUNT(*) FROM Conservation_Action;
+    INSERT INTO Dashboard_Summary (metric, dimension, value_count)
+        SELECT 'status', COALESCE(conservation_status, 'Unknown'), COUNT(*)
+        FROM Species
+        GROUP BY COALESCE(conservation_status, 'Unknown');
+    INSERT INTO Dashboard_Summary (metric, dimension) VALUES ('meta', 'last_refresh');
+END //
+
+DELIMITER ;
+
+DELETE FROM Dashboard_Summary WHERE metric = 'pollution';
+CALL RebuildWaterQualityStats();
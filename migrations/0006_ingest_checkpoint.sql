@@ -0,0 +1,12 @@
+-- ==========================================================
+--  0006: checkpoint of the observation ingest service
+-- ==========================================================
+
+-- The highest journal sequence number the ingest service (ingest.py) has written, per journal.
+-- It is updated in the same transaction as every batch, so after a crash the journal is replayed
+-- from exactly the first record that did not commit: nothing is lost and nothing is written twice.
+CREATE TABLE Ingest_Checkpoint (
+    journal VARCHAR(255) PRIMARY KEY,
+    seq BIGINT NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
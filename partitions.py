@@ -0,0 +1,282 @@
+# partitions.py
+"""
+Monthly range partitions for Observation (by obs_date) and Water_Quality (by measured_at).
+
+Layout of a partitioned table:
+    p_history   everything before the first month that has data
+    pYYYYMM     one partition per calendar month
+    p_future    catch-all (MAXVALUE) so inserts never fail for lack of a partition
+Queries that filter on the date column only read the matching months (partition pruning).
+
+maintain() partitions the tables the first time and afterwards splits p_future so there are
+always MONTHS_AHEAD empty months ready. archive_partitions() moves whole months out into
+<table>_Archive_pYYYYMM tables with EXCHANGE PARTITION, which is a metadata-only swap.
+Migration 0003 must have been applied first (it puts the date columns into the primary keys
+and replaces the foreign keys, which partitioned tables cannot have).
+
+Command line:
+    python partitions.py status
+    python partitions.py maintain [--months-ahead N]
+    python partitions.py archive --before 2022-01-01
+"""
+import argparse
+import datetime
+import re
+
+import change_feed
+import storage
+
+# table -> partitioning column
+PARTITIONED = {
+    "Observation": "obs_date",
+    "Water_Quality": "measured_at",
+}
+MONTHS_AHEAD = 3
+_MONTH_RE = re.compile(r"^p(\d{4})(\d{2})$")
+
+
+def _month_start(d):
+    return datetime.date(d.year, d.month, 1)
+
+
+def _add_months(d, n):
+    month = d.month - 1 + n
+    return datetime.date(d.year + month // 12, month % 12 + 1, 1)
+
+
+def _partition_name(month):
+    return f"p{month.year:04d}{month.month:02d}"
+
+
+def _month_of(name):
+    m = _MONTH_RE.match(name)
+    return datetime.date(int(m.group(1)), int(m.group(2)), 1) if m else None
+
+
+def _month_clause(month):
+    return f"PARTITION {_partition_name(month)} VALUES LESS THAN ('{_add_months(month, 1).isoformat()}')"
+
+
+# ---------- INSPECTION ----------
+def list_partitions(conn, table):
+    """[{name, upper, rows}] in partition order; empty if the table is not partitioned."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (table,))
+    rows = [{"name": name, "upper": upper, "rows": n} for name, upper, n in cursor.fetchall()]
+    cursor.close()
+    return rows
+
+
+def status(conn):
+    """{table: partitions} for every partitioned table (see list_partitions)."""
+    return {table: list_partitions(conn, table) for table in PARTITIONED}
+
+
+# ---------- CREATION ----------
+def partition_table(conn, table, months_ahead=MONTHS_AHEAD, today=None):
+    """Partition an unpartitioned table by month, from its first month of data to today + months_ahead."""
+    column = PARTITIONED[table]
+    today = today or datetime.date.today()
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT MIN({column}) FROM {table} WHERE {column} >= '1971-01-01'")
+    earliest = cursor.fetchone()[0]
+    first = _month_start(earliest) if earliest else _month_start(today)
+    last = _add_months(_month_start(today), months_ahead)
+    clauses = [f"PARTITION p_history VALUES LESS THAN ('{first.isoformat()}')"]
+    month = first
+    while month <= last:
+        clauses.append(_month_clause(month))
+        month = _add_months(month, 1)
+    clauses.append("PARTITION p_future VALUES LESS THAN (MAXVALUE)")
+    # rewrites the table; on a large table this is the slow step, run it off-peak
+    cursor.execute(f"ALTER TABLE {table} PARTITION BY RANGE COLUMNS({column}) (" + ", ".join(clauses) + ")")
+    cursor.close()
+    return len(clauses) - 2
+
+
+def add_future_partitions(conn, table, months_ahead=MONTHS_AHEAD, today=None):
+    """Split p_future so every month up to today + months_ahead has its own partition. Returns how many were added."""
+    today = today or datetime.date.today()
+    months = [m for m in (_month_of(p["name"]) for p in list_partitions(conn, table)) if m]
+    month = _add_months(max(months), 1) if months else _month_start(today)
+    last = _add_months(_month_start(today), months_ahead)
+    clauses = []
+    while month <= last:
+        clauses.append(_month_clause(month))
+        month = _add_months(month, 1)
+    if not clauses:
+        return 0
+    # p_future is empty unless rows were written far ahead, so this only touches metadata
+    cursor = conn.cursor()
+    cursor.execute(f"ALTER TABLE {table} REORGANIZE PARTITION p_future INTO ("
+                   + ", ".join(clauses) + ", PARTITION p_future VALUES LESS THAN (MAXVALUE))")
+    cursor.close()
+    return len(clauses)
+
+
+def maintain(conn, months_ahead=MONTHS_AHEAD):
+    """
+    Partition any table that is not partitioned yet and keep months_ahead future months ready.
+    Returns (success, message).
+    """
+    done = []
+    try:
+        for table in PARTITIONED:
+            if not list_partitions(conn, table):
+                done.append(f"{table}: partitioned into {partition_table(conn, table, months_ahead)} month(s)")
+            else:
+                added = add_future_partitions(conn, table, months_ahead)
+                if added:
+                    done.append(f"{table}: added {added} future month(s)")
+    except storage.Error as e:
+        return False, f"Partition maintenance failed: {e}"
+    return True, "; ".join(done) or "Partitions are up to date"
+
+
+# ---------- ARCHIVING ----------
+# the summary table each partitioned table's triggers keep, rebuilt after archiving
+SUMMARY_REBUILDS = {
+    "Observation": "RebuildObservationRollups",
+    "Water_Quality": "RebuildWaterQualityStats",
+}
+
+
+# table -> Observation column that points at it (a foreign key until migration 0003)
+REFERENCED_BY_OBSERVATION = {
+    "Water_Quality": "quality_id",
+}
+
+
+def _referenced_by_observation(cursor, table, source):
+    """True when a live observation points at a row of `source` (rows of `table` about to be archived)."""
+    column = REFERENCED_BY_OBSERVATION[table]
+    cursor.execute(f"SELECT EXISTS(SELECT 1 FROM Observation o JOIN {source} r ON r.{column} = o.{column})")
+    return bool(cursor.fetchone()[0])
+
+
+def _has_procedure(cursor, name):
+    cursor.execute("SELECT EXISTS(SELECT 1 FROM information_schema.ROUTINES "
+                   "WHERE ROUTINE_SCHEMA = DATABASE() AND ROUTINE_NAME = %s)", (name,))
+    return bool(cursor.fetchone()[0])
+
+
+def _rebuild_summaries(conn, table):
+    """Rebuild `table`'s summary (if its migration is applied) and Dashboard_Summary after rows left without triggers."""
+    cursor = conn.cursor()
+    try:
+        if _has_procedure(cursor, SUMMARY_REBUILDS[table]):
+            cursor.callproc(SUMMARY_REBUILDS[table])
+        cursor.callproc("RefreshDashboardSummary")
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def archive_partitions(conn, table, before):
+    """
+    Move every monthly partition that ends on or before `before` into its own
+    <table>_Archive_pYYYYMM table and drop it from the live table.
+    Rows in p_history are never archived. EXCHANGE PARTITION fires no triggers, so once any
+    month has left (even if a later step fails) the table's summary is rebuilt
+    (Observation_Rollup or Water_Quality_Stats, when that migration is applied) and
+    Dashboard_Summary is refreshed; for Observation a reset is also recorded in the change log
+    so cached observation listings are not reused.
+    A Water_Quality month that live Observation rows still reference through quality_id is
+    kept (migration 0003 replaced that foreign key with triggers, which EXCHANGE PARTITION
+    bypasses) and reported as a failure once the other months are archived.
+    Returns (success, [archive table names] or error message).
+    """
+    before = _month_start(before)
+    archived = []
+    kept = []       # months live observations still point at
+    cursor = conn.cursor()
+    error = None
+    try:
+        for p in list_partitions(conn, table):
+            month = _month_of(p["name"])
+            if month is None or _add_months(month, 1) > before:
+                continue
+            archive = f"{table}_Archive_{p['name']}"
+            # each step is checked first, so a run that failed part-way can simply be repeated
+            cursor.execute(f"CREATE TABLE IF NOT EXISTS {archive} LIKE {table}")
+            if list_partitions(conn, archive):
+                cursor.execute(f"ALTER TABLE {archive} REMOVE PARTITIONING")
+            cursor.execute(f"SELECT EXISTS(SELECT 1 FROM {archive})")
+            exchanged = cursor.fetchone()[0]
+            if exchanged:
+                # an earlier run exchanged the month but did not drop it: the live partition must be empty
+                cursor.execute(f"SELECT EXISTS(SELECT 1 FROM {table} PARTITION ({p['name']}))")
+                if cursor.fetchone()[0]:
+                    error = f"{archive} and partition {p['name']} both hold rows; merge them by hand"
+                    break
+            if table in REFERENCED_BY_OBSERVATION:
+                leaving = archive if exchanged else f"{table} PARTITION ({p['name']})"
+                if _referenced_by_observation(cursor, table, leaving):
+                    kept.append(p["name"])
+                    continue
+            if not exchanged:
+                cursor.execute(f"ALTER TABLE {table} EXCHANGE PARTITION {p['name']} WITH TABLE {archive}")
+            cursor.execute(f"ALTER TABLE {table} DROP PARTITION {p['name']}")
+            archived.append(archive)
+    except storage.Error as e:
+        error = e
+    finally:
+        cursor.close()
+    if archived:
+        try:
+            _rebuild_summaries(conn, table)
+            if table == "Observation":
+                change_feed.record_reset(conn)    # EXCHANGE PARTITION leaves no tombstones
+        except storage.Error as e:
+            error = error or e
+    if error is None and kept:
+        error = f"{', '.join(kept)} kept: live observations still reference their rows (archive those first)"
+    if error is not None:
+        return False, f"Archiving {table} failed after {len(archived)} partition(s): {error}"
+    return True, archived
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monthly partitions for Observation and Water_Quality")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="list the partitions of each table")
+    maintain_cmd = sub.add_parser("maintain", help="partition the tables and create future months")
+    maintain_cmd.add_argument("--months-ahead", type=int, default=MONTHS_AHEAD)
+    archive_cmd = sub.add_parser("archive", help="move old months into archive tables")
+    archive_cmd.add_argument("--before", required=True, type=datetime.date.fromisoformat,
+                             help="archive months that end on or before this date (YYYY-MM-DD)")
+    archive_cmd.add_argument("--table", choices=list(PARTITIONED), help="default: both tables")
+    args = parser.parse_args(argv)
+
+    import app  # deferred: only the CLI needs the app's connection settings
+
+    conn = app.open_dedicated_connection(app.DB_NAME)
+    try:
+        if args.command == "status":
+            for table, parts in status(conn).items():
+                print(f"{table}: {'not partitioned' if not parts else f'{len(parts)} partition(s)'}")
+                for p in parts:
+                    print(f"  {p['name']:<12} < {p['upper']:<24} ~{p['rows']} rows")
+            return 0
+        if args.command == "maintain":
+            ok, msg = maintain(conn, args.months_ahead)
+            print(msg)
+            return 0 if ok else 1
+        failed = False
+        for table in [args.table] if args.table else PARTITIONED:
+            ok, result = archive_partitions(conn, table, args.before)
+            print(f"{table}: " + (", ".join(result) or "nothing to archive" if ok else result))
+            failed |= not ok
+        return 1 if failed else 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
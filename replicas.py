@@ -0,0 +1,209 @@
+# replicas.py
+"""
+Read/write splitting: read-only helpers go to MySQL replicas, everything else to the primary.
+
+Every replica has its own connection pool. A background thread checks each replica every
+CHECK_INTERVAL seconds (SHOW REPLICA STATUS) and records whether it is reachable, whether both
+replication threads run and how many seconds it is behind its source. A read goes to the least
+busy replica that is healthy and at most max_lag seconds behind; when there is none it goes to
+the primary, so a broken or lagging replica only costs offload, never correctness.
+
+Reads can therefore be up to max_lag seconds stale (plus up to one check interval, since the lag
+is sampled). app.py keeps a session's reads on the primary for that long after it writes, so
+users always see their own changes on the rerun that follows them.
+
+Command line:
+    python replicas.py status
+"""
+import argparse
+import random
+import threading
+import time
+
+import storage
+
+MAX_LAG_SECONDS = 30      # replicas further behind than this get no reads
+CHECK_INTERVAL = 5        # seconds between health checks
+
+
+def replica_status(conn):
+    """(seconds behind the source, None) for a replicating server, or (None, reason) when it is not."""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+        except storage.Error:
+            cursor.execute("SHOW SLAVE STATUS")      # MySQL before 8.0.22
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    if not rows:
+        return None, "not a replica"
+    lag = 0
+    for row in rows:    # one row per replication channel
+        io = row.get("Replica_IO_Running", row.get("Slave_IO_Running"))
+        sql = row.get("Replica_SQL_Running", row.get("Slave_SQL_Running"))
+        if io != "Yes" or sql != "Yes":
+            return None, f"replication stopped (IO thread {io}, SQL thread {sql})"
+        behind = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+        if behind is None:
+            return None, "lag unknown"
+        lag = max(lag, int(behind))
+    return lag, None
+
+
+class Replica:
+    """One replica: its pool, how to open a health-check connection, and the last check's result."""
+    def __init__(self, name, pool, connect):
+        self.name = name
+        self.pool = pool
+        self.connect = connect
+        self.healthy = False
+        self.lag = None
+        self.error = "not checked yet"
+        self.checked_at = None
+        self.reads = 0
+        self._check_conn = None
+
+
+class ReplicaRouter:
+    """Picks a replica per read and keeps every replica's health and lag current."""
+    def __init__(self, replicas, max_lag=MAX_LAG_SECONDS, check_interval=CHECK_INTERVAL):
+        self.replicas = list(replicas)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._stats = {"replica_reads": 0, "primary_fallbacks": 0, "replica_failures": 0}
+        self._stop = threading.Event()
+        self.check_all()
+        self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+        self._thread.start()
+
+    # ---------- HEALTH ----------
+    def _check(self, replica):
+        try:
+            if replica._check_conn is None:
+                replica._check_conn = replica.connect()
+            lag, problem = replica_status(replica._check_conn)
+        except storage.Error as e:
+            lag, problem = None, str(e)
+            try:
+                if replica._check_conn is not None:
+                    replica._check_conn.close()
+            except storage.Error:
+                pass
+            replica._check_conn = None
+        with self._lock:
+            replica.lag = lag
+            replica.error = problem
+            replica.healthy = problem is None
+            replica.checked_at = time.time()
+
+    def check_all(self):
+        for replica in self.replicas:
+            self._check(replica)
+
+    def _run(self):
+        while not self._stop.wait(self.check_interval):
+            self.check_all()
+
+    def stop(self):
+        self._stop.set()
+
+    # ---------- ROUTING ----------
+    def candidates(self):
+        """Healthy replicas within max_lag that have a free connection, least busy first."""
+        with self._lock:
+            usable = [r for r in self.replicas if r.healthy and r.lag <= self.max_lag]
+        busy = {r.name: r.pool.stats()["in_use"] for r in usable}
+        usable = [r for r in usable if busy[r.name] < r.pool.size]
+        random.shuffle(usable)      # spread ties
+        return sorted(usable, key=lambda r: busy[r.name])
+
+    def acquire(self, fallback):
+        """A connection from the best replica, or from `fallback` (the primary's pool) when none is usable."""
+        for replica in self.candidates():
+            try:
+                conn = replica.pool.acquire()
+            except storage.Error as e:
+                # down since the last check: skip it until the next check says otherwise
+                with self._lock:
+                    replica.healthy = False
+                    replica.error = str(e)
+                    self._stats["replica_failures"] += 1
+                continue
+            with self._lock:
+                replica.reads += 1
+                self._stats["replica_reads"] += 1
+            return conn
+        with self._lock:
+            self._stats["primary_fallbacks"] += 1
+        return fallback.acquire()
+
+    def reader(self, fallback):
+        """An object with acquire() that routes every call like acquire(fallback), for code that takes a pool."""
+        return ReadPool(self, fallback)
+
+    # ---------- STATUS ----------
+    def status(self):
+        """One dict per replica: name, healthy, lag, error, checked (seconds ago), reads, in_use."""
+        now = time.time()
+        with self._lock:
+            rows = [{"name": r.name, "healthy": r.healthy, "lag": r.lag, "error": r.error,
+                     "checked": None if r.checked_at is None else round(now - r.checked_at, 1),
+                     "reads": r.reads} for r in self.replicas]
+        for row, replica in zip(rows, self.replicas):
+            row["in_use"] = replica.pool.stats()["in_use"]
+        return rows
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["replicas"] = len(self.replicas)
+        stats["usable"] = len(self.candidates())
+        stats["max_lag"] = self.max_lag
+        return stats
+
+
+class ReadPool:
+    """Pool-like view of a ReplicaRouter: acquire() picks a replica per call, falling back to the primary."""
+    def __init__(self, router, fallback):
+        self.router = router
+        self.fallback = fallback
+
+    def acquire(self):
+        return self.router.acquire(self.fallback)
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Read replica health")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="check every configured replica once")
+    parser.parse_args(argv)
+
+    import app  # deferred: only the CLI needs the app's connection settings
+
+    if not app.DB_REPLICA_HOSTS:
+        print("No replicas configured (set MARINE_DB_REPLICA_HOSTS)")
+        return 0
+    failed = False
+    for host in app.DB_REPLICA_HOSTS:
+        try:
+            conn = app.open_replica_connection(host)
+        except storage.Error as e:
+            print(f"{host}: unreachable ({e})")
+            failed = True
+            continue
+        try:
+            lag, problem = replica_status(conn)
+        finally:
+            conn.close()
+        usable = problem is None and lag <= app.REPLICA_MAX_LAG
+        print(f"{host}: " + (problem or f"{lag}s behind") + ("" if usable else " - not used for reads"))
+        failed |= not usable
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
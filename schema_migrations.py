@@ -0,0 +1,241 @@
+# schema_migrations.py
+"""
+Versioned schema migrations and an EXPLAIN-based index advisor.
+
+Migrations are the numbered files in migrations/ (e.g. 0001_hot_query_indexes.sql). Each is
+run once, in order, through sql_script, and recorded in the Schema_Migrations table.
+
+The advisor runs the app's read helpers with query recording switched on, EXPLAINs every
+statement they issued (plus the queries inside stored routines) and flags full table scans,
+filesorts and temporary tables.
+
+Command line:
+    python schema_migrations.py status
+    python schema_migrations.py migrate
+    python schema_migrations.py advise
+"""
+import argparse
+import os
+import re
+from contextlib import contextmanager
+
+import sql_script
+import storage
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+_FILENAME_RE = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+# Queries that run inside stored routines, so the app never sends them itself
+ROUTINE_QUERIES = [
+    ("AvgPollution()", """
+        SELECT SUM(st.pollution_sum) / NULLIF(SUM(st.pollution_n), 0)
+        FROM Location l
+        JOIN Water_Quality_Stats st ON st.location_id = l.location_id AND st.grain = 'all'
+        WHERE l.location_name = %s
+    """, ("Great Barrier Reef",)),
+    ("AvgPollutionSince()", """
+        SELECT SUM(st.pollution_sum) / NULLIF(SUM(st.pollution_n), 0)
+        FROM Location l
+        JOIN Water_Quality_Stats st ON st.location_id = l.location_id AND st.grain = 'day'
+        WHERE l.location_name = %s AND st.bucket_start > CURDATE() - INTERVAL %s DAY
+    """, ("Great Barrier Reef", 30)),
+    ("GetConservationActionsBySpecies()", """
+        SELECT s.common_name, ca.action_type, ca.description, ca.start_date, ca.end_date
+        FROM Conservation_Action ca
+        JOIN Species s ON ca.species_id = s.species_id
+        WHERE s.common_name = %s
+    """, ("Blue Whale",)),
+]
+
+
+# ---------- MIGRATIONS ----------
+def available_migrations(directory=MIGRATIONS_DIR):
+    """[(version, name, path)] for every migration file, in version order."""
+    found = []
+    for filename in os.listdir(directory):
+        m = _FILENAME_RE.match(filename)
+        if m:
+            found.append((int(m.group(1)), m.group(2), os.path.join(directory, filename)))
+    return sorted(found)
+
+
+def applied_versions(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Schema_Migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(200) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("SELECT version FROM Schema_Migrations")
+    versions = {row[0] for row in cursor.fetchall()}
+    cursor.close()
+    return versions
+
+
+def pending_migrations(conn, directory=MIGRATIONS_DIR):
+    done = applied_versions(conn)
+    return [m for m in available_migrations(directory) if m[0] not in done]
+
+
+def apply_migrations(conn, directory=MIGRATIONS_DIR, on_applied=None):
+    """
+    Apply every pending migration in order on `conn` (use a dedicated connection).
+    MySQL DDL is not transactional, so a failed migration may be partly applied; it is not
+    recorded and the error names the statement to fix.
+    Returns (success, message).
+    """
+    try:
+        pending = pending_migrations(conn, directory)
+    except storage.Error as e:
+        return False, f"Could not read Schema_Migrations: {e}"
+    if not pending:
+        return True, "Schema is up to date"
+
+    for version, name, path in pending:
+        with open(path, "rb") as f:
+            ok, info = sql_script.execute_script(conn, f)
+        if not ok:
+            return False, (f"Migration {version:04d}_{name} failed at statement {info['failed_statement']}: "
+                           f"{info['error']}")
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO Schema_Migrations (version, name) VALUES (%s, %s)", (version, name))
+        conn.commit()
+        cursor.close()
+        if on_applied:
+            on_applied(version, name)
+    return True, f"Applied {len(pending)} migration(s): " + ", ".join(f"{v:04d}_{n}" for v, n, _ in pending)
+
+
+# ---------- INDEX ADVISOR ----------
+@contextmanager
+def recording(pool):
+    """Record (sql, params) for every statement executed on connections borrowed from `pool`."""
+    log = []
+    pool.recorder = lambda sql, params: log.append((sql, params))
+    try:
+        yield log
+    finally:
+        pool.recorder = None
+
+
+def explain(conn, sql, params=None):
+    """
+    EXPLAIN one SELECT and return a row per table access with a list of problems:
+    'full scan' (type ALL), 'filesort' and 'temporary'.
+    """
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("EXPLAIN " + sql, params or ())
+    plan = cursor.fetchall()
+    cursor.close()
+    rows = []
+    for step in plan:
+        extra = step.get("Extra") or ""
+        flags = []
+        if step.get("type") == "ALL":
+            flags.append("full scan")
+        if "filesort" in extra:
+            flags.append("filesort")
+        if "temporary" in extra:
+            flags.append("temporary")
+        rows.append({
+            "table": step.get("table"),
+            "type": step.get("type"),
+            "key": step.get("key"),
+            "rows": step.get("rows"),
+            "extra": extra,
+            "flags": flags,
+        })
+    return rows
+
+
+def run_advisor(app):
+    """
+    Exercise the app's read helpers, EXPLAIN every SELECT they issued and return one
+    report row per (helper, table access).
+    """
+    probes = [
+        ("fetch_all_species", app.fetch_all_species),
+        ("fetch_all_locations", app.fetch_all_locations),
+        ("fetch_all_observers", app.fetch_all_observers),
+        ("fetch_all_actions_full", app.fetch_all_actions_full),
+        ("fetch_recent_observations", app.fetch_recent_observations),
+        ("fetch_observations_page", app.fetch_observations_page),
+        ("fetch_observations_page(species)", lambda: app.fetch_observations_page(species_id=1)),
+        ("fetch_observations_page(location)", lambda: app.fetch_observations_page(location_id=1)),
+        ("search_species_by_name", lambda: app.search_species_by_name("whale")),
+        ("fetch_actions_for_species", lambda: app.fetch_actions_for_species(1)),
+        ("fetch_one_record", lambda: app.fetch_one_record("Species", "species_id", 1)),
+        ("fetch_observation_trend", app.fetch_observation_trend),
+        ("fetch_observation_trend(species)", lambda: app.fetch_observation_trend("month", by="species")),
+        ("fetch_water_quality_stats(region)", lambda: app.fetch_water_quality_stats("region")),
+        ("fetch_water_quality_stats(30 days)", lambda: app.fetch_water_quality_stats(days=30)),
+    ]
+
+    pool = app.get_connection_pool(app.DB_NAME)
+    app.get_reference_cache().invalidate()     # make the cached lookups hit the database
+    statements = []
+    for helper, probe in probes:
+        # the recorder sits on the primary's pool: keep read helpers off the replicas while probing
+        app._pin_reads_to_primary()
+        with recording(pool) as log:
+            probe()
+        statements.extend((helper, sql, params) for sql, params in log)
+    statements.extend(ROUTINE_QUERIES)
+
+    report = []
+    conn = app.get_db_connection()
+    if not conn:
+        return report
+    try:
+        for helper, sql, params in statements:
+            if not sql.lstrip().upper().startswith("SELECT"):
+                continue
+            try:
+                plan = explain(conn, sql, params)
+            except storage.Error as e:
+                report.append({"helper": helper, "table": None, "type": None, "key": None,
+                               "rows": None, "extra": str(e), "flags": ["explain failed"]})
+                continue
+            for step in plan:
+                report.append({"helper": helper, **step})
+    finally:
+        conn.close()
+    return report
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Schema migrations and index advisor")
+    parser.add_argument("command", choices=["status", "migrate", "advise"])
+    args = parser.parse_args(argv)
+
+    import app  # deferred: only the CLI needs the app's connection settings
+
+    if args.command == "advise":
+        report = run_advisor(app)
+        flagged = [r for r in report if r["flags"]]
+        for r in report:
+            marker = "!!" if r["flags"] else "  "
+            print(f"{marker} {r['helper']:<36} {str(r['table']):<12} type={r['type']} key={r['key']} "
+                  f"rows={r['rows']} {', '.join(r['flags'])}")
+        print(f"{len(flagged)} of {len(report)} table access(es) flagged")
+        return 1 if flagged else 0
+
+    conn = app.open_dedicated_connection(app.DB_NAME)
+    try:
+        if args.command == "status":
+            done = applied_versions(conn)
+            for version, name, _ in available_migrations():
+                print(f"{'applied' if version in done else 'pending':<8} {version:04d}_{name}")
+            return 0
+        ok, msg = apply_migrations(conn, on_applied=lambda v, n: print(f"applied {v:04d}_{n}"))
+        print(msg)
+        return 0 if ok else 1
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,142 @@
+# species_search.py
+"""
+In-process trigram search over Species names.
+
+The index keeps a posting list per trigram and is updated row by row as species are added,
+renamed or deleted, so it never has to be rebuilt for a single write. Matches are ranked:
+exact name > name prefix > word prefix > substring > fuzzy (trigram similarity).
+"""
+import re
+import threading
+import time
+from collections import defaultdict
+
+FUZZY_THRESHOLD = 0.3        # minimum trigram similarity for a fuzzy-only match
+
+_NON_WORD_RE = re.compile(r"[^\w]+")
+
+# Base score for each kind of match; trigram similarity (0..1) is added on top
+EXACT, PREFIX, WORD_PREFIX, SUBSTRING, FUZZY = 4.0, 3.0, 2.0, 1.0, 0.0
+
+
+def normalize(text):
+    return _NON_WORD_RE.sub(" ", str(text or "").casefold()).strip()
+
+
+def trigrams(text):
+    """Trigrams of every word, padded like pg_trgm ('  w', ' wo', 'wor', 'ord', 'rd ')."""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+class TrigramIndex:
+    """Ranked name search over documents made of one or more name fields."""
+    def __init__(self, fields):
+        self.fields = fields
+        self._docs = {}                      # doc_id -> {field: (normalized text, trigram set, [per-word trigram sets])}
+        self._postings = defaultdict(set)    # trigram -> doc_ids
+        self._lock = threading.Lock()
+        self.built_at = None                 # time.monotonic() of the last full rebuild
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _remove_locked(self, doc_id):
+        for _, grams, _ in self._docs.pop(doc_id, {}).values():
+            for g in grams:
+                self._postings[g].discard(doc_id)
+                if not self._postings[g]:
+                    del self._postings[g]
+
+    def upsert(self, doc_id, row):
+        """Index (or re-index) a row; `row` holds the name fields."""
+        entries = {}
+        for field in self.fields:
+            text = normalize(row.get(field))
+            if text:
+                entries[field] = (text, trigrams(text), [trigrams(word) for word in text.split()])
+        with self._lock:
+            self._remove_locked(doc_id)
+            self._docs[doc_id] = entries
+            for _, grams, _ in entries.values():
+                for g in grams:
+                    self._postings[g].add(doc_id)
+
+    def update(self, doc_id, changes):
+        """Re-index after a partial update; `changes` only needs the fields that changed."""
+        if not any(f in changes for f in self.fields):
+            return
+        with self._lock:
+            current = {field: entry[0] for field, entry in self._docs.get(doc_id, {}).items()}
+        self.upsert(doc_id, {**current, **changes})
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def clear(self):
+        """Drop everything; the next user should rebuild()."""
+        with self._lock:
+            self._docs.clear()
+            self._postings.clear()
+            self.built_at = None
+
+    def rebuild(self, rows, id_field):
+        self.clear()
+        for row in rows:
+            self.upsert(row[id_field], row)
+        self.built_at = time.monotonic()
+
+    @staticmethod
+    def _similarity(a, b):
+        shared = len(a & b)
+        union = len(a) + len(b) - shared
+        return shared / union if union else 0.0
+
+    @classmethod
+    def _score(cls, query, query_grams, text, grams, word_grams):
+        if text == query:
+            base = EXACT
+        elif text.startswith(query):
+            base = PREFIX
+        elif any(word.startswith(query) for word in text.split()) or f" {query}" in f" {text}":
+            base = WORD_PREFIX
+        elif query in text:
+            base = SUBSTRING
+        else:
+            base = None
+        # best of whole-name and single-word similarity, so "wale" still finds "Blue Whale"
+        similarity = max([cls._similarity(query_grams, grams)] + [cls._similarity(query_grams, w) for w in word_grams])
+        if base is None:
+            if similarity < FUZZY_THRESHOLD:
+                return None
+            base = FUZZY
+        return base + similarity
+
+    def search(self, query, limit=50):
+        """Return [(doc_id, score)] best first."""
+        query = normalize(query)
+        if not query:
+            return []
+        query_grams = trigrams(query)
+        with self._lock:
+            if len(query) < 3:
+                candidates = set(self._docs)     # too short for trigrams to narrow anything down
+            else:
+                candidates = set()
+                for g in query_grams:
+                    candidates |= self._postings.get(g, set())
+            docs = {doc_id: self._docs[doc_id] for doc_id in candidates}
+
+        results = []
+        for doc_id, entries in docs.items():
+            scores = [self._score(query, query_grams, *entry) for entry in entries.values()]
+            scores = [s for s in scores if s is not None]
+            if scores:
+                results.append((doc_id, max(scores)))
+        results.sort(key=lambda r: (-r[1], r[0]))
+        return results[:limit]
@@ -0,0 +1,264 @@
+# sql_restore.py
+"""
+Fast restore mode for MySQL scripts such as marine_species_project.sql.
+
+The script is streamed once (see sql_script.StatementReader) and replayed in phases:
+  schema       DROP/CREATE DATABASE, USE and CREATE TABLE, with foreign keys and
+               secondary indexes stripped from the table definitions
+  data         INSERTs, merged into multi-row batches and loaded by parallel worker
+               connections with foreign_key_checks and unique_checks disabled
+  constraints  the stripped foreign keys and indexes, added back with ALTER TABLE
+  routines     procedures, functions and triggers
+  views        CREATE VIEW
+  post         every other statement, in its original order
+Each phase is timed.
+"""
+import queue
+import re
+import threading
+import time
+
+import sql_script
+import storage
+
+DEFAULT_WORKERS = 4
+QUEUE_DEPTH = 8     # batches waiting per worker before the reader blocks
+
+PHASES = ["schema", "data", "constraints", "routines", "views", "post"]
+
+_ROUTINE_RE = re.compile(r"^CREATE\s+(DEFINER\s*=\s*\S+\s+)?(TRIGGER|PROCEDURE|FUNCTION)\b", re.IGNORECASE)
+_VIEW_RE = re.compile(r"^CREATE\s+(OR\s+REPLACE\s+)?(ALGORITHM\s*=\s*\w+\s+)?(DEFINER\s*=\s*\S+\s+)?"
+                      r"(SQL\s+SECURITY\s+\w+\s+)?VIEW\b", re.IGNORECASE)
+_TABLE_RE = re.compile(r"^CREATE\s+TABLE\s+(IF\s+NOT\s+EXISTS\s+)?([`\w.]+)\s*\(", re.IGNORECASE)
+_SETUP_RE = re.compile(r"^(DROP\s+DATABASE|CREATE\s+DATABASE|CREATE\s+SCHEMA|USE|SET)\b", re.IGNORECASE)
+_USE_RE = re.compile(r"^USE\s+`?(\w+)`?", re.IGNORECASE)
+_DEFERRED_ITEM_RE = re.compile(r"^(CONSTRAINT\s+\S+\s+)?(FOREIGN\s+KEY|KEY|INDEX|UNIQUE|FULLTEXT|SPATIAL)\b", re.IGNORECASE)
+
+
+# ---------- TABLE DEFINITIONS ----------
+def _split_top_level(body):
+    """Split a table body on commas that are not inside parentheses or quotes."""
+    items, depth, quote, start = [], 0, None, 0
+    i = 0
+    while i < len(body):
+        ch = body[i]
+        if quote:
+            if ch == "\\" and quote != "`":
+                i += 1
+            elif ch == quote:
+                quote = None
+        elif ch in "'\"`":
+            quote = ch
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            items.append(body[start:i].strip())
+            start = i + 1
+        i += 1
+    items.append(body[start:].strip())
+    return [item for item in items if item]
+
+
+def strip_table_constraints(sql):
+    """
+    Remove foreign keys and secondary indexes from a CREATE TABLE statement.
+    Returns (create_sql, table_name, [ALTER TABLE ... ADD ... statements to run after the load]).
+    """
+    m = _TABLE_RE.match(sql)
+    if not m:
+        return sql, None, []
+    table = m.group(2)
+    open_paren = m.end() - 1
+    close_paren = sql.rfind(")")
+    items = _split_top_level(sql[open_paren + 1:close_paren])
+    kept = [item for item in items if not _DEFERRED_ITEM_RE.match(item)]
+    deferred = [f"ALTER TABLE {table} ADD {item}" for item in items if _DEFERRED_ITEM_RE.match(item)]
+    if not deferred:
+        return sql, table, []
+    create_sql = sql[:open_paren + 1] + "\n    " + ",\n    ".join(kept) + "\n" + sql[close_paren:]
+    return create_sql, table, deferred
+
+
+# ---------- DATA WORKERS ----------
+class _LoadWorker(threading.Thread):
+    """Runs INSERT batches for the tables hashed to it on its own connection."""
+    def __init__(self, connect, database):
+        super().__init__(daemon=True)
+        self.connect = connect
+        self.database = database
+        self.queue = queue.Queue(maxsize=QUEUE_DEPTH)
+        self.statements = 0
+        self.error = None
+
+    def run(self):
+        conn = None
+        try:
+            conn = self.connect(self.database)
+            cursor = conn.cursor()
+            cursor.execute("SET SESSION foreign_key_checks = 0")
+            cursor.execute("SET SESSION unique_checks = 0")
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    break
+                if self.error:
+                    continue    # keep draining so the reader never blocks on a dead worker
+                sql, count = item
+                try:
+                    cursor.execute(sql)
+                    conn.commit()
+                    self.statements += count
+                except storage.Error as e:
+                    conn.rollback()
+                    self.error = (e, sql)
+        except storage.Error as e:
+            self.error = (e, None)
+            while self.queue.get() is not None:
+                pass
+        finally:
+            if conn is not None:
+                conn.close()
+
+
+class _DataLoader:
+    """Merges INSERTs per table and hands full batches to the worker that owns the table."""
+    def __init__(self, connect, database, workers):
+        self.workers = [_LoadWorker(connect, database) for _ in range(workers)]
+        for w in self.workers:
+            w.start()
+        self.owner = {}
+        self.pending = {}   # merge key -> (prefix, [values], bytes)
+
+    def _worker_for(self, table):
+        if table not in self.owner:
+            self.owner[table] = self.workers[len(self.owner) % len(self.workers)]
+        return self.owner[table]
+
+    def _flush(self, key):
+        prefix, values, _ = self.pending.pop(key)
+        sql = prefix + "\n" + ",\n".join(values)
+        self._worker_for(key[0]).queue.put((sql, len(values)))
+
+    def add(self, parts):
+        key, prefix, values = parts
+        batch = self.pending.get(key)
+        if batch and (len(batch[1]) >= sql_script.INSERT_BATCH_STATEMENTS
+                      or batch[2] + len(values) > sql_script.INSERT_BATCH_BYTES):
+            self._flush(key)
+            batch = None
+        if batch is None:
+            batch = (prefix, [], 0)
+        batch[1].append(values)
+        self.pending[key] = (prefix, batch[1], batch[2] + len(values))
+
+    def finish(self):
+        """Flush everything, wait for the workers and return (statements loaded, first error or None)."""
+        for key in list(self.pending):
+            self._flush(key)
+        for w in self.workers:
+            w.queue.put(None)
+        for w in self.workers:
+            w.join()
+        errors = [w.error for w in self.workers if w.error]
+        return sum(w.statements for w in self.workers), (errors[0] if errors else None)
+
+
+# ---------- RESTORE ----------
+def _run(cursor, sql):
+    cursor.execute(sql)
+    if cursor.with_rows:
+        cursor.fetchall()
+
+
+def restore_script(connect, stream, workers=DEFAULT_WORKERS, on_phase=None):
+    """
+    Restore a script using the phased plan described at the top of this module.
+    `connect(database)` must return a new, unpooled connection (database may be None).
+    on_phase(name, seconds) is called as each phase completes.
+    Returns (success, report): report has 'timings' (phase -> seconds), 'statements',
+    'rows_statements' (INSERTs loaded in parallel) and, on failure, 'phase' and 'error'.
+    """
+    report = {"timings": {p: 0.0 for p in PHASES}, "statements": 0, "rows_statements": 0}
+    deferred = {"constraints": [], "routines": [], "views": [], "post": []}
+    started = time.perf_counter()
+
+    def fail(phase, error, sql=None):
+        report.update(phase=phase, error=str(error), sql=(sql or "")[:500])
+        report["seconds"] = time.perf_counter() - started
+        return False, report
+
+    def finished(phase, t0, notify=True):
+        report["timings"][phase] += time.perf_counter() - t0
+        if notify and on_phase:
+            on_phase(phase, report["timings"][phase])
+
+    server = connect(None)
+    cursor = server.cursor(buffered=True)
+    database = None
+    loader = None
+    in_post = False    # once routines or other statements appear, keep the script's order
+    data_started = None
+    try:
+        # ---- schema + data (streamed) ----
+        for sql, _ in sql_script.StatementReader(stream):
+            report["statements"] += 1
+            if _ROUTINE_RE.match(sql):
+                deferred["routines"].append(sql)
+                in_post = True
+            elif _VIEW_RE.match(sql):
+                deferred["views"].append(sql)
+                in_post = True
+            elif in_post:
+                deferred["post"].append(sql)
+            elif _SETUP_RE.match(sql) or _TABLE_RE.match(sql):
+                t0 = time.perf_counter()
+                create_sql, _, constraints = strip_table_constraints(sql)
+                try:
+                    _run(cursor, create_sql)
+                except storage.Error as e:
+                    return fail("schema", e, create_sql)
+                deferred["constraints"].extend(constraints)
+                use = _USE_RE.match(sql)
+                if use:
+                    database = use.group(1)
+                finished("schema", t0, notify=False)
+            elif sql_script.split_insert(sql):
+                if loader is None:
+                    data_started = time.perf_counter()
+                    loader = _DataLoader(connect, database, workers)
+                loader.add(sql_script.split_insert(sql))
+            else:
+                deferred["post"].append(sql)
+                in_post = True
+
+        if on_phase:
+            on_phase("schema", report["timings"]["schema"])
+        if loader is not None:
+            loaded, error = loader.finish()
+            loader = None
+            report["rows_statements"] = loaded
+            finished("data", data_started)
+            if error:
+                return fail("data", *error)
+
+        # ---- deferred phases, in order ----
+        for phase in ["constraints", "routines", "views", "post"]:
+            t0 = time.perf_counter()
+            for sql in deferred[phase]:
+                try:
+                    _run(cursor, sql)
+                    server.commit()
+                except storage.Error as e:
+                    server.rollback()
+                    return fail(phase, e, sql)
+            finished(phase, t0)
+    finally:
+        if loader is not None:
+            loader.finish()
+        cursor.close()
+        server.close()
+
+    report["seconds"] = time.perf_counter() - started
+    return True, report
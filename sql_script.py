@@ -0,0 +1,295 @@
+# sql_script.py
+"""
+Streaming executor for MySQL scripts such as marine_species_project.sql.
+
+The file is read incrementally and split into statements by a tokenizer that knows about
+quoted strings and identifiers, -- / # / block comments and the mysql client's DELIMITER
+command, so a delimiter inside a literal or comment never ends a statement.
+Runs of plain INSERTs into the same table are merged into one multi-row INSERT per batch.
+Execution can resume from a statement number after a failure.
+"""
+import codecs
+import re
+import time
+
+import storage
+
+READ_SIZE = 1 << 20                 # bytes read from the file at a time
+INSERT_BATCH_BYTES = 1 << 20        # keep merged INSERTs well under max_allowed_packet
+INSERT_BATCH_STATEMENTS = 500
+
+# Statements that change session state; they are replayed even when skipped on resume
+_SESSION_RE = re.compile(r"^\s*(USE|SET)\b", re.IGNORECASE)
+_INSERT_RE = re.compile(r"^\s*INSERT\s+INTO\s+([`\w.]+)\s*(\([^)]*\))?\s*VALUES\b", re.IGNORECASE)
+_NOT_MERGEABLE_RE = re.compile(r"\b(ON\s+DUPLICATE|SELECT)\b", re.IGNORECASE)
+
+
+# ---------- TOKENIZER ----------
+_TOKEN_PATTERNS = {}
+
+def _token_pattern(delimiter):
+    """Regex matching the next quote, comment opener or `delimiter`."""
+    if delimiter not in _TOKEN_PATTERNS:
+        _TOKEN_PATTERNS[delimiter] = re.compile("['\"`]|--|#|/\\*|" + re.escape(delimiter))
+    return _TOKEN_PATTERNS[delimiter]
+
+
+class StatementReader:
+    """
+    Iterate over the statements of a binary stream as (sql, bytes_read) pairs.
+    Only the unconsumed tail of the current statement is kept in memory.
+    """
+    def __init__(self, stream, read_size=READ_SIZE, encoding="utf-8"):
+        self.stream = stream
+        self.read_size = read_size
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self.buf = ""
+        self.pos = 0          # scan position in buf
+        self.mark = 0         # start of the text still needed (current statement)
+        self.eof = False
+        self.bytes_read = 0
+        self.delimiter = ";"
+
+    def _fill(self):
+        """Append the next block of the file, dropping text before `mark`. Returns False at EOF."""
+        if self.eof:
+            return False
+        raw = self.stream.read(self.read_size)
+        self.bytes_read += len(raw)
+        if not raw:
+            self.eof = True
+            text = self.decoder.decode(b"", final=True)
+        else:
+            text = self.decoder.decode(raw)
+        self.buf = self.buf[self.mark:] + text
+        self.pos -= self.mark
+        self.mark = 0
+        return bool(raw) or bool(text)
+
+    def _skip_past(self, token):
+        """Move pos just past the next `token` (or to the end of input)."""
+        while True:
+            idx = self.buf.find(token, self.pos)
+            if idx >= 0:
+                self.pos = idx + len(token)
+                return
+            self.pos = max(self.pos, len(self.buf) - len(token) + 1)
+            if not self._fill():
+                self.pos = len(self.buf)
+                return
+
+    def _skip_quoted(self, quote):
+        """pos is just after an opening quote; move it past the matching close."""
+        pattern = re.compile("`" if quote == "`" else "[\\\\" + quote + "]")
+        while True:
+            m = pattern.search(self.buf, self.pos)
+            if m is None:
+                self.pos = len(self.buf)
+                if not self._fill():
+                    return
+                continue
+            if m.group() == "\\":
+                if m.end() >= len(self.buf) and not self.eof:
+                    # the escaped character is in the next block
+                    self.pos = m.start()
+                    self._fill()
+                    continue
+                self.pos = m.end() + 1
+                continue
+            self.pos = m.end()
+            return
+
+    def _ensure(self, n):
+        """Make sure at least n characters after pos are buffered, unless the file ends first."""
+        while len(self.buf) - self.pos < n and self._fill():
+            pass
+        return len(self.buf) - self.pos
+
+    def _skip_preamble(self):
+        """Skip whitespace, comments and DELIMITER commands before a statement. Returns False at EOF."""
+        while True:
+            self.mark = self.pos
+            if self._ensure(16) == 0:
+                return False
+            ch = self.buf[self.pos]
+            if ch.isspace():
+                self.pos += 1
+                continue
+            rest = self.buf[self.pos:self.pos + 16]
+            if rest.startswith("--") and (len(rest) == 2 or rest[2].isspace()) or ch == "#":
+                self._skip_past("\n")
+                continue
+            if rest.startswith("/*") and not rest.startswith("/*!"):
+                self.pos += 2
+                self._skip_past("*/")
+                continue
+            if rest[:9].upper() == "DELIMITER" and len(rest) > 9 and rest[9] in " \t":
+                self._skip_past("\n")
+                parts = self.buf[self.mark:self.pos].split()
+                self.delimiter = parts[1] if len(parts) > 1 else ";"
+                continue
+            return True
+
+    def _scan_to_delimiter(self):
+        """Scan from pos to the next top-level delimiter. Returns its index, or None at EOF."""
+        delim = self.delimiter
+        pattern = _token_pattern(delim)
+        while True:
+            m = pattern.search(self.buf, self.pos)
+            if m is None or (m.end() >= len(self.buf) and not self.eof):
+                # nothing found, or a token that may continue in the next block
+                self.pos = m.start() if m else max(self.pos, len(self.buf) - len(delim) - 1)
+                if not self._fill():
+                    if m is None:
+                        return None
+                    self.eof = True
+                continue
+            tok = m.group()
+            if tok == delim:
+                return m.start()
+            self.pos = m.end()
+            if tok in ("'", '"', "`"):
+                self._skip_quoted(tok)
+            elif tok == "--":
+                if self.pos >= len(self.buf) or self.buf[self.pos].isspace():
+                    self._skip_past("\n")
+                else:
+                    self.pos = m.start() + 1     # two minus signs, not a comment
+            elif tok == "#":
+                self._skip_past("\n")
+            elif tok == "/*":
+                self._skip_past("*/")
+
+    def __iter__(self):
+        while self._skip_preamble():
+            end = self._scan_to_delimiter()
+            if end is None:
+                tail = self.buf[self.mark:].strip()
+                if tail:
+                    yield tail, self.bytes_read
+                return
+            sql = self.buf[self.mark:end].strip()
+            self.pos = end + len(self.delimiter)
+            self.mark = self.pos
+            if sql:
+                yield sql, self.bytes_read
+
+
+# ---------- BATCHING ----------
+def split_insert(sql):
+    """Split a plain `INSERT INTO t (cols) VALUES ...` into (merge key, prefix, values), or None."""
+    m = _INSERT_RE.match(sql)
+    if not m:
+        return None
+    values = sql[m.end():].strip()
+    if _NOT_MERGEABLE_RE.search(values):
+        return None
+    key = (m.group(1).strip("`").lower(), re.sub(r"\s+", "", m.group(2) or "").lower())
+    return key, sql[:m.end()], values
+
+
+def _batches(statements):
+    """
+    Group consecutive mergeable INSERTs into one statement.
+    Yields (sql, first_index, count, originals) with 0-based statement indexes.
+    """
+    pending = []     # (index, sql, parts)
+    pending_bytes = 0
+
+    def flush():
+        first = pending[0]
+        if len(pending) == 1:
+            return first[1], first[0], 1, [first[1]]
+        prefix = first[2][1]
+        merged = prefix + "\n" + ",\n".join(p[2][2] for p in pending)
+        return merged, first[0], len(pending), [p[1] for p in pending]
+
+    for index, sql in statements:
+        parts = split_insert(sql)
+        if pending and (parts is None or parts[0] != pending[0][2][0]
+                        or len(pending) >= INSERT_BATCH_STATEMENTS
+                        or pending_bytes + len(sql) > INSERT_BATCH_BYTES):
+            yield flush()
+            pending, pending_bytes = [], 0
+        if parts is None:
+            yield sql, index, 1, [sql]
+        else:
+            pending.append((index, sql, parts))
+            pending_bytes += len(sql)
+    if pending:
+        yield flush()
+
+
+# ---------- EXECUTOR ----------
+def _run(cursor, sql):
+    cursor.execute(sql)
+    if cursor.with_rows:
+        cursor.fetchall()
+
+
+def execute_script(conn, stream, total_bytes=None, start_statement=0, on_progress=None, progress_interval=1.0):
+    """
+    Execute every statement of a binary stream on `conn`.
+    Statements before `start_statement` (0-based) are skipped, except USE/SET, which are replayed
+    so the session is in the right state. on_progress(info) is called at most every
+    `progress_interval` seconds and once at the end.
+    Returns (success, info): info has statements, executed, bytes_read, seconds, bytes_per_sec,
+    statements_per_sec and, on failure, failed_statement (the index to resume from) and error.
+    """
+    reader = StatementReader(stream)
+    cursor = conn.cursor(buffered=True)
+    started = time.perf_counter()
+    last_report = started
+    info = {"statements": 0, "executed": 0, "bytes_read": 0, "total_bytes": total_bytes}
+
+    def snapshot():
+        elapsed = time.perf_counter() - started
+        info["bytes_read"] = reader.bytes_read
+        info["seconds"] = elapsed
+        info["bytes_per_sec"] = reader.bytes_read / elapsed if elapsed else 0.0
+        info["statements_per_sec"] = info["executed"] / elapsed if elapsed else 0.0
+        return info
+
+    def to_run():
+        for index, (sql, _) in enumerate(reader):
+            info["statements"] = index + 1
+            if index >= start_statement:
+                yield index, sql
+            elif _SESSION_RE.match(sql):
+                _run(cursor, sql)
+
+    try:
+        for sql, first, count, originals in _batches(to_run()):
+            try:
+                _run(cursor, sql)
+                conn.commit()
+                info["executed"] += count
+            except storage.Error as batch_error:
+                conn.rollback()
+                if count == 1:
+                    info.update(failed_statement=first, error=batch_error, sql=sql)
+                    return False, snapshot()
+                # replay the batch one statement at a time to find the bad one
+                for offset, original in enumerate(originals):
+                    try:
+                        _run(cursor, original)
+                        conn.commit()
+                        info["executed"] += 1
+                    except storage.Error as e:
+                        conn.rollback()
+                        info.update(failed_statement=first + offset, error=e, sql=original)
+                        return False, snapshot()
+            now = time.perf_counter()
+            if on_progress and now - last_report >= progress_interval:
+                last_report = now
+                on_progress(snapshot())
+    except storage.Error as e:
+        # a replayed USE/SET failed while skipping
+        info.update(failed_statement=start_statement, error=e, sql=None)
+        return False, snapshot()
+    finally:
+        cursor.close()
+
+    if on_progress:
+        on_progress(snapshot())
+    return True, snapshot()
@@ -0,0 +1,593 @@
+-- ==========================================================
+--  MARINE SPECIES MONITORING & CONSERVATION DATABASE
+--  SQLite translation of marine_species_project.sql + migrations/0001-0006
+-- ==========================================================
+-- Used by the embedded backend (MARINE_DB_BACKEND=sqlite, see storage.py), which runs this file
+-- once against an empty database file. Differences from the MySQL schema:
+--   * ENUM columns are TEXT with a CHECK, AUTO_INCREMENT is INTEGER PRIMARY KEY AUTOINCREMENT
+--   * Observation and Water_Quality keep real foreign keys (nothing is partitioned)
+--   * SQLite has no stored procedures, so every trigger spells its maintenance out inline;
+--     RefreshDashboardSummary, RebuildObservationRollups and RebuildWaterQualityStats are run
+--     by the connection's callproc() (storage.PROCEDURES), and AvgPollution / AvgPollutionSince
+--     are registered as SQL functions on every connection
+--   * timestamps default to local time, like MySQL's CURRENT_TIMESTAMP
+
+-- -------------------------------
+-- TABLES
+-- -------------------------------
+
+CREATE TABLE Species (
+    species_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    common_name VARCHAR(100) NOT NULL,
+    scientific_name VARCHAR(150),
+    conservation_status VARCHAR(50)
+);
+
+CREATE TABLE Location (
+    location_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    location_name VARCHAR(100) NOT NULL,
+    region VARCHAR(100),
+    water_type TEXT CHECK (water_type IN ('Ocean', 'Sea', 'Lake', 'River'))
+);
+
+CREATE TABLE Observer (
+    observer_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(100),
+    organization VARCHAR(100),
+    contact VARCHAR(50)
+);
+
+CREATE TABLE Water_Quality (
+    quality_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    location_id INT REFERENCES Location(location_id),
+    temperature DECIMAL(5,2),
+    pH DECIMAL(4,2),
+    salinity DECIMAL(6,2),
+    pollution_index DECIMAL(5,2),
+    measured_at DATETIME NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+
+CREATE TABLE Observation (
+    obs_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    species_id INT REFERENCES Species(species_id),
+    location_id INT REFERENCES Location(location_id),
+    observer_id INT REFERENCES Observer(observer_id),
+    quality_id INT REFERENCES Water_Quality(quality_id),
+    obs_date DATETIME NOT NULL,
+    count_observed INT,
+    remarks VARCHAR(255)
+);
+
+CREATE TABLE Conservation_Action (
+    action_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    species_id INT REFERENCES Species(species_id),
+    action_type VARCHAR(100),
+    description VARCHAR(255),
+    start_date DATE,
+    end_date DATE
+);
+
+CREATE TABLE Species_Threat (
+    threat_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    species_id INT REFERENCES Species(species_id),
+    threat_type VARCHAR(100),
+    severity TEXT CHECK (severity IN ('Low', 'Moderate', 'High'))
+);
+
+CREATE TABLE Equipment (
+    equipment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(100),
+    type VARCHAR(100),
+    availability TEXT CHECK (availability IN ('Available', 'In Maintenance'))
+);
+
+CREATE TABLE Action_Equipment (
+    action_id INT REFERENCES Conservation_Action(action_id),
+    equipment_id INT REFERENCES Equipment(equipment_id),
+    PRIMARY KEY (action_id, equipment_id)
+);
+
+CREATE TABLE Users (
+    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username VARCHAR(50) UNIQUE NOT NULL,
+    password VARCHAR(50) NOT NULL,
+    role TEXT DEFAULT 'Viewer' CHECK (role IN ('Admin', 'Researcher', 'Viewer'))
+);
+
+CREATE TABLE Action_Log (
+    log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    action_id INT,
+    action_type VARCHAR(100),
+    log_time TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+
+-- metric = 'total' / 'status' / 'meta', as in MySQL (pollution comes from Water_Quality_Stats)
+CREATE TABLE Dashboard_Summary (
+    metric VARCHAR(20) NOT NULL,
+    dimension VARCHAR(100) NOT NULL,
+    value_count BIGINT NOT NULL DEFAULT 0,
+    value_sum DECIMAL(18,2) NOT NULL DEFAULT 0,
+    refreshed_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    PRIMARY KEY (metric, dimension)
+);
+
+-- 0002: see migrations/0002_observation_rollups.sql
+CREATE TABLE Observation_Rollup (
+    grain TEXT NOT NULL CHECK (grain IN ('day', 'week', 'month')),
+    bucket_start DATE NOT NULL,
+    species_id INT NOT NULL,
+    location_id INT NOT NULL,
+    sightings INT NOT NULL DEFAULT 0,
+    total_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (grain, species_id, bucket_start, location_id)
+);
+
+-- 0004: see migrations/0004_observation_change_log.sql (AUTOINCREMENT: change_ids are never reused)
+CREATE TABLE Observation_Change (
+    change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    obs_id INT NOT NULL,
+    op TEXT NOT NULL CHECK (op IN ('upsert', 'delete', 'reset')),
+    changed_at TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+
+-- 0005: see migrations/0005_water_quality_stats.sql
+CREATE TABLE Water_Quality_Stats (
+    grain TEXT NOT NULL CHECK (grain IN ('all', 'day')),
+    location_id INT NOT NULL,
+    bucket_start DATE NOT NULL,
+    readings INT NOT NULL DEFAULT 0,
+    temperature_n INT NOT NULL DEFAULT 0,
+    temperature_sum DECIMAL(20,2) NOT NULL DEFAULT 0,
+    temperature_sumsq DECIMAL(30,4) NOT NULL DEFAULT 0,
+    temperature_min DECIMAL(6,2),
+    temperature_max DECIMAL(6,2),
+    ph_n INT NOT NULL DEFAULT 0,
+    ph_sum DECIMAL(20,2) NOT NULL DEFAULT 0,
+    ph_sumsq DECIMAL(30,4) NOT NULL DEFAULT 0,
+    ph_min DECIMAL(6,2),
+    ph_max DECIMAL(6,2),
+    salinity_n INT NOT NULL DEFAULT 0,
+    salinity_sum DECIMAL(20,2) NOT NULL DEFAULT 0,
+    salinity_sumsq DECIMAL(30,4) NOT NULL DEFAULT 0,
+    salinity_min DECIMAL(6,2),
+    salinity_max DECIMAL(6,2),
+    pollution_n INT NOT NULL DEFAULT 0,
+    pollution_sum DECIMAL(20,2) NOT NULL DEFAULT 0,
+    pollution_sumsq DECIMAL(30,4) NOT NULL DEFAULT 0,
+    pollution_min DECIMAL(6,2),
+    pollution_max DECIMAL(6,2),
+    PRIMARY KEY (grain, location_id, bucket_start)
+);
+
+-- 0006: see migrations/0006_ingest_checkpoint.sql
+CREATE TABLE Ingest_Checkpoint (
+    journal VARCHAR(255) PRIMARY KEY,
+    seq BIGINT NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+
+-- -------------------------------
+-- INDEXES (0001, 0002, 0003, 0004, 0005)
+-- -------------------------------
+CREATE INDEX idx_observation_date ON Observation (obs_date, obs_id);
+CREATE INDEX idx_observation_species_date ON Observation (species_id, obs_date);
+CREATE INDEX idx_observation_location_date ON Observation (location_id, obs_date);
+CREATE INDEX idx_observation_quality ON Observation (quality_id);
+CREATE INDEX idx_observation_observer ON Observation (observer_id);
+CREATE INDEX idx_action_start_date ON Conservation_Action (start_date);
+CREATE INDEX idx_location_name ON Location (location_name);
+CREATE INDEX idx_water_quality_location_time ON Water_Quality (location_id, measured_at);
+CREATE INDEX idx_rollup_location ON Observation_Rollup (grain, location_id, bucket_start);
+CREATE INDEX idx_rollup_bucket ON Observation_Rollup (grain, bucket_start);
+CREATE INDEX idx_observation_change_time ON Observation_Change (changed_at);
+CREATE INDEX idx_water_quality_stats_bucket ON Water_Quality_Stats (grain, bucket_start);
+
+-- -------------------------------
+-- SAMPLE DATA
+-- -------------------------------
+
+-- Species
+INSERT INTO Species (common_name, scientific_name, conservation_status) VALUES
+('Blue Whale', 'Balaenoptera musculus', 'Endangered'),
+('Clownfish', 'Amphiprioninae', 'Least Concern'),
+('Great White Shark', 'Carcharodon carcharias', 'Vulnerable'),
+('Green Turtle', 'Chelonia mydas', 'Endangered'),
+('Dolphin', 'Delphinidae', 'Least Concern');
+
+-- Location
+INSERT INTO Location (location_name, region, water_type) VALUES
+('Great Barrier Reef', 'Australia', 'Ocean'),
+('Monterey Bay', 'USA', 'Sea'),
+('Bali Coast', 'Indonesia', 'Ocean'),
+('Andaman Sea', 'India', 'Sea'),
+('Lake Victoria', 'Africa', 'Lake');
+
+-- Observer
+INSERT INTO Observer (name, organization, contact) VALUES
+('Dr. Emily Clark', 'MarineLife Org', 'emily@marine.org'),
+('John Doe', 'OceanWatch', 'john@oceanwatch.com'),
+('Sophia Lee', 'AquaSave', 'sophia@aquasave.org'),
+('Arun Kumar', 'BluePlanet', 'arun@blueplanet.org'),
+('Isabella Gomez', 'WildSea', 'isabella@wildsea.com');
+
+-- Water Quality (measured_at as migration 0003 backfills it: the first observation that used the reading)
+INSERT INTO Water_Quality (location_id, temperature, pH, salinity, pollution_index, measured_at) VALUES
+(1, 27.5, 8.1, 35.2, 12.4, '2025-05-10 09:00:00'),
+(2, 18.2, 7.8, 33.5, 24.0, '2025-04-09 15:10:00'),
+(3, 25.8, 8.3, 36.1, 10.2, '2025-06-14 10:30:00'),
+(4, 29.4, 7.5, 34.8, 28.9, '2025-07-22 08:45:00'),
+(5, 22.0, 7.6, 0.5, 18.3, '2025-08-11 17:00:00');
+
+-- Observation
+INSERT INTO Observation (species_id, location_id, observer_id, quality_id, obs_date, count_observed, remarks) VALUES
+(1, 1, 1, 1, '2025-05-10 09:00:00', 4, 'Observed near coral zone'),
+(2, 3, 2, 3, '2025-06-14 10:30:00', 25, 'Small group'),
+(3, 2, 3, 2, '2025-04-09 15:10:00', 2, 'One large adult seen'),
+(4, 4, 4, 4, '2025-07-22 08:45:00', 7, 'Near shallow area'),
+(5, 5, 5, 5, '2025-08-11 17:00:00', 12, 'Playing in pods');
+
+-- Conservation Action
+INSERT INTO Conservation_Action (species_id, action_type, description, start_date, end_date) VALUES
+(1, 'Habitat Protection', 'Establish marine sanctuary', '2025-03-01', '2026-03-01'),
+(3, 'Anti-Poaching Patrol', 'Deploy drones for shark protection', '2025-04-15', '2025-12-15'),
+(4, 'Beach Clean-up', 'Volunteer turtle-safe zones', '2025-01-10', '2025-09-10'),
+(5, 'Awareness Campaign', 'Promote dolphin conservation', '2025-02-05', '2025-11-05'),
+(2, 'Coral Health Monitoring', 'Protect clownfish habitat', '2025-05-01', '2026-05-01');
+
+-- Species Threat
+INSERT INTO Species_Threat (species_id, threat_type, severity) VALUES
+(1, 'Ship Strikes', 'High'),
+(2, 'Coral Bleaching', 'Moderate'),
+(3, 'Overfishing', 'High'),
+(4, 'Plastic Pollution', 'High'),
+(5, 'Noise Pollution', 'Moderate');
+
+-- Equipment
+INSERT INTO Equipment (name, type, availability) VALUES
+('Underwater Drone', 'Monitoring', 'Available'),
+('Boat', 'Patrol', 'Available'),
+('Water Sampler', 'Research', 'In Maintenance'),
+('Camera Trap', 'Monitoring', 'Available'),
+('GPS Tracker', 'Tracking', 'Available');
+
+-- Action Equipment Mapping
+INSERT INTO Action_Equipment VALUES
+(1,1), (1,5), (2,2), (3,3), (4,4);
+
+-- Users
+INSERT INTO Users (username, password, role) VALUES
+('admin', 'admin123', 'Admin'),
+('researcher', 'res123', 'Researcher'),
+('guest', 'guest123', 'Viewer');
+
+-- -------------------------------
+-- TRIGGERS
+-- -------------------------------
+-- Created after the sample data, as in MySQL; the summaries are then built by the
+-- Refresh/Rebuild procedures (SQLiteBackend.initialize runs them).
+
+CREATE TRIGGER After_Action_Insert AFTER INSERT ON Conservation_Action
+FOR EACH ROW
+BEGIN
+    INSERT INTO Action_Log (action_id, action_type) VALUES (NEW.action_id, NEW.action_type);
+END;
+
+-- ---------- Dashboard_Summary ----------
+CREATE TRIGGER Species_Summary_Insert AFTER INSERT ON Species
+FOR EACH ROW
+BEGIN
+    INSERT INTO Dashboard_Summary (metric, dimension, value_count)
+    VALUES ('total', 'Species', 1), ('status', COALESCE(NEW.conservation_status, 'Unknown'), 1)
+    ON CONFLICT (metric, dimension) DO UPDATE SET value_count = value_count + excluded.value_count;
+END;
+
+CREATE TRIGGER Species_Summary_Update AFTER UPDATE ON Species
+FOR EACH ROW WHEN OLD.conservation_status IS NOT NEW.conservation_status
+BEGIN
+    INSERT INTO Dashboard_Summary (metric, dimension, value_count)
+    VALUES ('status', COALESCE(OLD.conservation_status, 'Unknown'), -1), ('status', COALESCE(NEW.conservation_status, 'Unknown'), 1)
+    ON CONFLICT (metric, dimension) DO UPDATE SET value_count = value_count + excluded.value_count;
+END;
+
+CREATE TRIGGER Species_Summary_Delete AFTER DELETE ON Species
+FOR EACH ROW
+BEGIN
+    INSERT INTO Dashboard_Summary (metric, dimension, value_count)
+    VALUES ('total', 'Species', -1), ('status', COALESCE(OLD.conservation_status, 'Unknown'), -1)
+    ON CONFLICT (metric, dimension) DO UPDATE SET value_count = value_count + excluded.value_count;
+END;
+
+CREATE TRIGGER Location_Summary_Insert AFTER INSERT ON Location
+FOR EACH ROW
+BEGIN
+    INSERT INTO Dashboard_Summary (metric, dimension, value_count) VALUES ('total', 'Location', 1)
+    ON CONFLICT (metric, dimension) DO UPDATE SET value_count = value_count + excluded.value_count;
+END;
+
+CREATE TRIGGER Location_Summary_Delete AFTER DELETE ON Location
+FOR EACH ROW
+BEGIN
+    INSERT INTO Dashboard_Summary (metric, dimension, value_count) VALUES ('total', 'Location', -1)
+    ON CONFLICT (metric, dimension) DO UPDATE SET value_count = value_count + excluded.value_count;
+END;
+
+CREATE TRIGGER Observation_Summary_Insert AFTER INSERT ON Observation
+FOR EACH ROW
+BEGIN
+    INSERT INTO Dashboard_Summary (metric, dimension, value_count) VALUES ('total', 'Observation', 1)
+    ON CONFLICT (metric, dimension) DO UPDATE SET value_count = value_count + excluded.value_count;
+END;
+
+CREATE TRIGGER Observation_Summary_Delete AFTER DELETE ON Observation
+FOR EACH ROW
+BEGIN
+    INSERT INTO Dashboard_Summary (metric, dimension, value_count) VALUES ('total', 'Observation', -1)
+    ON CONFLICT (metric, dimension) DO UPDATE SET value_count = value_count + excluded.value_count;
+END;
+
+CREATE TRIGGER Action_Summary_Insert AFTER INSERT ON Conservation_Action
+FOR EACH ROW
+BEGIN
+    INSERT INTO Dashboard_Summary (metric, dimension, value_count) VALUES ('total', 'Conservation_Action', 1)
+    ON CONFLICT (metric, dimension) DO UPDATE SET value_count = value_count + excluded.value_count;
+END;
+
+CREATE TRIGGER Action_Summary_Delete AFTER DELETE ON Conservation_Action
+FOR EACH ROW
+BEGIN
+    INSERT INTO Dashboard_Summary (metric, dimension, value_count) VALUES ('total', 'Conservation_Action', -1)
+    ON CONFLICT (metric, dimension) DO UPDATE SET value_count = value_count + excluded.value_count;
+END;
+
+-- ---------- Observation_Rollup (weeks start on Monday: date(d, 'weekday 0', '-6 days')) ----------
+CREATE TRIGGER Observation_Rollup_Insert AFTER INSERT ON Observation
+FOR EACH ROW
+BEGIN
+    INSERT INTO Observation_Rollup (grain, bucket_start, species_id, location_id, sightings, total_count)
+    VALUES ('day', date(NEW.obs_date), COALESCE(NEW.species_id, 0), COALESCE(NEW.location_id, 0), 1, COALESCE(NEW.count_observed, 0)),
+           ('week', date(NEW.obs_date, 'weekday 0', '-6 days'), COALESCE(NEW.species_id, 0), COALESCE(NEW.location_id, 0), 1, COALESCE(NEW.count_observed, 0)),
+           ('month', date(NEW.obs_date, 'start of month'), COALESCE(NEW.species_id, 0), COALESCE(NEW.location_id, 0), 1, COALESCE(NEW.count_observed, 0))
+    ON CONFLICT (grain, species_id, bucket_start, location_id) DO UPDATE SET
+        sightings = sightings + excluded.sightings, total_count = total_count + excluded.total_count;
+END;
+
+CREATE TRIGGER Observation_Rollup_Update AFTER UPDATE ON Observation
+FOR EACH ROW WHEN NOT (OLD.species_id IS NEW.species_id AND OLD.location_id IS NEW.location_id
+                      AND OLD.obs_date IS NEW.obs_date AND OLD.count_observed IS NEW.count_observed)
+BEGIN
+    UPDATE Observation_Rollup
+    SET sightings = sightings - 1, total_count = total_count - COALESCE(OLD.count_observed, 0)
+    WHERE species_id = COALESCE(OLD.species_id, 0) AND location_id = COALESCE(OLD.location_id, 0)
+      AND ((grain = 'day' AND bucket_start = date(OLD.obs_date))
+        OR (grain = 'week' AND bucket_start = date(OLD.obs_date, 'weekday 0', '-6 days'))
+        OR (grain = 'month' AND bucket_start = date(OLD.obs_date, 'start of month')));
+    DELETE FROM Observation_Rollup
+    WHERE species_id = COALESCE(OLD.species_id, 0) AND location_id = COALESCE(OLD.location_id, 0) AND sightings <= 0;
+    INSERT INTO Observation_Rollup (grain, bucket_start, species_id, location_id, sightings, total_count)
+    VALUES ('day', date(NEW.obs_date), COALESCE(NEW.species_id, 0), COALESCE(NEW.location_id, 0), 1, COALESCE(NEW.count_observed, 0)),
+           ('week', date(NEW.obs_date, 'weekday 0', '-6 days'), COALESCE(NEW.species_id, 0), COALESCE(NEW.location_id, 0), 1, COALESCE(NEW.count_observed, 0)),
+           ('month', date(NEW.obs_date, 'start of month'), COALESCE(NEW.species_id, 0), COALESCE(NEW.location_id, 0), 1, COALESCE(NEW.count_observed, 0))
+    ON CONFLICT (grain, species_id, bucket_start, location_id) DO UPDATE SET
+        sightings = sightings + excluded.sightings, total_count = total_count + excluded.total_count;
+END;
+
+CREATE TRIGGER Observation_Rollup_Delete AFTER DELETE ON Observation
+FOR EACH ROW
+BEGIN
+    UPDATE Observation_Rollup
+    SET sightings = sightings - 1, total_count = total_count - COALESCE(OLD.count_observed, 0)
+    WHERE species_id = COALESCE(OLD.species_id, 0) AND location_id = COALESCE(OLD.location_id, 0)
+      AND ((grain = 'day' AND bucket_start = date(OLD.obs_date))
+        OR (grain = 'week' AND bucket_start = date(OLD.obs_date, 'weekday 0', '-6 days'))
+        OR (grain = 'month' AND bucket_start = date(OLD.obs_date, 'start of month')));
+    DELETE FROM Observation_Rollup
+    WHERE species_id = COALESCE(OLD.species_id, 0) AND location_id = COALESCE(OLD.location_id, 0) AND sightings <= 0;
+END;
+
+-- ---------- Observation_Change ----------
+CREATE TRIGGER Observation_Change_Insert AFTER INSERT ON Observation
+FOR EACH ROW
+BEGIN
+    INSERT INTO Observation_Change (obs_id, op) VALUES (NEW.obs_id, 'upsert');
+END;
+
+CREATE TRIGGER Observation_Change_Update AFTER UPDATE ON Observation
+FOR EACH ROW
+BEGIN
+    INSERT INTO Observation_Change (obs_id, op) SELECT OLD.obs_id, 'delete' WHERE OLD.obs_id <> NEW.obs_id;
+    INSERT INTO Observation_Change (obs_id, op) VALUES (NEW.obs_id, 'upsert');
+END;
+
+CREATE TRIGGER Observation_Change_Delete AFTER DELETE ON Observation
+FOR EACH ROW
+BEGIN
+    INSERT INTO Observation_Change (obs_id, op) VALUES (OLD.obs_id, 'delete');
+END;
+
+-- ---------- Water_Quality_Stats ----------
+CREATE TRIGGER Water_Quality_Stats_Insert AFTER INSERT ON Water_Quality
+FOR EACH ROW WHEN NEW.location_id IS NOT NULL
+BEGIN
+    INSERT INTO Water_Quality_Stats (grain, location_id, bucket_start, readings,
+            temperature_n, temperature_sum, temperature_sumsq, temperature_min, temperature_max,
+            ph_n, ph_sum, ph_sumsq, ph_min, ph_max,
+            salinity_n, salinity_sum, salinity_sumsq, salinity_min, salinity_max,
+            pollution_n, pollution_sum, pollution_sumsq, pollution_min, pollution_max)
+    VALUES ('all', NEW.location_id, '1970-01-01', 1,
+            NEW.temperature IS NOT NULL, COALESCE(NEW.temperature, 0), COALESCE(NEW.temperature * NEW.temperature, 0), NEW.temperature, NEW.temperature,
+            NEW.pH IS NOT NULL, COALESCE(NEW.pH, 0), COALESCE(NEW.pH * NEW.pH, 0), NEW.pH, NEW.pH,
+            NEW.salinity IS NOT NULL, COALESCE(NEW.salinity, 0), COALESCE(NEW.salinity * NEW.salinity, 0), NEW.salinity, NEW.salinity,
+            NEW.pollution_index IS NOT NULL, COALESCE(NEW.pollution_index, 0), COALESCE(NEW.pollution_index * NEW.pollution_index, 0), NEW.pollution_index, NEW.pollution_index)
+    ON CONFLICT (grain, location_id, bucket_start) DO UPDATE SET
+        readings = readings + 1,
+        temperature_n = temperature_n + excluded.temperature_n, temperature_sum = temperature_sum + excluded.temperature_sum, temperature_sumsq = temperature_sumsq + excluded.temperature_sumsq,
+        temperature_min = COALESCE(MIN(temperature_min, excluded.temperature_min), temperature_min, excluded.temperature_min), temperature_max = COALESCE(MAX(temperature_max, excluded.temperature_max), temperature_max, excluded.temperature_max),
+        ph_n = ph_n + excluded.ph_n, ph_sum = ph_sum + excluded.ph_sum, ph_sumsq = ph_sumsq + excluded.ph_sumsq,
+        ph_min = COALESCE(MIN(ph_min, excluded.ph_min), ph_min, excluded.ph_min), ph_max = COALESCE(MAX(ph_max, excluded.ph_max), ph_max, excluded.ph_max),
+        salinity_n = salinity_n + excluded.salinity_n, salinity_sum = salinity_sum + excluded.salinity_sum, salinity_sumsq = salinity_sumsq + excluded.salinity_sumsq,
+        salinity_min = COALESCE(MIN(salinity_min, excluded.salinity_min), salinity_min, excluded.salinity_min), salinity_max = COALESCE(MAX(salinity_max, excluded.salinity_max), salinity_max, excluded.salinity_max),
+        pollution_n = pollution_n + excluded.pollution_n, pollution_sum = pollution_sum + excluded.pollution_sum, pollution_sumsq = pollution_sumsq + excluded.pollution_sumsq,
+        pollution_min = COALESCE(MIN(pollution_min, excluded.pollution_min), pollution_min, excluded.pollution_min), pollution_max = COALESCE(MAX(pollution_max, excluded.pollution_max), pollution_max, excluded.pollution_max);
+    INSERT INTO Water_Quality_Stats (grain, location_id, bucket_start, readings,
+            temperature_n, temperature_sum, temperature_sumsq, temperature_min, temperature_max,
+            ph_n, ph_sum, ph_sumsq, ph_min, ph_max,
+            salinity_n, salinity_sum, salinity_sumsq, salinity_min, salinity_max,
+            pollution_n, pollution_sum, pollution_sumsq, pollution_min, pollution_max)
+    VALUES ('day', NEW.location_id, date(NEW.measured_at), 1,
+            NEW.temperature IS NOT NULL, COALESCE(NEW.temperature, 0), COALESCE(NEW.temperature * NEW.temperature, 0), NEW.temperature, NEW.temperature,
+            NEW.pH IS NOT NULL, COALESCE(NEW.pH, 0), COALESCE(NEW.pH * NEW.pH, 0), NEW.pH, NEW.pH,
+            NEW.salinity IS NOT NULL, COALESCE(NEW.salinity, 0), COALESCE(NEW.salinity * NEW.salinity, 0), NEW.salinity, NEW.salinity,
+            NEW.pollution_index IS NOT NULL, COALESCE(NEW.pollution_index, 0), COALESCE(NEW.pollution_index * NEW.pollution_index, 0), NEW.pollution_index, NEW.pollution_index)
+    ON CONFLICT (grain, location_id, bucket_start) DO UPDATE SET
+        readings = readings + 1,
+        temperature_n = temperature_n + excluded.temperature_n, temperature_sum = temperature_sum + excluded.temperature_sum, temperature_sumsq = temperature_sumsq + excluded.temperature_sumsq,
+        temperature_min = COALESCE(MIN(temperature_min, excluded.temperature_min), temperature_min, excluded.temperature_min), temperature_max = COALESCE(MAX(temperature_max, excluded.temperature_max), temperature_max, excluded.temperature_max),
+        ph_n = ph_n + excluded.ph_n, ph_sum = ph_sum + excluded.ph_sum, ph_sumsq = ph_sumsq + excluded.ph_sumsq,
+        ph_min = COALESCE(MIN(ph_min, excluded.ph_min), ph_min, excluded.ph_min), ph_max = COALESCE(MAX(ph_max, excluded.ph_max), ph_max, excluded.ph_max),
+        salinity_n = salinity_n + excluded.salinity_n, salinity_sum = salinity_sum + excluded.salinity_sum, salinity_sumsq = salinity_sumsq + excluded.salinity_sumsq,
+        salinity_min = COALESCE(MIN(salinity_min, excluded.salinity_min), salinity_min, excluded.salinity_min), salinity_max = COALESCE(MAX(salinity_max, excluded.salinity_max), salinity_max, excluded.salinity_max),
+        pollution_n = pollution_n + excluded.pollution_n, pollution_sum = pollution_sum + excluded.pollution_sum, pollution_sumsq = pollution_sumsq + excluded.pollution_sumsq,
+        pollution_min = COALESCE(MIN(pollution_min, excluded.pollution_min), pollution_min, excluded.pollution_min), pollution_max = COALESCE(MAX(pollution_max, excluded.pollution_max), pollution_max, excluded.pollution_max);
+END;
+
+-- both halves are guarded separately, so a reading moved to or from a NULL location is handled
+CREATE TRIGGER Water_Quality_Stats_Update_Old AFTER UPDATE ON Water_Quality
+FOR EACH ROW WHEN OLD.location_id IS NOT NULL
+BEGIN
+    UPDATE Water_Quality_Stats SET
+        readings = readings - 1,
+        temperature_n = temperature_n - (OLD.temperature IS NOT NULL), temperature_sum = temperature_sum - COALESCE(OLD.temperature, 0), temperature_sumsq = temperature_sumsq - COALESCE(OLD.temperature * OLD.temperature, 0),
+        ph_n = ph_n - (OLD.pH IS NOT NULL), ph_sum = ph_sum - COALESCE(OLD.pH, 0), ph_sumsq = ph_sumsq - COALESCE(OLD.pH * OLD.pH, 0),
+        salinity_n = salinity_n - (OLD.salinity IS NOT NULL), salinity_sum = salinity_sum - COALESCE(OLD.salinity, 0), salinity_sumsq = salinity_sumsq - COALESCE(OLD.salinity * OLD.salinity, 0),
+        pollution_n = pollution_n - (OLD.pollution_index IS NOT NULL), pollution_sum = pollution_sum - COALESCE(OLD.pollution_index, 0), pollution_sumsq = pollution_sumsq - COALESCE(OLD.pollution_index * OLD.pollution_index, 0)
+    WHERE grain = 'all' AND location_id = OLD.location_id AND bucket_start = '1970-01-01';
+    DELETE FROM Water_Quality_Stats WHERE grain = 'all' AND location_id = OLD.location_id AND bucket_start = '1970-01-01' AND readings <= 0;
+    UPDATE Water_Quality_Stats SET
+        temperature_min = (SELECT MIN(temperature) FROM Water_Quality WHERE location_id = OLD.location_id),
+        temperature_max = (SELECT MAX(temperature) FROM Water_Quality WHERE location_id = OLD.location_id),
+        ph_min = (SELECT MIN(pH) FROM Water_Quality WHERE location_id = OLD.location_id),
+        ph_max = (SELECT MAX(pH) FROM Water_Quality WHERE location_id = OLD.location_id),
+        salinity_min = (SELECT MIN(salinity) FROM Water_Quality WHERE location_id = OLD.location_id),
+        salinity_max = (SELECT MAX(salinity) FROM Water_Quality WHERE location_id = OLD.location_id),
+        pollution_min = (SELECT MIN(pollution_index) FROM Water_Quality WHERE location_id = OLD.location_id),
+        pollution_max = (SELECT MAX(pollution_index) FROM Water_Quality WHERE location_id = OLD.location_id)
+    WHERE grain = 'all' AND location_id = OLD.location_id AND bucket_start = '1970-01-01'
+      AND (temperature_min = OLD.temperature OR temperature_max = OLD.temperature OR ph_min = OLD.pH OR ph_max = OLD.pH OR salinity_min = OLD.salinity OR salinity_max = OLD.salinity OR pollution_min = OLD.pollution_index OR pollution_max = OLD.pollution_index);
+    UPDATE Water_Quality_Stats SET
+        readings = readings - 1,
+        temperature_n = temperature_n - (OLD.temperature IS NOT NULL), temperature_sum = temperature_sum - COALESCE(OLD.temperature, 0), temperature_sumsq = temperature_sumsq - COALESCE(OLD.temperature * OLD.temperature, 0),
+        ph_n = ph_n - (OLD.pH IS NOT NULL), ph_sum = ph_sum - COALESCE(OLD.pH, 0), ph_sumsq = ph_sumsq - COALESCE(OLD.pH * OLD.pH, 0),
+        salinity_n = salinity_n - (OLD.salinity IS NOT NULL), salinity_sum = salinity_sum - COALESCE(OLD.salinity, 0), salinity_sumsq = salinity_sumsq - COALESCE(OLD.salinity * OLD.salinity, 0),
+        pollution_n = pollution_n - (OLD.pollution_index IS NOT NULL), pollution_sum = pollution_sum - COALESCE(OLD.pollution_index, 0), pollution_sumsq = pollution_sumsq - COALESCE(OLD.pollution_index * OLD.pollution_index, 0)
+    WHERE grain = 'day' AND location_id = OLD.location_id AND bucket_start = date(OLD.measured_at);
+    DELETE FROM Water_Quality_Stats WHERE grain = 'day' AND location_id = OLD.location_id AND bucket_start = date(OLD.measured_at) AND readings <= 0;
+    UPDATE Water_Quality_Stats SET
+        temperature_min = (SELECT MIN(temperature) FROM Water_Quality WHERE location_id = OLD.location_id AND measured_at >= date(OLD.measured_at) AND measured_at < date(OLD.measured_at, '+1 day')),
+        temperature_max = (SELECT MAX(temperature) FROM Water_Quality WHERE location_id = OLD.location_id AND measured_at >= date(OLD.measured_at) AND measured_at < date(OLD.measured_at, '+1 day')),
+        ph_min = (SELECT MIN(pH) FROM Water_Quality WHERE location_id = OLD.location_id AND measured_at >= date(OLD.measured_at) AND measured_at < date(OLD.measured_at, '+1 day')),
+        ph_max = (SELECT MAX(pH) FROM Water_Quality WHERE location_id = OLD.location_id AND measured_at >= date(OLD.measured_at) AND measured_at < date(OLD.measured_at, '+1 day')),
+        salinity_min = (SELECT MIN(salinity) FROM Water_Quality WHERE location_id = OLD.location_id AND measured_at >= date(OLD.measured_at) AND measured_at < date(OLD.measured_at, '+1 day')),
+        salinity_max = (SELECT MAX(salinity) FROM Water_Quality WHERE location_id = OLD.location_id AND measured_at >= date(OLD.measured_at) AND measured_at < date(OLD.measured_at, '+1 day')),
+        pollution_min = (SELECT MIN(pollution_index) FROM Water_Quality WHERE location_id = OLD.location_id AND measured_at >= date(OLD.measured_at) AND measured_at < date(OLD.measured_at, '+1 day')),
+        pollution_max = (SELECT MAX(pollution_index) FROM Water_Quality WHERE location_id = OLD.location_id AND measured_at >= date(OLD.measured_at) AND measured_at < date(OLD.measured_at, '+1 day'))
+    WHERE grain = 'day' AND location_id = OLD.location_id AND bucket_start = date(OLD.measured_at)
+      AND (temperature_min = OLD.temperature OR temperature_max = OLD.temperature OR ph_min = OLD.pH OR ph_max = OLD.pH OR salinity_min = OLD.salinity OR salinity_max = OLD.salinity OR pollution_min = OLD.pollution_index OR pollution_max = OLD.pollution_index);
+END;
+
+CREATE TRIGGER Water_Quality_Stats_Update_New AFTER UPDATE ON Water_Quality
+FOR EACH ROW WHEN NEW.location_id IS NOT NULL
+BEGIN
+    INSERT INTO Water_Quality_Stats (grain, location_id, bucket_start, readings,
+            temperature_n, temperature_sum, temperature_sumsq, temperature_min, temperature_max,
+            ph_n, ph_sum, ph_sumsq, ph_min, ph_max,
+            salinity_n, salinity_sum, salinity_sumsq, salinity_min, salinity_max,
+            pollution_n, pollution_sum, pollution_sumsq, pollution_min, pollution_max)
+    VALUES ('all', NEW.location_id, '1970-01-01', 1,
+            NEW.temperature IS NOT NULL, COALESCE(NEW.temperature, 0), COALESCE(NEW.temperature * NEW.temperature, 0), NEW.temperature, NEW.temperature,
+            NEW.pH IS NOT NULL, COALESCE(NEW.pH, 0), COALESCE(NEW.pH * NEW.pH, 0), NEW.pH, NEW.pH,
+            NEW.salinity IS NOT NULL, COALESCE(NEW.salinity, 0), COALESCE(NEW.salinity * NEW.salinity, 0), NEW.salinity, NEW.salinity,
+            NEW.pollution_index IS NOT NULL, COALESCE(NEW.pollution_index, 0), COALESCE(NEW.pollution_index * NEW.pollution_index, 0), NEW.pollution_index, NEW.pollution_index)
+    ON CONFLICT (grain, location_id, bucket_start) DO UPDATE SET
+        readings = readings + 1,
+        temperature_n = temperature_n + excluded.temperature_n, temperature_sum = temperature_sum + excluded.temperature_sum, temperature_sumsq = temperature_sumsq + excluded.temperature_sumsq,
+        temperature_min = COALESCE(MIN(temperature_min, excluded.temperature_min), temperature_min, excluded.temperature_min), temperature_max = COALESCE(MAX(temperature_max, excluded.temperature_max), temperature_max, excluded.temperature_max),
+        ph_n = ph_n + excluded.ph_n, ph_sum = ph_sum + excluded.ph_sum, ph_sumsq = ph_sumsq + excluded.ph_sumsq,
+        ph_min = COALESCE(MIN(ph_min, excluded.ph_min), ph_min, excluded.ph_min), ph_max = COALESCE(MAX(ph_max, excluded.ph_max), ph_max, excluded.ph_max),
+        salinity_n = salinity_n + excluded.salinity_n, salinity_sum = salinity_sum + excluded.salinity_sum, salinity_sumsq = salinity_sumsq + excluded.salinity_sumsq,
+        salinity_min = COALESCE(MIN(salinity_min, excluded.salinity_min), salinity_min, excluded.salinity_min), salinity_max = COALESCE(MAX(salinity_max, excluded.salinity_max), salinity_max, excluded.salinity_max),
+        pollution_n = pollution_n + excluded.pollution_n, pollution_sum = pollution_sum + excluded.pollution_sum, pollution_sumsq = pollution_sumsq + excluded.pollution_sumsq,
+        pollution_min = COALESCE(MIN(pollution_min, excluded.pollution_min), pollution_min, excluded.pollution_min), pollution_max = COALESCE(MAX(pollution_max, excluded.pollution_max), pollution_max, excluded.pollution_max);
+    INSERT INTO Water_Quality_Stats (grain, location_id, bucket_start, readings,
+            temperature_n, temperature_sum, temperature_sumsq, temperature_min, temperature_max,
+            ph_n, ph_sum, ph_sumsq, ph_min, ph_max,
+            salinity_n, salinity_sum, salinity_sumsq, salinity_min, salinity_max,
+            pollution_n, pollution_sum, pollution_sumsq, pollution_min, pollution_max)
+    VALUES ('day', NEW.location_id, date(NEW.measured_at), 1,
+            NEW.temperature IS NOT NULL, COALESCE(NEW.temperature, 0), COALESCE(NEW.temperature * NEW.temperature, 0), NEW.temperature, NEW.temperature,
+            NEW.pH IS NOT NULL, COALESCE(NEW.pH, 0), COALESCE(NEW.pH * NEW.pH, 0), NEW.pH, NEW.pH,
+            NEW.salinity IS NOT NULL, COALESCE(NEW.salinity, 0), COALESCE(NEW.salinity * NEW.salinity, 0), NEW.salinity, NEW.salinity,
+            NEW.pollution_index IS NOT NULL, COALESCE(NEW.pollution_index, 0), COALESCE(NEW.pollution_index * NEW.pollution_index, 0), NEW.pollution_index, NEW.pollution_index)
+    ON CONFLICT (grain, location_id, bucket_start) DO UPDATE SET
+        readings = readings + 1,
+        temperature_n = temperature_n + excluded.temperature_n, temperature_sum = temperature_sum + excluded.temperature_sum, temperature_sumsq = temperature_sumsq + excluded.temperature_sumsq,
+        temperature_min = COALESCE(MIN(temperature_min, excluded.temperature_min), temperature_min, excluded.temperature_min), temperature_max = COALESCE(MAX(temperature_max, excluded.temperature_max), temperature_max, excluded.temperature_max),
+        ph_n = ph_n + excluded.ph_n, ph_sum = ph_sum + excluded.ph_sum, ph_sumsq = ph_sumsq + excluded.ph_sumsq,
+        ph_min = COALESCE(MIN(ph_min, excluded.ph_min), ph_min, excluded.ph_min), ph_max = COALESCE(MAX(ph_max, excluded.ph_max), ph_max, excluded.ph_max),
+        salinity_n = salinity_n + excluded.salinity_n, salinity_sum = salinity_sum + excluded.salinity_sum, salinity_sumsq = salinity_sumsq + excluded.salinity_sumsq,
+        salinity_min = COALESCE(MIN(salinity_min, excluded.salinity_min), salinity_min, excluded.salinity_min), salinity_max = COALESCE(MAX(salinity_max, excluded.salinity_max), salinity_max, excluded.salinity_max),
+        pollution_n = pollution_n + excluded.pollution_n, pollution_sum = pollution_sum + excluded.pollution_sum, pollution_sumsq = pollution_sumsq + excluded.pollution_sumsq,
+        pollution_min = COALESCE(MIN(pollution_min, excluded.pollution_min), pollution_min, excluded.pollution_min), pollution_max = COALESCE(MAX(pollution_max, excluded.pollution_max), pollution_max, excluded.pollution_max);
+END;
+
+CREATE TRIGGER Water_Quality_Stats_Delete AFTER DELETE ON Water_Quality
+FOR EACH ROW WHEN OLD.location_id IS NOT NULL
+BEGIN
+    UPDATE Water_Quality_Stats SET
+        readings = readings - 1,
+        temperature_n = temperature_n - (OLD.temperature IS NOT NULL), temperature_sum = temperature_sum - COALESCE(OLD.temperature, 0), temperature_sumsq = temperature_sumsq - COALESCE(OLD.temperature * OLD.temperature, 0),
+        ph_n = ph_n - (OLD.pH IS NOT NULL), ph_sum = ph_sum - COALESCE(OLD.pH, 0), ph_sumsq = ph_sumsq - COALESCE(OLD.pH * OLD.pH, 0),
+        salinity_n = salinity_n - (OLD.salinity IS NOT NULL), salinity_sum = salinity_sum - COALESCE(OLD.salinity, 0), salinity_sumsq = salinity_sumsq - COALESCE(OLD.salinity * OLD.salinity, 0),
+        pollution_n = pollution_n - (OLD.pollution_index IS NOT NULL), pollution_sum = pollution_sum - COALESCE(OLD.pollution_index, 0), pollution_sumsq = pollution_sumsq - COALESCE(OLD.pollution_index * OLD.pollution_index, 0)
+    WHERE grain = 'all' AND location_id = OLD.location_id AND bucket_start = '1970-01-01';
+    DELETE FROM Water_Quality_Stats WHERE grain = 'all' AND location_id = OLD.location_id AND bucket_start = '1970-01-01' AND readings <= 0;
+    UPDATE Water_Quality_Stats SET
+        temperature_min = (SELECT MIN(temperature) FROM Water_Quality WHERE location_id = OLD.location_id),
+        temperature_max = (SELECT MAX(temperature) FROM Water_Quality WHERE location_id = OLD.location_id),
+        ph_min = (SELECT MIN(pH) FROM Water_Quality WHERE location_id = OLD.location_id),
+        ph_max = (SELECT MAX(pH) FROM Water_Quality WHERE location_id = OLD.location_id),
+        salinity_min = (SELECT MIN(salinity) FROM Water_Quality WHERE location_id = OLD.location_id),
+        salinity_max = (SELECT MAX(salinity) FROM Water_Quality WHERE location_id = OLD.location_id),
+        pollution_min = (SELECT MIN(pollution_index) FROM Water_Quality WHERE location_id = OLD.location_id),
+        pollution_max = (SELECT MAX(pollution_index) FROM Water_Quality WHERE location_id = OLD.location_id)
+    WHERE grain = 'all' AND location_id = OLD.location_id AND bucket_start = '1970-01-01'
+      AND (temperature_min = OLD.temperature OR temperature_max = OLD.temperature OR ph_min = OLD.pH OR ph_max = OLD.pH OR salinity_min = OLD.salinity OR salinity_max = OLD.salinity OR pollution_min = OLD.pollution_index OR pollution_max = OLD.pollution_index);
+    UPDATE Water_Quality_Stats SET
+        readings = readings - 1,
+        temperature_n = temperature_n - (OLD.temperature IS NOT NULL), temperature_sum = temperature_sum - COALESCE(OLD.temperature, 0), temperature_sumsq = temperature_sumsq - COALESCE(OLD.temperature * OLD.temperature, 0),
+        ph_n = ph_n - (OLD.pH IS NOT NULL), ph_sum = ph_sum - COALESCE(OLD.pH, 0), ph_sumsq = ph_sumsq - COALESCE(OLD.pH * OLD.pH, 0),
+        salinity_n = salinity_n - (OLD.salinity IS NOT NULL), salinity_sum = salinity_sum - COALESCE(OLD.salinity, 0), salinity_sumsq = salinity_sumsq - COALESCE(OLD.salinity * OLD.salinity, 0),
+        pollution_n = pollution_n - (OLD.pollution_index IS NOT NULL), pollution_sum = pollution_sum - COALESCE(OLD.pollution_index, 0), pollution_sumsq = pollution_sumsq - COALESCE(OLD.pollution_index * OLD.pollution_index, 0)
+    WHERE grain = 'day' AND location_id = OLD.location_id AND bucket_start = date(OLD.measured_at);
+    DELETE FROM Water_Quality_Stats WHERE grain = 'day' AND location_id = OLD.location_id AND bucket_start = date(OLD.measured_at) AND readings <= 0;
+    UPDATE Water_Quality_Stats SET
+        temperature_min = (SELECT MIN(temperature) FROM Water_Quality WHERE location_id = OLD.location_id AND measured_at >= date(OLD.measured_at) AND measured_at < date(OLD.measured_at, '+1 day')),
+        temperature_max = (SELECT MAX(temperature) FROM Water_Quality WHERE location_id = OLD.location_id AND measured_at >= date(OLD.measured_at) AND measured_at < date(OLD.measured_at, '+1 day')),
+        ph_min = (SELECT MIN(pH) FROM Water_Quality WHERE location_id = OLD.location_id AND measured_at >= date(OLD.measured_at) AND measured_at < date(OLD.measured_at, '+1 day')),
+        ph_max = (SELECT MAX(pH) FROM Water_Quality WHERE location_id = OLD.location_id AND measured_at >= date(OLD.measured_at) AND measured_at < date(OLD.measured_at, '+1 day')),
+        salinity_min = (SELECT MIN(salinity) FROM Water_Quality WHERE location_id = OLD.location_id AND measured_at >= date(OLD.measured_at) AND measured_at < date(OLD.measured_at, '+1 day')),
+        salinity_max = (SELECT MAX(salinity) FROM Water_Quality WHERE location_id = OLD.location_id AND measured_at >= date(OLD.measured_at) AND measured_at < date(OLD.measured_at, '+1 day')),
+        pollution_min = (SELECT MIN(pollution_index) FROM Water_Quality WHERE location_id = OLD.location_id AND measured_at >= date(OLD.measured_at) AND measured_at < date(OLD.measured_at, '+1 day')),
+        pollution_max = (SELECT MAX(pollution_index) FROM Water_Quality WHERE location_id = OLD.location_id AND measured_at >= date(OLD.measured_at) AND measured_at < date(OLD.measured_at, '+1 day'))
+    WHERE grain = 'day' AND location_id = OLD.location_id AND bucket_start = date(OLD.measured_at)
+      AND (temperature_min = OLD.temperature OR temperature_max = OLD.temperature OR ph_min = OLD.pH OR ph_max = OLD.pH OR salinity_min = OLD.salinity OR salinity_max = OLD.salinity OR pollution_min = OLD.pollution_index OR pollution_max = OLD.pollution_index);
+END;
+
+-- -------------------------------
+-- VIEW
+-- -------------------------------
+
+CREATE VIEW Species_Observation_View AS
+SELECT s.common_name, l.location_name, o.obs_date, o.count_observed
+FROM Observation o
+JOIN Species s ON o.species_id = s.species_id
+JOIN Location l ON o.location_id = l.location_id;
@@ -0,0 +1,578 @@
+# storage.py
+"""
+Storage backends behind the app's data helpers.
+
+The helpers in app.py only need a DB-API connection with the mysql.connector surface they
+use (cursor(dictionary=True), execute with %s parameters, callproc, commit, rollback) and they
+catch storage.Error. A backend hands out such connections:
+
+    MySQLBackend   mysql.connector connections to a MySQL server; schema from
+                   marine_species_project.sql + migrations/, monthly partitions, fast restore
+    SQLiteBackend  an embedded SQLite file in WAL mode; schema from sqlite_schema.sql
+
+SQLite connections translate the handful of MySQL idioms the helpers use (%s placeholders,
+NOW() / CURDATE() - INTERVAL n DAY|SECOND, TIMESTAMPDIFF, CONCAT, SELECT ... FOR UPDATE,
+SET SESSION, DELETE ... LIMIT), run the app's stored procedures from PROCEDURES and register
+AvgPollution / AvgPollutionSince as SQL functions.
+
+Both backends raise the exception classes defined here (Error and its subclasses): MySQL
+connections are wrapped so mysql.connector errors are re-raised as them, and sqlite3 errors are
+mapped onto them, so is_missing_table(), is_referenced() and is_transient() mean the same on
+both. mysql.connector is only imported once a MySQL connection is opened; the embedded backend
+runs without it.
+"""
+import datetime
+import decimal
+import functools
+import os
+import re
+import sqlite3
+
+import lazy_import
+
+mysql_connector = lazy_import.module("mysql.connector")
+errorcode = lazy_import.module("mysql.connector.errorcode")
+
+SQLITE_SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sqlite_schema.sql")
+SQLITE_BUSY_TIMEOUT_MS = 5000      # how long a writer waits for another writer before giving up
+
+
+# ---------- ERRORS ----------
+class Error(Exception):
+    """
+    Base class of every database error a backend raises. `errno` is the backend's own error
+    code (MySQL's error number; SQLite's extended result code, when known) for messages and
+    logs: callers test the class, or use is_missing_table() and friends.
+    """
+    def __init__(self, msg="", errno=None):
+        super().__init__(msg)
+        self.msg = msg
+        self.errno = errno
+
+    def __str__(self):
+        return f"{self.errno}: {self.msg}" if self.errno is not None else str(self.msg)
+
+
+class InterfaceError(Error):
+    """The connection could not be opened or was lost."""
+
+
+class PoolError(Error):
+    """No pooled connection became free in time."""
+
+
+class DatabaseError(Error):
+    """The database failed or refused a statement."""
+
+
+class OperationalError(DatabaseError):
+    pass
+
+
+class LockError(OperationalError):
+    """Lock wait timeout, deadlock, or a database file busy with another writer."""
+
+
+class IntegrityError(DatabaseError):
+    pass
+
+
+class DataError(DatabaseError):
+    """A value does not fit its column (out of range, too long, wrong type)."""
+
+
+class ReferencedRowError(IntegrityError):
+    """A row cannot be deleted because other rows still reference it."""
+
+
+class ProgrammingError(DatabaseError):
+    pass
+
+
+class MissingTableError(ProgrammingError):
+    """A table does not exist (e.g. a migration has not been applied)."""
+
+
+def is_missing_table(e):
+    """True when `e` says a table does not exist (e.g. a migration has not been applied)."""
+    return isinstance(e, MissingTableError)
+
+
+def is_referenced(e):
+    """True when `e` says a row cannot be deleted because other rows still reference it."""
+    return isinstance(e, ReferencedRowError)
+
+
+def is_transient(e):
+    """True when retrying the same statements later may succeed: lost connection, lock wait timeout, deadlock."""
+    return isinstance(e, (InterfaceError, LockError))
+
+
+# ---------- MYSQL ----------
+class MySQLBackend:
+    """Connections to a MySQL server."""
+    name = "mysql"
+    embedded = False
+
+    def __init__(self, **conn_kwargs):
+        self.conn_kwargs = conn_kwargs
+
+    def connect(self, database=None):
+        """A new connection to `database`, or to the server only when database is None."""
+        kwargs = dict(self.conn_kwargs)
+        if database:
+            kwargs["database"] = database
+        return MySQLConnection(_mysql_call(mysql_connector.connect, **kwargs))
+
+
+_MYSQL_CLASSES = [     # (mysql.connector error class name, ours), most specific first
+    ("InterfaceError", InterfaceError),
+    ("PoolError", PoolError),
+    ("IntegrityError", IntegrityError),
+    ("DataError", DataError),
+    ("ProgrammingError", ProgrammingError),
+    ("OperationalError", OperationalError),
+    ("DatabaseError", DatabaseError),
+]
+
+
+def _from_mysql(e):
+    """The storage error matching mysql.connector error `e` (same message and errno)."""
+    errno = getattr(e, "errno", None)
+    if errno == errorcode.ER_NO_SUCH_TABLE:
+        cls = MissingTableError
+    elif errno in (errorcode.ER_ROW_IS_REFERENCED, errorcode.ER_ROW_IS_REFERENCED_2):
+        cls = ReferencedRowError
+    elif errno in (errorcode.ER_LOCK_WAIT_TIMEOUT, errorcode.ER_LOCK_DEADLOCK):
+        cls = LockError
+    elif errno in (errorcode.CR_CONNECTION_ERROR, errorcode.CR_CONN_HOST_ERROR,
+                   errorcode.CR_SERVER_GONE_ERROR, errorcode.CR_SERVER_LOST):
+        cls = InterfaceError
+    else:
+        errors = mysql_connector.errors
+        cls = next((ours for name, ours in _MYSQL_CLASSES if isinstance(e, getattr(errors, name))), Error)
+    return cls(getattr(e, "msg", None) or str(e), errno)
+
+
+def _mysql_call(fn, *args, **kwargs):
+    try:
+        return fn(*args, **kwargs)
+    except mysql_connector.Error as e:
+        raise _from_mysql(e) from e
+
+
+class MySQLCursor:
+    """mysql.connector cursor whose errors are raised as storage errors; other attributes pass through."""
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        rows = iter(self._cursor)
+        while True:
+            try:
+                yield _mysql_call(next, rows)
+            except StopIteration:
+                return
+
+    def execute(self, *args, **kwargs):
+        return _mysql_call(self._cursor.execute, *args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        return _mysql_call(self._cursor.executemany, *args, **kwargs)
+
+    def callproc(self, *args, **kwargs):
+        return _mysql_call(self._cursor.callproc, *args, **kwargs)
+
+    def fetchone(self):
+        return _mysql_call(self._cursor.fetchone)
+
+    def fetchmany(self, *args, **kwargs):
+        return _mysql_call(self._cursor.fetchmany, *args, **kwargs)
+
+    def fetchall(self):
+        return _mysql_call(self._cursor.fetchall)
+
+    def close(self):
+        return _mysql_call(self._cursor.close)
+
+
+class MySQLConnection:
+    """mysql.connector connection whose errors are raised as storage errors; other attributes pass through."""
+    def __init__(self, raw):
+        self.raw = raw
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def cursor(self, *args, **kwargs):
+        return MySQLCursor(_mysql_call(self.raw.cursor, *args, **kwargs))
+
+    def commit(self):
+        return _mysql_call(self.raw.commit)
+
+    def rollback(self):
+        return _mysql_call(self.raw.rollback)
+
+    def ping(self, *args, **kwargs):
+        return _mysql_call(self.raw.ping, *args, **kwargs)
+
+    def close(self):
+        return _mysql_call(self.raw.close)
+
+
+# ---------- SQLITE: TYPES ----------
+def _parse_datetime(value):
+    text = value.decode()
+    try:
+        return datetime.datetime.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+def _parse_date(value):
+    text = value.decode()
+    try:
+        return datetime.date.fromisoformat(text[:10])
+    except ValueError:
+        return text
+
+
+# stored as text in MySQL's own formats, so string comparisons and date() work on them
+sqlite3.register_adapter(datetime.datetime, lambda v: v.isoformat(" ", "seconds"))
+sqlite3.register_adapter(datetime.date, lambda v: v.isoformat())
+sqlite3.register_adapter(decimal.Decimal, float)
+sqlite3.register_converter("DATETIME", _parse_datetime)
+sqlite3.register_converter("TIMESTAMP", _parse_datetime)
+sqlite3.register_converter("DATE", _parse_date)
+
+
+# ---------- SQLITE: DIALECT ----------
+_SET_RE = re.compile(r"^\s*SET\s", re.I)
+_INTERVAL_RE = re.compile(r"(NOW\(\)|CURDATE\(\))\s*-\s*INTERVAL\s+(\?|\d+)\s+(DAY|SECOND)\b", re.I)
+_TIMESTAMPDIFF_RE = re.compile(r"TIMESTAMPDIFF\(\s*(DAY|SECOND)\s*,", re.I)
+_FOR_UPDATE_RE = re.compile(r"\s+FOR\s+UPDATE\s*$", re.I)
+_DELETE_LIMIT_RE = re.compile(r"^\s*DELETE\s+FROM\s+(\w+)\s+WHERE\s+(.*?)\s+LIMIT\s+(\?|\d+)\s*$", re.I | re.S)
+
+
+@functools.lru_cache(maxsize=512)
+def translate(sql):
+    """
+    The SQLite form of one statement written for MySQL, or None for session settings
+    (SET ...) that have no SQLite equivalent and are skipped.
+    """
+    if _SET_RE.match(sql):
+        return None
+    sql = sql.replace("%s", "?")
+    sql = _INTERVAL_RE.sub(lambda m: f"DATE_SUB({m.group(1).upper()}, {m.group(2)}, '{m.group(3).upper()}')", sql)
+    sql = _TIMESTAMPDIFF_RE.sub(lambda m: f"TIMESTAMPDIFF('{m.group(1).upper()}',", sql)
+    sql = _FOR_UPDATE_RE.sub("", sql)
+    m = _DELETE_LIMIT_RE.match(sql)
+    if m:
+        table, where, limit = m.groups()
+        sql = f"DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} WHERE {where} LIMIT {limit})"
+    return sql
+
+
+def _as_datetime(value):
+    return value if isinstance(value, datetime.datetime) else datetime.datetime.fromisoformat(str(value))
+
+
+def _now():
+    return datetime.datetime.now().isoformat(" ", "seconds")
+
+
+def _curdate():
+    return datetime.date.today().isoformat()
+
+
+def _date_sub(value, amount, unit):
+    """value - INTERVAL amount unit, keeping value's format (date or datetime)."""
+    if value is None or amount is None:
+        return None
+    delta = datetime.timedelta(days=amount) if unit == "DAY" else datetime.timedelta(seconds=amount)
+    if len(str(value)) == 10:
+        return (datetime.date.fromisoformat(str(value)) - delta).isoformat()
+    return (_as_datetime(value) - delta).isoformat(" ", "seconds")
+
+
+def _timestampdiff(unit, start, end):
+    if start is None or end is None:
+        return None
+    seconds = (_as_datetime(end) - _as_datetime(start)).total_seconds()
+    return int(seconds / 86400) if unit == "DAY" else int(seconds)
+
+
+def _concat(*parts):
+    """MySQL CONCAT: NULL if any part is NULL."""
+    if any(p is None for p in parts):
+        return None
+    return "".join(str(p) for p in parts)
+
+
+_AVG_POLLUTION_SQL = """
+    SELECT ROUND(SUM(st.pollution_sum) / NULLIF(SUM(st.pollution_n), 0), 2)
+    FROM Location l
+    JOIN Water_Quality_Stats st ON st.location_id = l.location_id AND st.grain = {grain}
+    WHERE l.location_name = ?{window}
+"""
+
+
+# ---------- SQLITE: PROCEDURES ----------
+def _stats_rebuild(grain, bucket, group_by):
+    metrics = [("temperature", "temperature"), ("ph", "pH"), ("salinity", "salinity"), ("pollution", "pollution_index")]
+    columns = ", ".join(f"{p}_n, {p}_sum, {p}_sumsq, {p}_min, {p}_max" for p, _ in metrics)
+    aggregates = ", ".join(f"COUNT({c}), COALESCE(SUM({c}), 0), COALESCE(SUM({c} * {c}), 0), MIN({c}), MAX({c})"
+                           for _, c in metrics)
+    return (f"INSERT INTO Water_Quality_Stats (grain, location_id, bucket_start, readings, {columns}) "
+            f"SELECT '{grain}', location_id, {bucket}, COUNT(*), {aggregates} "
+            f"FROM Water_Quality WHERE location_id IS NOT NULL GROUP BY {group_by}")
+
+
+# The MySQL procedures the app calls, as statement lists (see marine_species_project.sql and migrations/)
+PROCEDURES = {
+    "RefreshDashboardSummary": (
+        "DELETE FROM Dashboard_Summary",
+        """INSERT INTO Dashboard_Summary (metric, dimension, value_count)
+               SELECT 'total', 'Species', COUNT(*) FROM Species
+               UNION ALL SELECT 'total', 'Location', COUNT(*) FROM Location
+               UNION ALL SELECT 'total', 'Observation', COUNT(*) FROM Observation
+               UNION ALL SELECT 'total', 'Conservation_Action', COUNT(*) FROM Conservation_Action""",
+        """INSERT INTO Dashboard_Summary (metric, dimension, value_count)
+               SELECT 'status', COALESCE(conservation_status, 'Unknown'), COUNT(*)
+               FROM Species GROUP BY COALESCE(conservation_status, 'Unknown')""",
+        "INSERT INTO Dashboard_Summary (metric, dimension) VALUES ('meta', 'last_refresh')",
+    ),
+    "RebuildObservationRollups": (
+        "DELETE FROM Observation_Rollup",
+        """INSERT INTO Observation_Rollup (grain, bucket_start, species_id, location_id, sightings, total_count)
+               SELECT 'day', date(obs_date), COALESCE(species_id, 0), COALESCE(location_id, 0),
+                      COUNT(*), COALESCE(SUM(count_observed), 0)
+               FROM Observation WHERE obs_date IS NOT NULL
+               GROUP BY date(obs_date), COALESCE(species_id, 0), COALESCE(location_id, 0)""",
+        """INSERT INTO Observation_Rollup (grain, bucket_start, species_id, location_id, sightings, total_count)
+               SELECT 'week', date(bucket_start, 'weekday 0', '-6 days'), species_id, location_id,
+                      SUM(sightings), SUM(total_count)
+               FROM Observation_Rollup WHERE grain = 'day'
+               GROUP BY date(bucket_start, 'weekday 0', '-6 days'), species_id, location_id""",
+        """INSERT INTO Observation_Rollup (grain, bucket_start, species_id, location_id, sightings, total_count)
+               SELECT 'month', date(bucket_start, 'start of month'), species_id, location_id,
+                      SUM(sightings), SUM(total_count)
+               FROM Observation_Rollup WHERE grain = 'day'
+               GROUP BY date(bucket_start, 'start of month'), species_id, location_id""",
+    ),
+    "RebuildWaterQualityStats": (
+        "DELETE FROM Water_Quality_Stats",
+        _stats_rebuild("all", "'1970-01-01'", "location_id"),
+        _stats_rebuild("day", "date(measured_at)", "location_id, date(measured_at)"),
+    ),
+}
+
+
+def _translate_error(e, sql=""):
+    """The storage error matching sqlite3 error `e`."""
+    message = str(e)
+    errno = getattr(e, "sqlite_errorcode", None)
+    if isinstance(e, sqlite3.IntegrityError):
+        if "FOREIGN KEY" in message and sql.lstrip()[:6].upper() == "DELETE":
+            return ReferencedRowError(message, errno)
+        return IntegrityError(message, errno)
+    if isinstance(e, sqlite3.DataError):
+        return DataError(message, errno)
+    if "no such table" in message:
+        return MissingTableError(message, errno)
+    if "no such column" in message or "syntax error" in message:
+        return ProgrammingError(message, errno)
+    if "locked" in message or "busy" in message:
+        return LockError(message, errno)
+    if isinstance(e, sqlite3.OperationalError):
+        return OperationalError(message, errno)
+    return DatabaseError(message, errno)
+
+
+# ---------- SQLITE: CONNECTIONS ----------
+class SQLiteCursor:
+    """sqlite3 cursor with the mysql.connector interface the app uses."""
+    def __init__(self, conn, dictionary=False):
+        self._conn = conn
+        self._cursor = conn.raw.cursor()
+        self._dictionary = dictionary
+
+    def execute(self, operation, params=None):
+        sql = translate(operation)
+        if sql is None:
+            return
+        try:
+            if _FOR_UPDATE_RE.search(operation) and not self._conn.raw.in_transaction:
+                # the rows are about to be written: take the write lock now, as FOR UPDATE would
+                self._cursor.execute("BEGIN IMMEDIATE")
+            self._cursor.execute(sql, tuple(params or ()))
+        except sqlite3.Error as e:
+            raise _translate_error(e, sql) from e
+
+    def executemany(self, operation, seq_params):
+        sql = translate(operation)
+        try:
+            self._cursor.executemany(sql, [tuple(p) for p in seq_params])
+        except sqlite3.Error as e:
+            raise _translate_error(e, sql) from e
+
+    def callproc(self, procname, args=()):
+        statements = PROCEDURES.get(procname)
+        if statements is None:
+            raise ProgrammingError(f"PROCEDURE {procname} does not exist")
+        try:
+            for statement in statements:
+                self._cursor.execute(statement)
+        except sqlite3.Error as e:
+            raise _translate_error(e, statement) from e
+        return args
+
+    @property
+    def column_names(self):
+        return tuple(d[0] for d in self._cursor.description or ())
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip(self.column_names, row))
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size=1):
+        return [self._row(r) for r in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._row(r) for r in self._cursor.fetchall()]
+
+    def __iter__(self):
+        return (self._row(r) for r in self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """One sqlite3 connection with the mysql.connector methods the app and the pool call."""
+    def __init__(self, path, busy_timeout_ms=SQLITE_BUSY_TIMEOUT_MS):
+        # used by one thread at a time, but handed between threads by the pool
+        self.raw = sqlite3.connect(path, timeout=busy_timeout_ms / 1000, check_same_thread=False,
+                                   detect_types=sqlite3.PARSE_DECLTYPES)
+        self.raw.execute("PRAGMA journal_mode = WAL")      # readers never wait for the writer
+        self.raw.execute("PRAGMA synchronous = NORMAL")    # safe with WAL; only the last commits can be lost on power failure
+        self.raw.execute("PRAGMA foreign_keys = ON")
+        self.raw.create_function("NOW", 0, _now)
+        self.raw.create_function("CURDATE", 0, _curdate)
+        self.raw.create_function("DATE_SUB", 3, _date_sub, deterministic=True)
+        self.raw.create_function("TIMESTAMPDIFF", 3, _timestampdiff, deterministic=True)
+        self.raw.create_function("CONCAT", -1, _concat, deterministic=True)
+        self.raw.create_function("AvgPollution", 1, self._avg_pollution)
+        self.raw.create_function("AvgPollutionSince", 2, self._avg_pollution_since)
+        self._open = True
+
+    def _scalar(self, sql, params):
+        return self.raw.execute(sql, params).fetchone()[0]
+
+    def _avg_pollution(self, location_name):
+        return self._scalar(_AVG_POLLUTION_SQL.format(grain="'all'", window=""), (location_name,))
+
+    def _avg_pollution_since(self, location_name, days):
+        since = (datetime.date.today() - datetime.timedelta(days=days)).isoformat()
+        return self._scalar(_AVG_POLLUTION_SQL.format(grain="'day'", window=" AND st.bucket_start > ?"),
+                            (location_name, since))
+
+    def cursor(self, dictionary=False, **kwargs):
+        return SQLiteCursor(self, dictionary=dictionary)
+
+    def commit(self):
+        try:
+            self.raw.commit()
+        except sqlite3.Error as e:
+            raise _translate_error(e) from e
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def ping(self, reconnect=False, **kwargs):
+        try:
+            self.raw.execute("SELECT 1")
+        except sqlite3.Error as e:
+            raise _translate_error(e) from e
+
+    def is_connected(self):
+        return self._open
+
+    def close(self):
+        if self._open:
+            self._open = False
+            self.raw.close()
+
+
+class SQLiteBackend:
+    """An embedded SQLite database file: no server, local queries, instant startup."""
+    name = "sqlite"
+    embedded = True
+
+    def __init__(self, path, schema_path=SQLITE_SCHEMA_PATH, busy_timeout_ms=SQLITE_BUSY_TIMEOUT_MS):
+        self.path = path
+        self.schema_path = schema_path
+        self.busy_timeout_ms = busy_timeout_ms
+
+    def connect(self, database=None):
+        """A new connection to the database file (`database` is ignored: the file is the database)."""
+        try:
+            return SQLiteConnection(self.path, self.busy_timeout_ms)
+        except sqlite3.Error as e:
+            raise _translate_error(e) from e
+
+    def is_initialized(self):
+        if not os.path.exists(self.path):
+            return False
+        conn = self.connect()
+        try:
+            return conn.raw.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'Species'").fetchone() is not None
+        finally:
+            conn.close()
+
+    def initialize(self):
+        """
+        Create the schema and sample data from schema_path, replacing whatever a failed earlier
+        attempt left behind, then build the summary tables. Returns (success, message).
+        """
+        try:
+            with open(self.schema_path, encoding="utf-8") as f:
+                schema = f.read()
+        except OSError as e:
+            return False, f"Failed to read SQLite schema: {e}"
+        conn = self.connect()
+        try:
+            leftovers = conn.raw.execute("SELECT type, name FROM sqlite_master WHERE type IN ('view', 'table') "
+                                         "AND name NOT LIKE 'sqlite_%' ORDER BY type = 'table'").fetchall()
+            conn.raw.executescript("PRAGMA foreign_keys = OFF;"
+                                   + "".join(f"DROP {kind.upper()} IF EXISTS {name};" for kind, name in leftovers)
+                                   + "PRAGMA foreign_keys = ON;")
+            conn.raw.executescript(schema)
+            cursor = conn.cursor()
+            for procname in ("RefreshDashboardSummary", "RebuildObservationRollups", "RebuildWaterQualityStats"):
+                cursor.callproc(procname)
+            conn.commit()
+        except (sqlite3.Error, Error) as e:
+            return False, f"Creating the SQLite database failed: {e}"
+        finally:
+            conn.close()
+        return True, f"SQLite database created at {self.path}"
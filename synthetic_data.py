@@ -0,0 +1,283 @@
+# synthetic_data.py
+"""
+Reproducible synthetic datasets for load testing and benchmarks.
+
+generate() adds species, locations, observers, water-quality readings, conservation actions
+and observations to an initialized database (see DB Init). Every foreign key points at an
+existing row, and the same seed always produces the same data. Sightings are skewed the way
+real survey data is: a few species and a few locations (Zipf-distributed) account for most
+observations, and count_observed has a long tail.
+
+Dimension sizes grow with the number of observations unless given explicitly:
+    observations   species   locations   observers   water quality
+    10^3           50        20          25          100
+    10^6           1000      251         500         100000
+    10^8           10000     1584        5000        10^7
+Rows are generated in chunks (numpy, vectorized) and written with multi-row INSERTs, so memory
+stays flat at any size. The Dashboard_Summary and Observation_Rollup triggers fire for every
+row, which keeps the summaries exact but roughly doubles load time on large runs.
+
+Command line:
+    python synthetic_data.py 1000000 --seed 42
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import storage
+
+DEFAULT_CHUNK_SIZE = 10000
+ZIPF_EXPONENT = 1.1          # skew of species / location popularity
+DEFAULT_YEARS = 5            # observations are spread over this many years up to now
+
+_ADJECTIVES = ["Blue", "Spotted", "Striped", "Giant", "Pygmy", "Golden", "Banded", "Silver", "Reef",
+               "Deep-sea", "Longfin", "Shortfin", "Painted", "Royal", "Ghost", "Crested", "Horned", "Dusky"]
+_ANIMALS = ["Whale", "Dolphin", "Shark", "Ray", "Turtle", "Grouper", "Wrasse", "Eel", "Octopus", "Seahorse",
+            "Parrotfish", "Tuna", "Manatee", "Seal", "Jellyfish", "Angelfish", "Snapper", "Barracuda"]
+_GENERA = ["Balaena", "Delphinus", "Carcharhinus", "Manta", "Chelonia", "Epinephelus", "Labroides",
+           "Gymnothorax", "Octopus", "Hippocampus", "Scarus", "Thunnus", "Trichechus", "Phoca"]
+_EPITHETS = ["maculatus", "vulgaris", "giganteus", "minor", "aureus", "fasciatus", "australis",
+             "borealis", "indicus", "pacificus", "atlanticus", "nigrans", "striatus", "regalis"]
+_STATUSES = (["Least Concern", "Near Threatened", "Vulnerable", "Endangered", "Critically Endangered"],
+             [0.45, 0.2, 0.17, 0.13, 0.05])
+_REGIONS = ["Australia", "USA", "Indonesia", "India", "Africa", "Caribbean", "Mediterranean", "Arctic",
+            "Japan", "Brazil", "Norway", "Philippines", "Mexico", "Red Sea", "Antarctica"]
+_REGION_TEMPERATURE = {"Arctic": 2.0, "Antarctica": 0.5, "Norway": 8.0, "Mediterranean": 19.0, "USA": 17.0}
+_PLACES = ["Bay", "Reef", "Coast", "Atoll", "Lagoon", "Strait", "Shoal", "Trench", "Estuary", "Sound"]
+_WATER_TYPES = (["Ocean", "Sea", "Lake", "River"], [0.5, 0.35, 0.1, 0.05])
+_FIRST_NAMES = ["Emily", "John", "Sophia", "Arun", "Isabella", "Liam", "Aiko", "Mateo", "Priya", "Noah",
+                "Fatima", "Lucas", "Mei", "Omar", "Elena", "Kwame", "Sara", "Diego"]
+_LAST_NAMES = ["Clark", "Doe", "Lee", "Kumar", "Gomez", "Nguyen", "Tanaka", "Silva", "Patel", "Okafor",
+               "Rossi", "Hansen", "Chen", "Haddad", "Novak", "Mensah", "Costa", "Reyes"]
+_ORGANIZATIONS = ["MarineLife Org", "OceanWatch", "AquaSave", "BluePlanet", "WildSea", "ReefCheck",
+                  "Coastal Survey", "Sea Shepherd Volunteers", "University Marine Lab"]
+_ACTIONS = ["Habitat Protection", "Anti-Poaching Patrol", "Beach Clean-up", "Awareness Campaign",
+            "Coral Health Monitoring", "Tagging Programme", "Fishing Quota Review", "Rescue and Rehabilitation"]
+_REMARKS = [None, None, None, "Observed near coral zone", "Small group", "Juveniles present", "Feeding",
+            "Near shallow area", "Playing in pods", "Injured individual", "Tagged animal"]
+
+
+def default_sizes(observations):
+    """Dimension table sizes for a dataset with `observations` rows (see the table above)."""
+    return {
+        "species": int(min(10000, max(50, observations ** 0.5))),
+        "locations": int(min(2000, max(20, observations ** 0.4))),
+        "observers": int(min(5000, max(25, observations ** 0.5 / 2))),
+        "water_quality": int(max(100, observations // 10)),
+        "actions": int(min(30000, max(20, observations ** 0.5))),
+    }
+
+
+def _zipf_weights(n, exponent=ZIPF_EXPONENT, rng=None):
+    """Zipf probabilities for n items, assigned to the items in a (seeded) random order."""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    weights /= weights.sum()
+    return rng.permutation(weights) if rng is not None else weights
+
+
+def _pick(rng, options, size, p=None):
+    return [options[i] for i in rng.choice(len(options), size=size, p=p)]
+
+
+def _insert(conn, sql, rows, chunk_size):
+    cursor = conn.cursor()
+    try:
+        for i in range(0, len(rows), chunk_size):
+            cursor.executemany(sql, rows[i:i + chunk_size])
+            conn.commit()
+    finally:
+        cursor.close()
+
+
+def _ids(conn, table, id_column):
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT {id_column} FROM {table} ORDER BY {id_column}")
+    ids = np.array([row[0] for row in cursor.fetchall()], dtype=np.int64)
+    cursor.close()
+    return ids
+
+
+# ---------- DIMENSIONS ----------
+def _species_rows(rng, n, run):
+    adjectives = _pick(rng, _ADJECTIVES, n)
+    animals = _pick(rng, _ANIMALS, n)
+    genera = _pick(rng, _GENERA, n)
+    epithets = _pick(rng, _EPITHETS, n)
+    statuses = _pick(rng, _STATUSES[0], n, _STATUSES[1])
+    return [(f"{a} {b} {run}-{i}", f"{g} {e}", s)
+            for i, (a, b, g, e, s) in enumerate(zip(adjectives, animals, genera, epithets, statuses))]
+
+
+def _location_rows(rng, n, run):
+    regions = _pick(rng, _REGIONS, n)
+    places = _pick(rng, _PLACES, n)
+    water = _pick(rng, _WATER_TYPES[0], n, _WATER_TYPES[1])
+    return [(f"{r} {p} {run}-{i}", r, w) for i, (r, p, w) in enumerate(zip(regions, places, water))]
+
+
+def _observer_rows(rng, n, run):
+    first = _pick(rng, _FIRST_NAMES, n)
+    last = _pick(rng, _LAST_NAMES, n)
+    orgs = _pick(rng, _ORGANIZATIONS, n)
+    return [(f"{f} {l}", o, f"{f.lower()}.{l.lower()}.{run}-{i}@example.org")
+            for i, (f, l, o) in enumerate(zip(first, last, orgs))]
+
+
+def _action_rows(rng, n, species_ids, now):
+    species = rng.choice(species_ids, size=n)
+    kinds = _pick(rng, _ACTIONS, n)
+    starts = rng.integers(0, DEFAULT_YEARS * 365, size=n)
+    lengths = rng.integers(30, 730, size=n)
+    rows = []
+    for sid, kind, start, length in zip(species, kinds, starts, lengths):
+        start_date = (now - timedelta(days=int(start))).date()
+        rows.append((int(sid), kind, f"{kind} programme", start_date, start_date + timedelta(days=int(length))))
+    return rows
+
+
+# ---------- FACTS ----------
+def _water_quality_chunk(rng, size, location_ids, location_p, location_regions, start, span_seconds):
+    locs = rng.choice(location_ids, size=size, p=location_p)
+    offsets = np.sort(rng.integers(0, span_seconds, size=size))
+    base = np.array([_REGION_TEMPERATURE.get(location_regions.get(int(l)), 25.0) for l in locs])
+    temperature = np.clip(base + rng.normal(0, 2.5, size), -2, 40).round(2)
+    ph = np.clip(rng.normal(8.1, 0.2, size), 6.5, 9.0).round(2)
+    salinity = np.clip(rng.normal(35, 2, size), 0, 45).round(2)
+    pollution = np.clip(rng.lognormal(2.7, 0.6, size), 0, 99.99).round(2)
+    return [(int(l), float(t), float(p), float(s), float(x), start + timedelta(seconds=int(off)))
+            for l, t, p, s, x, off in zip(locs, temperature, ph, salinity, pollution, offsets)]
+
+
+def _observation_chunk(rng, size, ids, weights, start, span_seconds):
+    species = rng.choice(ids["species"], size=size, p=weights["species"])
+    locations = rng.choice(ids["location"], size=size, p=weights["location"])
+    observers = rng.choice(ids["observer"], size=size)
+    has_quality = rng.random(size) < 0.3
+    quality = rng.choice(ids["water_quality"], size=size) if len(ids["water_quality"]) else np.zeros(size, dtype=np.int64)
+    offsets = np.sort(rng.integers(0, span_seconds, size=size))    # roughly chronological, like live data
+    counts = rng.geometric(0.15, size=size)
+    remarks = _pick(rng, _REMARKS, size)
+    rows = []
+    for s, l, o, hq, q, off, c, r in zip(species, locations, observers, has_quality, quality, offsets, counts, remarks):
+        rows.append((int(s), int(l), int(o), int(q) if hq and q else None,
+                     start + timedelta(seconds=int(off)), int(c), r))
+    return rows
+
+
+def generate(conn, observations, seed=0, sizes=None, chunk_size=DEFAULT_CHUNK_SIZE, on_progress=None):
+    """
+    Add a synthetic dataset with `observations` Observation rows to the database behind `conn`.
+    `sizes` overrides default_sizes() entries. on_progress(table, done, total) is called after
+    every chunk. Returns a dict of rows added per table and the elapsed seconds.
+    """
+    rng = np.random.default_rng(seed)
+    sizes = {**default_sizes(observations), **(sizes or {})}
+    run = f"s{seed}"
+    now = datetime.now().replace(microsecond=0)
+    report = {}
+    started = time.perf_counter()
+
+    def progress(table, done, total):
+        report[table] = done
+        if on_progress:
+            on_progress(table, done, total)
+
+    _insert(conn, "INSERT INTO Species (common_name, scientific_name, conservation_status) VALUES (%s, %s, %s)",
+            _species_rows(rng, sizes["species"], run), chunk_size)
+    progress("species", sizes["species"], sizes["species"])
+    _insert(conn, "INSERT INTO Location (location_name, region, water_type) VALUES (%s, %s, %s)",
+            _location_rows(rng, sizes["locations"], run), chunk_size)
+    progress("locations", sizes["locations"], sizes["locations"])
+    _insert(conn, "INSERT INTO Observer (name, organization, contact) VALUES (%s, %s, %s)",
+            _observer_rows(rng, sizes["observers"], run), chunk_size)
+    progress("observers", sizes["observers"], sizes["observers"])
+
+    ids = {
+        "species": _ids(conn, "Species", "species_id"),
+        "location": _ids(conn, "Location", "location_id"),
+        "observer": _ids(conn, "Observer", "observer_id"),
+    }
+    _insert(conn, "INSERT INTO Conservation_Action (species_id, action_type, description, start_date, end_date) "
+                  "VALUES (%s, %s, %s, %s, %s)",
+            _action_rows(rng, sizes["actions"], ids["species"], now), chunk_size)
+    progress("actions", sizes["actions"], sizes["actions"])
+
+    weights = {"species": _zipf_weights(len(ids["species"]), rng=rng),
+               "location": _zipf_weights(len(ids["location"]), rng=rng)}
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT location_id, region FROM Location")
+    location_regions = dict(cursor.fetchall())
+    cursor.close()
+    wq_sql = ("INSERT INTO Water_Quality (location_id, temperature, pH, salinity, pollution_index, measured_at) "
+              "VALUES (%s, %s, %s, %s, %s, %s)")
+    span_seconds = DEFAULT_YEARS * 365 * 86400
+    start = now - timedelta(seconds=span_seconds)
+    wq_chunks = max(1, -(-sizes["water_quality"] // chunk_size))
+    wq_span = span_seconds // wq_chunks
+    for i, done in enumerate(range(0, sizes["water_quality"], chunk_size)):
+        size = min(chunk_size, sizes["water_quality"] - done)
+        _insert(conn, wq_sql, _water_quality_chunk(rng, size, ids["location"], weights["location"], location_regions,
+                                                   start + timedelta(seconds=i * wq_span), wq_span),
+                chunk_size)
+        progress("water_quality", done + size, sizes["water_quality"])
+    ids["water_quality"] = _ids(conn, "Water_Quality", "quality_id")
+
+    obs_sql = ("INSERT INTO Observation (species_id, location_id, observer_id, quality_id, obs_date, count_observed, remarks) "
+               "VALUES (%s, %s, %s, %s, %s, %s, %s)")
+    chunks = max(1, -(-observations // chunk_size))
+    chunk_span = span_seconds // chunks
+    for i, done in enumerate(range(0, observations, chunk_size)):
+        size = min(chunk_size, observations - done)
+        rows = _observation_chunk(rng, size, ids, weights, start + timedelta(seconds=i * chunk_span), chunk_span)
+        _insert(conn, obs_sql, rows, chunk_size)
+        progress("observations", done + size, observations)
+
+    report["seconds"] = time.perf_counter() - started
+    return report
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load a reproducible synthetic dataset")
+    parser.add_argument("observations", type=float, help="number of observations, e.g. 1e6")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    for table in ("species", "locations", "observers", "water_quality", "actions"):
+        parser.add_argument(f"--{table.replace('_', '-')}", type=int, dest=table, help=f"override the {table} count")
+    args = parser.parse_args(argv)
+
+    import app  # deferred: only the CLI needs the app's connection settings
+
+    observations = int(args.observations)
+    sizes = {t: getattr(args, t) for t in ("species", "locations", "observers", "water_quality", "actions")
+             if getattr(args, t) is not None}
+    try:
+        conn = app.open_dedicated_connection(app.DB_NAME)
+    except storage.Error as e:
+        print(f"Could not connect to the database: {e}")
+        return 1
+    last = {}
+
+    def report(table, done, total):
+        # print at most every 10% per table
+        if done == total or done - last.get(table, 0) >= total / 10:
+            last[table] = done
+            print(f"{table}: {done}/{total}")
+
+    try:
+        result = generate(conn, observations, seed=args.seed, sizes=sizes, chunk_size=args.chunk_size,
+                          on_progress=report)
+    except storage.Error as e:
+        print(f"Generation stopped: {e}")
+        return 1
+    finally:
+        conn.close()
+    print(f"Done in {result['seconds']:.1f}s ({observations / result['seconds']:.0f} observations/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,83 @@
+# tests/test_change_feed.py
+"""The Observation change log: gap tracking (advance, fill_gaps) and ChangeFeedMemo."""
+import pytest
+
+import change_feed
+import storage
+
+
+def test_advance_without_gaps():
+    assert change_feed.advance(10, [(11,), (12,), (13,)]) == (13, [])
+
+
+def test_advance_records_runs_of_missing_ids():
+    assert change_feed.advance(10, [(12,), (13,), (17,)]) == (17, [(11, 11), (14, 16)])
+
+
+def test_advance_with_nothing_new_keeps_the_version():
+    assert change_feed.advance(10, []) == (10, [])
+
+
+def test_fill_gaps_splits_runs_around_late_changes():
+    assert change_feed.fill_gaps([(11, 11), (14, 20)], [11, 14, 17]) == [(15, 16), (18, 20)]
+    assert change_feed.fill_gaps([(5, 6)], []) == [(5, 6)]
+
+
+@pytest.fixture
+def conn(tmp_path):
+    backend = storage.SQLiteBackend(str(tmp_path / "feed.db"))
+    ok, message = backend.initialize()
+    assert ok, message
+    conn = backend.connect()
+    yield conn
+    conn.close()
+
+
+def _insert(conn):
+    """Insert one observation, which logs a change."""
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO Observation (species_id, location_id, observer_id, obs_date, count_observed) "
+                   "SELECT MIN(s.species_id), MIN(l.location_id), MIN(o.observer_id), NOW(), 1 "
+                   "FROM Species s, Location l, Observer o")
+    conn.commit()
+    cursor.close()
+
+
+def _counter():
+    calls = []
+    return calls, lambda: calls.append(1) or len(calls)
+
+
+def test_memo_is_reused_until_the_log_moves_on(conn, monkeypatch):
+    monkeypatch.setattr(change_feed, "GAP_GRACE_SECONDS", -1)
+    memo = change_feed.ChangeFeedMemo()
+    _insert(conn)
+    calls, compute = _counter()
+    assert memo.cached(conn, "recent", compute) == 1
+    assert memo.cached(conn, "recent", compute) == 1
+
+    _insert(conn)
+    assert memo.cached(conn, "recent", compute) == 2
+    assert memo.stats()["hits"] == 1
+    assert memo.stats()["misses"] == 2
+
+
+def test_memo_is_bypassed_while_the_newest_change_is_young(conn):
+    memo = change_feed.ChangeFeedMemo()
+    _insert(conn)
+    calls, compute = _counter()
+    memo.cached(conn, "recent", compute)
+    memo.cached(conn, "recent", compute)
+    assert len(calls) == 2
+    assert memo.stats()["bypassed"] == 2
+
+
+def test_clear_cached_forgets_values(conn, monkeypatch):
+    monkeypatch.setattr(change_feed, "GAP_GRACE_SECONDS", -1)
+    memo = change_feed.ChangeFeedMemo()
+    _insert(conn)
+    calls, compute = _counter()
+    memo.cached(conn, "recent", compute)
+    memo.clear_cached()
+    memo.cached(conn, "recent", compute)
+    assert len(calls) == 2
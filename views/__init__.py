@@ -0,0 +1,34 @@
+# views/__init__.py
+"""
+The app's pages, one module each, with a render(app, use_snapshot) function.
+
+A page module is imported the first time its page is opened, so a fresh Streamlit process
+only loads the code (and, through it, the libraries) for the pages its users actually visit.
+"""
+import importlib
+
+# menu label -> page module, in sidebar order
+PAGES = {
+    "Dashboard": "views.dashboard",
+    "Add Observation": "views.add_observation",
+    "Add Species/Observer": "views.add_species_observer",
+    "Search Species": "views.search_species",
+    "Conservation Actions": "views.conservation_actions",
+    "Manage Data": "views.manage_data",
+    "Bulk Import": "views.bulk_import_page",
+    "Reports": "views.reports",
+    "DB Init": "views.db_init",
+    "Diagnostics": "views.diagnostics",
+}
+# pages reachable only by URL (?page=diagnostics)
+HIDDEN = {"Diagnostics"}
+MENU = [page for page in PAGES if page not in HIDDEN]
+
+
+def load(page):
+    """The module for `page`, imported on first use."""
+    return importlib.import_module(PAGES[page])
+
+
+def render(page, app, use_snapshot):
+    load(page).render(app, use_snapshot)
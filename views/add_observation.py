@@ -0,0 +1,75 @@
+# views/add_observation.py
+"""Add Observation page: record a sighting together with its water-quality reading."""
+from datetime import datetime
+
+import streamlit as st
+
+
+def render(app, use_snapshot):
+    """Draw the page. `app` is the running app module; `use_snapshot` is the Analytics mode toggle."""
+    st.title("Log New Observation")
+    st.markdown("Record sightings and water quality measurements")
+
+    species = app.fetch_all_species()
+    locations = app.fetch_all_locations()
+    observers = app.fetch_all_observers()
+
+    if not species:
+        st.warning("No species found in DB. Add species first or run DB Init")
+    col1, col2 = st.columns(2)
+    with col1:
+        selected_species = st.selectbox("Species", options=[f"{s['common_name']} ({s['scientific_name']})" for s in species] if species else ["-"])
+        species_map = {f"{s['common_name']} ({s['scientific_name']})": s['species_id'] for s in species}
+        obs_date = st.date_input("Observation Date", value=datetime.now().date())
+        obs_time = st.time_input("Observation Time", value=datetime.now().time())
+        count_observed = st.number_input("Count Observed", min_value=0, step=1, value=1)
+
+    with col2:
+        selected_location = st.selectbox("Location", options=[f"{l['location_name']} - {l['region']}" for l in locations] if locations else ["-"])
+        location_map = {f"{l['location_name']} - {l['region']}": l['location_id'] for l in locations}
+        observer_choice = st.selectbox("Observer", options=[f"{o['name']} ({o['organization']})" for o in observers] if observers else ["-"])
+        observer_map = {f"{o['name']} ({o['organization']})": o['observer_id'] for o in observers}
+        remarks = st.text_area("Remarks", placeholder="Optional notes")
+
+    st.markdown("### Water Quality (optional)")
+    wcol1, wcol2, wcol3 = st.columns(3)
+    with wcol1:
+        temperature = st.number_input("Temperature (°C)", format="%.2f", value=25.0)
+        pH = st.number_input("pH", format="%.2f", value=8.0)
+    with wcol2:
+        salinity = st.number_input("Salinity (ppt)", format="%.2f", value=35.0)
+        pollution_index = st.number_input("Pollution Index (0-100)", format="%.2f", value=10.0)
+    with wcol3:
+        add_new_observer = st.checkbox("Add new observer")
+        if add_new_observer:
+            new_obs_name = st.text_input("Observer Name")
+            new_obs_org = st.text_input("Organization")
+            new_obs_contact = st.text_input("Contact email/phone")
+
+    if st.button("Submit Observation"):
+        if not species or selected_species == "-" or selected_location == "-" or observer_choice == "-":
+            st.error("Ensure species, location and observer are available or add them first")
+        else:
+            sp_id = species_map[selected_species]
+            loc_id = location_map[selected_location]
+            new_observer = None
+            obs_id_val = None
+            if add_new_observer:
+                if not new_obs_name:
+                    st.error("Observer name is required")
+                    return
+                new_observer = {'name': new_obs_name, 'organization': new_obs_org, 'contact': new_obs_contact}
+            else:
+                obs_id_val = observer_map[observer_choice]
+
+            obs_dt = datetime.combine(obs_date, obs_time)
+            ok_obs, obs_res = app.submit_observation(
+                sp_id, loc_id, obs_dt, int(count_observed), remarks,
+                observer_id=obs_id_val,
+                new_observer=new_observer,
+                water_quality={'temperature': temperature, 'pH': pH, 'salinity': salinity, 'pollution_index': pollution_index},
+            )
+            if ok_obs:
+                st.success("Observation logged")
+            else:
+                st.error(f"Failed to log observation: {obs_res}")
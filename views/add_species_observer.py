@@ -0,0 +1,43 @@
+# views/add_species_observer.py
+"""Add Species/Observer page: add rows to the Species and Observer lookup tables."""
+import streamlit as st
+
+
+def render(app, use_snapshot):
+    """Draw the page. `app` is the running app module; `use_snapshot` is the Analytics mode toggle."""
+    st.title("Add Species or Observer")
+    st.markdown("Add new species to track or new observers")
+
+    tab1, tab2 = st.tabs(["Add Species", "Add Observer"])
+
+    with tab1:
+        st.subheader("Add Species")
+        s_common = st.text_input("Common Name")
+        s_scientific = st.text_input("Scientific Name")
+        s_status = st.selectbox("Conservation Status", ["Least Concern", "Near Threatened", "Vulnerable", "Endangered", "Critically Endangered"])
+
+        if st.button("Add Species"):
+            if not s_common:
+                st.error("Common name is required")
+            else:
+                ok, msg = app.add_species(s_common, s_scientific, s_status)
+                if ok:
+                    st.success("Species added")
+                else:
+                    st.error(f"Failed to add species: {msg}")
+
+    with tab2:
+        st.subheader("Add Observer")
+        o_name = st.text_input("Name")
+        o_org = st.text_input("Organization")
+        o_contact = st.text_input("Contact")
+
+        if st.button("Add Observer", key="add_obs_btn"):
+            if not o_name:
+                st.error("Observer name is required")
+            else:
+                ok, msg = app.add_observer(o_name, o_org, o_contact)
+                if ok:
+                    st.success("Observer added")
+                else:
+                    st.error(f"Failed to add observer: {msg}")
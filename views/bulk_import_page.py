@@ -0,0 +1,61 @@
+# views/bulk_import_page.py
+"""Bulk Import page: load a CSV or Excel file of observations in chunks."""
+import streamlit as st
+
+import bulk_import
+import lazy_import
+
+pd = lazy_import.module("pandas")
+
+
+def render(app, use_snapshot):
+    """Draw the page. `app` is the running app module; `use_snapshot` is the Analytics mode toggle."""
+    st.title("Bulk Import")
+    st.markdown("Upload a CSV or Parquet file of observations or water-quality readings. "
+                "Species, locations and observers may be given by name or by ID.")
+
+    kind = st.radio("File contains", bulk_import.IMPORT_KINDS,
+                    format_func=lambda k: "Observations" if k == "observations" else "Water quality readings")
+    if kind == "observations":
+        st.caption("Columns: species (or species_id), location (or location_id), observer (or observer_id), "
+                   "obs_date, count_observed, optional quality_id and remarks")
+    else:
+        st.caption("Columns: location (or location_id), temperature, pH, salinity, pollution_index")
+    uploaded = st.file_uploader("File", type=["csv", "parquet", "pq"])
+    chunk_size = st.number_input("Rows per transaction", min_value=100, max_value=50000,
+                                 value=bulk_import.DEFAULT_CHUNK_SIZE, step=100)
+
+    if st.button("Start Import", disabled=uploaded is None):
+        lookup = bulk_import.LookupIndex(app.fetch_all_species(), app.fetch_all_locations(), app.fetch_all_observers())
+        conn = app.get_db_connection()
+        if not conn:
+            st.error("Cannot connect to DB")
+            return
+        progress = st.empty()
+        chunk_log = []
+
+        def report(r):
+            chunk_log.append(r)
+            progress.info(f"Chunk {r['chunk']}: {r['total_inserted']} of {r['total_rows']} row(s) inserted "
+                          f"({r['rows_per_sec']:.0f} rows/s)")
+
+        try:
+            ok, result = bulk_import.import_file(conn, uploaded, kind, lookup, int(chunk_size),
+                                                 bulk_import.detect_format(uploaded.name), on_chunk=report)
+        finally:
+            conn.close()
+
+        if not ok:
+            st.error(result)
+        else:
+            progress.success(f"Imported {result['inserted']} of {result['rows']} row(s) in {result['seconds']:.1f}s "
+                             f"({result['rows_per_sec']:.0f} rows/s), {result['rejected']} rejected")
+        if chunk_log:
+            st.subheader("Per-chunk throughput")
+            st.dataframe(pd.DataFrame(chunk_log), use_container_width=True)
+        if ok and result["rejects"]:
+            st.subheader("Rejected rows")
+            rejects_df = pd.DataFrame(result["rejects"], columns=["row", "reason"])
+            st.dataframe(rejects_df, use_container_width=True)
+            st.download_button("Download rejects (CSV)", rejects_df.to_csv(index=False),
+                               file_name="import_rejects.csv", mime="text/csv")
@@ -0,0 +1,16 @@
+# views/conservation_actions.py
+"""Conservation Actions page: every action with the species it protects."""
+import streamlit as st
+
+
+def render(app, use_snapshot):
+    """Draw the page. `app` is the running app module; `use_snapshot` is the Analytics mode toggle."""
+    st.title("Conservation Actions")
+    actions = app.fetch_all_actions_full()
+    if actions.attrs.get("truncated"):
+        st.warning("Showing only the most recent actions: the listing hit its size cap "
+                   "(MARINE_LISTING_MAX_ROWS / MARINE_LISTING_MAX_MB)")
+    if not actions.empty:
+        st.dataframe(actions, use_container_width=True)
+    else:
+        st.info("No conservation actions recorded")
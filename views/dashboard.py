@@ -0,0 +1,125 @@
+# views/dashboard.py
+"""Dashboard page: headline metrics, trends and recent observations, loaded in parallel."""
+import streamlit as st
+
+
+def render(app, use_snapshot):
+    """Draw the page. `app` is the running app module; `use_snapshot` is the Analytics mode toggle."""
+    st.title("🐠 Marine Conservation Dashboard")
+
+    # Layout first: every panel gets a placeholder that is filled as soon as its data arrives
+    status_line = st.empty()
+    totals_panel = st.empty()
+    st.markdown("---")
+    status_panel = st.empty()
+    pollution_days = None
+    if not use_snapshot:
+        pollution_days = st.selectbox("Pollution window", app.POLLUTION_WINDOWS, key="pollution_window",
+                                      format_func=lambda d: "All readings" if d is None else f"Last {d} days")
+    pollution_panel = st.empty()
+    st.markdown("---")
+    st.subheader("Sighting Trends")
+    col1, col2 = st.columns(2)
+    grain = col1.selectbox("Bucket", app.TREND_GRAINS, index=1, format_func=str.capitalize, key="trend_grain")
+    species_names = {s['species_id']: s['common_name'] for s in app.fetch_all_species()}
+    trend_species = col2.selectbox("Species", [None] + list(species_names),
+                                   format_func=lambda sid: "All species" if sid is None else species_names[sid],
+                                   key="trend_species")
+    trend_panel = st.empty()
+    top_species_panel = st.empty()
+    st.markdown("---")
+    st.subheader("Recent Observations")
+    recent_panel = st.empty()
+    for panel in (totals_panel, status_panel, pollution_panel, trend_panel, recent_panel):
+        panel.caption("Loading...")
+
+    pool = app.get_read_pool()      # replicas when configured; the summary refresh needs the primary
+    primary = app.get_connection_pool(app.DB_NAME)
+    feed = app.get_observation_feed()
+    loaders = {
+        "recent": lambda: app._with_panel_connection(pool, lambda c: app.fetch_recent_observations(limit=8, conn=c, feed=feed)),
+    }
+    if use_snapshot:
+        # metrics and trends come from the Parquet snapshot; only the recent list hits MySQL
+        try:
+            engine = app.get_analytics_engine()
+        except RuntimeError as e:
+            st.error(f"Analytics mode is unavailable: {e}")
+            return
+        loaders["summary"] = engine.dashboard_summary
+        loaders["trend"] = lambda: engine.observation_trend(grain, species_id=trend_species)
+        if trend_species is None:
+            loaders["top_species"] = lambda: engine.observation_trend(grain, by="species")
+    else:
+        loaders["summary"] = lambda: app._with_panel_connection(
+            pool, lambda c: app.fetch_dashboard_summary(c, pollution_days=pollution_days, primary=primary))
+        loaders["trend"] = lambda: app._with_panel_connection(
+            pool, lambda c: app.fetch_observation_trend(grain, species_id=trend_species, conn=c))
+        if trend_species is None:
+            loaders["top_species"] = lambda: app._with_panel_connection(
+                pool, lambda c: app.fetch_observation_trend(grain, by="species", conn=c))
+
+    for panel, data, error in app.load_panels(loaders):
+        if panel == "summary":
+            if error:
+                totals_panel.error(f"Failed to load dashboard metrics: {error}")
+                status_panel.empty()
+                pollution_panel.empty()
+                continue
+            if use_snapshot and data["age_seconds"] is not None:
+                status_line.caption(f"Analytics mode: snapshot exported {data['age_seconds'] / 60:.0f} min ago")
+            totals = data["totals"]
+            with totals_panel.container():
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Species", totals["Species"])
+                col2.metric("Locations", totals["Location"])
+                col3.metric("Observations", totals["Observation"])
+                col4.metric("Conservation Actions", totals["Conservation_Action"])
+
+            # Species by conservation status
+            species_status = data["species_status"]
+            if species_status.empty:
+                status_panel.empty()
+            else:
+                with status_panel.container():
+                    st.subheader("Species by Conservation Status")
+                    st.bar_chart(species_status.set_index('conservation_status'))
+
+            # Pollution by region
+            pollution_df = data["pollution"]
+            if pollution_df.empty:
+                pollution_panel.empty()
+            else:
+                with pollution_panel.container():
+                    st.subheader("Average Pollution Index by Region"
+                                 + ("" if pollution_days is None else f" (last {pollution_days} days)"))
+                    st.line_chart(pollution_df.set_index('region'))
+
+        elif panel == "trend":
+            if error:
+                trend_panel.error(f"Failed to load trends: {error}")
+            elif data is None:
+                trend_panel.info("Trend rollups are not set up yet. Apply migrations on the DB Init page.")
+            elif data.empty:
+                trend_panel.info("No observations in this period")
+            else:
+                trend_panel.line_chart(data.set_index('bucket_start')[['total_count', 'sightings']])
+
+        elif panel == "top_species":
+            if error or data is None or data.empty:
+                continue
+            top = data.groupby('species')['total_count'].sum().nlargest(5).index
+            with top_species_panel.container():
+                st.caption("Top 5 species by individuals counted")
+                st.line_chart(
+                    data[data['species'].isin(top)]
+                    .pivot_table(index='bucket_start', columns='species', values='total_count', fill_value=0)
+                )
+
+        elif panel == "recent":
+            if error:
+                recent_panel.error(f"Failed to load recent observations: {error}")
+            elif not data.empty:
+                recent_panel.dataframe(data, use_container_width=True)
+            else:
+                recent_panel.info("No observations yet")
@@ -0,0 +1,213 @@
+# views/db_init.py
+"""
+DB Init page: create or restore the database, apply migrations and look after partitions,
+the change log, the analytics snapshot, the connection pools and the caches.
+"""
+from datetime import datetime
+
+import streamlit as st
+
+import analytics
+import lazy_import
+import schema_migrations
+import storage
+
+pd = lazy_import.module("pandas")
+
+
+def render(app, use_snapshot):
+    """Draw the page. `app` is the running app module; `use_snapshot` is the Analytics mode toggle."""
+    st.title("Database Initialization")
+    embedded = app.get_storage_backend().embedded
+    if embedded:
+        st.markdown(f"The database is an embedded SQLite file: `{app.SQLITE_PATH}`")
+        if st.button("Initialize Database"):
+            with st.spinner("Creating the database"):
+                success, msg = app.ensure_database_initialized()
+            if success:
+                st.success(msg)
+            else:
+                st.error(msg)
+    else:
+        st.markdown("Use this page to initialize the `marine_db` from your SQL file path")
+
+        st.info(f"Default SQL path set to: {app.DEFAULT_SQL_PATH}")
+        sql_path = st.text_input("SQL file path", value=app.DEFAULT_SQL_PATH)
+        fast_restore = st.checkbox(f"Fast restore ({app.RESTORE_WORKERS} parallel loaders, constraints added after the data)")
+        start_statement = st.number_input("Resume from statement", min_value=0, value=0, step=1, disabled=fast_restore,
+                                          help="Leave at 0 for a fresh run. After a failure, enter the statement number from the error.")
+        if st.button("Initialize Database"):
+            progress_bar = st.progress(0.0)
+            progress_text = st.empty()
+            phase_timings = []
+
+            def show_phase(phase, seconds):
+                phase_timings.append({"phase": phase, "seconds": round(seconds, 3)})
+                progress_text.caption(f"Finished {phase} phase in {seconds:.2f}s")
+
+            def show_progress(info):
+                if info.get('total_bytes'):
+                    progress_bar.progress(min(info['bytes_read'] / info['total_bytes'], 1.0))
+                progress_text.caption(f"{info['statements']} statements read · "
+                                      f"{info['statements_per_sec']:.0f} statements/s · "
+                                      f"{info['bytes_per_sec'] / 1e6:.1f} MB/s")
+
+            with st.spinner("Initializing database. This may take a few seconds"):
+                success, msg = app.ensure_database_initialized(sql_path=sql_path, start_statement=int(start_statement),
+                                                           on_progress=show_progress, fast=fast_restore,
+                                                           on_phase=show_phase)
+                if phase_timings:
+                    st.table(pd.DataFrame(phase_timings))
+                if success:
+                    st.success(msg)
+                else:
+                    st.error(msg)
+                    st.write("If the automatic initialization failed, please run this SQL file manually using mysql client:")
+                    st.code(f'mysql -u {app.DB_USER} -p < "{sql_path}"')
+
+    st.markdown("---")
+    st.subheader("Schema Migrations")
+    if embedded:
+        st.info("The SQLite schema is created complete; migrations/ and the index advisor are MySQL only.")
+    else:
+        mig_conn = app.get_db_connection()
+        if mig_conn:
+            try:
+                pending = schema_migrations.pending_migrations(mig_conn)
+            except storage.Error as e:
+                pending = None
+                st.error(f"Could not read migration status: {e}")
+            finally:
+                mig_conn.close()
+            if pending:
+                st.warning("Pending: " + ", ".join(f"{v:04d}_{n}" for v, n, _ in pending))
+                if st.button("Apply Migrations"):
+                    ok, mig_msg = app.run_schema_migrations()
+                    if ok:
+                        st.success(mig_msg)
+                    else:
+                        st.error(mig_msg)
+            elif pending is not None:
+                st.info("Schema is up to date")
+        if st.button("Run Index Advisor"):
+            with st.spinner("Running EXPLAIN over the app's queries"):
+                advice = pd.DataFrame(schema_migrations.run_advisor(app))
+            if advice.empty:
+                st.info("No queries to analyse")
+            else:
+                advice['flags'] = advice['flags'].apply(", ".join)
+                st.dataframe(advice, use_container_width=True)
+    if st.button("Rebuild Trend Rollups"):
+        ok, rollup_msg = app.rebuild_observation_rollups()
+        if ok:
+            st.success(rollup_msg)
+        else:
+            st.error(rollup_msg)
+    if st.button("Rebuild Water Quality Stats"):
+        ok, stats_msg = app.rebuild_water_quality_stats()
+        if ok:
+            st.success(stats_msg)
+        else:
+            st.error(stats_msg)
+
+    st.markdown("---")
+    st.subheader("Analytics Snapshot")
+    st.markdown(f"Parquet copy of the reporting tables in `{app.ANALYTICS_DIR}`, used by analytics mode. "
+                "Exports only read rows added since the last run.")
+    snapshot_state = analytics.load_state(app.ANALYTICS_DIR)
+    if snapshot_state["high_water"]:
+        st.json(snapshot_state)
+    full_export = st.checkbox("Full re-export (picks up edited and deleted rows)")
+    if st.button("Export Snapshot"):
+        with st.spinner("Exporting"):
+            ok, export_result = app.export_analytics_snapshot(
+                full=full_export,
+                on_table=lambda name, rows, secs: st.write(f"{name}: {rows} row(s) in {secs:.1f}s")
+            )
+        if ok:
+            st.success(f"Snapshot updated: {sum(export_result.values())} row(s) exported")
+        else:
+            st.error(export_result)
+
+    if not embedded:
+        st.markdown("---")
+        st.subheader("Partitions")
+        st.markdown("Observation and Water_Quality are split into monthly partitions "
+                    f"({app.PARTITION_MONTHS_AHEAD} future month(s) are kept ready). Archiving moves whole "
+                    "months into `<table>_Archive_pYYYYMM` tables.")
+        partition_status = app.fetch_partition_status()
+        if partition_status is not None:
+            for table, parts in partition_status.items():
+                if parts:
+                    st.write(f"**{table}**: {len(parts)} partition(s)")
+                    st.dataframe(pd.DataFrame(parts), use_container_width=True)
+                else:
+                    st.write(f"**{table}**: not partitioned yet (apply migrations)")
+        if st.button("Create Future Partitions"):
+            ok, partition_msg = app.add_future_partitions()
+            if ok:
+                st.success(partition_msg)
+            else:
+                st.error(partition_msg)
+        archive_before = st.date_input("Archive months ending on or before",
+                                       value=datetime(datetime.now().year - 2, 1, 1).date())
+        if st.button("Archive Old Partitions"):
+            with st.spinner("Archiving"):
+                ok, archive_msg = app.archive_partitions(archive_before)
+            if ok:
+                st.success(archive_msg)
+            else:
+                st.error(archive_msg)
+
+    st.markdown("---")
+    st.subheader("Observation Change Feed")
+    st.markdown("The Dashboard's recent observations are reused until the `Observation_Change` "
+                "log moves on.")
+    feed_status = app.fetch_change_log_status()
+    if feed_status is None:
+        st.info("No change log yet (apply migrations). Recent observations are queried on every render.")
+    else:
+        fcol1, fcol2, fcol3 = st.columns(3)
+        fcol1.metric("Log Rows", feed_status['rows'])
+        fcol2.metric("Latest Version", feed_status['newest'] or 0)
+        feed_stats = app.get_observation_feed().stats()
+        fcol3.metric("Memo Hits", feed_stats['hits'])
+        st.json(feed_stats)
+        if st.button(f"Prune Change Log (older than {app.CHANGE_LOG_RETENTION_DAYS} days)"):
+            ok, prune_msg = app.prune_change_log()
+            if ok:
+                st.success(prune_msg)
+            else:
+                st.error(prune_msg)
+
+    st.markdown("---")
+    st.subheader("Connection Pool")
+    pool_stats = app.get_connection_pool(app.DB_NAME).stats()
+    pcol1, pcol2, pcol3, pcol4 = st.columns(4)
+    pcol1.metric("In Use", f"{pool_stats['in_use']} / {pool_stats['size']}")
+    pcol2.metric("Idle", pool_stats['idle'])
+    pcol3.metric("Avg Wait (ms)", f"{pool_stats['avg_wait_ms']:.1f}")
+    pcol4.metric("Timeouts", pool_stats['timeouts'])
+    st.json(pool_stats)
+
+    router = app.get_replica_router()
+    if router is not None:
+        st.subheader("Read Replicas")
+        replica_stats = router.stats()
+        rcol1, rcol2, rcol3 = st.columns(3)
+        rcol1.metric("Usable", f"{replica_stats['usable']} / {replica_stats['replicas']}")
+        rcol2.metric("Replica Reads", replica_stats['replica_reads'])
+        rcol3.metric("Primary Fallbacks", replica_stats['primary_fallbacks'])
+        st.dataframe(pd.DataFrame(router.status()), use_container_width=True)
+        st.caption(f"Replicas more than {app.REPLICA_MAX_LAG:.0f}s behind get no reads; "
+                   "a session reads from the primary for that long after it writes.")
+
+    st.subheader("Reference Data Cache")
+    cache_stats = app.get_reference_cache().stats()
+    ccol1, ccol2, ccol3 = st.columns(3)
+    ccol1.metric("Hits", cache_stats['hits'])
+    ccol2.metric("Misses", cache_stats['misses'])
+    ccol3.metric("Hit Rate", f"{cache_stats['hit_rate']:.0%}")
+    if st.button("Clear Cache"):
+        app.get_reference_cache().invalidate()
+        st.success("Reference data cache cleared")
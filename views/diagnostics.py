@@ -0,0 +1,50 @@
+# views/diagnostics.py
+"""Diagnostics page (?page=diagnostics): helper timings, slow queries and Prometheus metrics."""
+from datetime import datetime
+
+import streamlit as st
+
+import instrumentation
+import lazy_import
+
+pd = lazy_import.module("pandas")
+
+
+def render(app, use_snapshot):
+    """Draw the page. `app` is the running app module; `use_snapshot` is the Analytics mode toggle."""
+    st.title("Diagnostics")
+    st.markdown("Database timings per helper and page since the process started (or the last reset). "
+                "Times are averages and bucketed 95th percentiles.")
+    registry = instrumentation.registry
+    st.caption(f"Collecting since {datetime.fromtimestamp(registry.started_at):%Y-%m-%d %H:%M:%S}")
+    summary = pd.DataFrame(registry.summary())
+    if summary.empty:
+        st.info("No database activity recorded yet")
+    else:
+        st.dataframe(summary.fillna(0), use_container_width=True)
+
+    st.subheader("Slow Queries")
+    threshold = instrumentation.slow_queries.threshold
+    st.caption(f"Threshold: {threshold * 1000:.0f} ms" if threshold is not None else "Slow-query logging is off")
+    slow = list(instrumentation.slow_queries.entries)
+    if not slow:
+        st.info("No slow queries recorded")
+    for entry in reversed(slow):
+        with st.expander(f"{entry['seconds'] * 1000:.0f} ms  {entry['helper']} ({entry['page']})  "
+                         f"{datetime.fromtimestamp(entry['at']):%H:%M:%S}"):
+            st.code(entry["sql"], language="sql")
+            if isinstance(entry["plan"], list):
+                st.dataframe(pd.DataFrame(entry["plan"]), use_container_width=True)
+            elif entry["plan"]:
+                st.write(entry["plan"])
+
+    st.subheader("Prometheus Metrics")
+    metrics_text = instrumentation.render_prometheus(app._pool_gauges(app.get_connection_pool(app.DB_NAME)))
+    if app.METRICS_PORT:
+        st.caption(f"Also served on port {app.METRICS_PORT} at /metrics")
+    st.download_button("Download metrics", metrics_text, file_name="metrics.txt", mime="text/plain")
+    with st.expander("Show metrics text"):
+        st.code(metrics_text)
+    if st.button("Reset Metrics"):
+        registry.reset()
+        st.rerun()
@@ -0,0 +1,179 @@
+# views/manage_data.py
+"""Manage Data page: browse, update and delete records, one at a time or in bulk."""
+import streamlit as st
+
+import lazy_import
+
+pd = lazy_import.module("pandas")
+
+
+def render(app, use_snapshot):
+    """Draw the page. `app` is the running app module; `use_snapshot` is the Analytics mode toggle."""
+    st.title("✏️ Manage Data")
+    
+    tab_update, tab_delete = st.tabs(["Update Records", "Delete Records"])
+
+    # ---------- UPDATE TAB ----------
+    with tab_update:
+        st.subheader("Update a Record")
+        st.info("Select a record to load its data into the form below for editing.")
+        
+        table_to_update = st.selectbox(
+            "Which data do you want to update?", 
+            ["Select...", "Species", "Observers", "Locations", "Conservation Actions"],
+            key="update_table_select"
+        )
+        
+        record_to_update_id = None
+        record_data = None
+        msg = ""
+        
+        update_tables = {
+            "Species": ("Species", "species_id"),
+            "Observers": ("Observer", "observer_id"),
+            "Locations": ("Location", "location_id"),
+            "Conservation Actions": ("Conservation_Action", "action_id")
+        }
+        if table_to_update in update_tables:
+            singular = {"Species": "Species", "Observers": "Observer", "Locations": "Location",
+                        "Conservation Actions": "Action"}[table_to_update]
+            record_to_update_id = app.record_picker(table_to_update, f"Select {singular} to Update:",
+                                                key=f"update_{table_to_update}")
+            if record_to_update_id is not None:
+                table_name, id_column = update_tables[table_to_update]
+                record_data, msg = app.fetch_one_record(table_name, id_column, record_to_update_id)
+
+        
+        # --- UPDATE FORM ---
+        if record_to_update_id:
+            st.markdown("---")
+            st.subheader(f"Editing Record ID: {record_to_update_id}")
+            
+            if not record_data:
+                st.error(f"Failed to fetch record data: {msg}")
+            else:
+                with st.form(key=f"update_form_{table_to_update}_{record_to_update_id}"):
+                    update_payload = {}
+                    
+                    if table_to_update == "Species":
+                        update_payload['common_name'] = st.text_input("Common Name", value=record_data.get('common_name'))
+                        update_payload['scientific_name'] = st.text_input("Scientific Name", value=record_data.get('scientific_name'))
+                        status_options = ["Least Concern", "Near Threatened", "Vulnerable", "Endangered", "Critically Endangered"]
+                        try:
+                            default_index = status_options.index(record_data.get('conservation_status'))
+                        except (ValueError, TypeError):
+                            default_index = 0
+                        update_payload['conservation_status'] = st.selectbox("Conservation Status", status_options, index=default_index)
+                        
+                    elif table_to_update == "Observers":
+                        update_payload['name'] = st.text_input("Name", value=record_data.get('name'))
+                        update_payload['organization'] = st.text_input("Organization", value=record_data.get('organization'))
+                        update_payload['contact'] = st.text_input("Contact", value=record_data.get('contact'))
+
+                    elif table_to_update == "Locations":
+                        update_payload['location_name'] = st.text_input("Location Name", value=record_data.get('location_name'))
+                        update_payload['region'] = st.text_input("Region", value=record_data.get('region'))
+                        water_options = ['Ocean', 'Sea', 'Lake', 'River']
+                        try:
+                            default_index = water_options.index(record_data.get('water_type'))
+                        except (ValueError, TypeError):
+                            default_index = 0
+                        update_payload['water_type'] = st.selectbox("Water Type", water_options, index=default_index)
+
+                    elif table_to_update == "Conservation Actions":
+                        update_payload['action_type'] = st.text_input("Action Type", value=record_data.get('action_type'))
+                        update_payload['description'] = st.text_area("Description", value=record_data.get('description'))
+                        update_payload['start_date'] = st.date_input("Start Date", value=record_data.get('start_date'))
+                        update_payload['end_date'] = st.date_input("End Date", value=record_data.get('end_date'))
+                    
+                    
+                    submitted = st.form_submit_button("Submit Update")
+                    if submitted:
+                        table_map = {
+                            "Species": ("Species", "species_id"),
+                            "Observers": ("Observer", "observer_id"),
+                            "Locations": ("Location", "location_id"),
+                            "Conservation Actions": ("Conservation_Action", "action_id")
+                        }
+                        table_name, id_column = table_map[table_to_update]
+                        
+                        ok, msg = app.update_record(table_name, id_column, record_to_update_id, update_payload)
+                        
+                        if ok:
+                            st.success(msg)
+                            st.rerun()
+                        else:
+                            st.error(f"Update failed: {msg}")
+
+    # ---------- DELETE TAB ----------
+    with tab_delete:
+        st.subheader("Delete Records")
+        st.warning("⚠️ **Warning:** Deleting records is permanent. Deletions may fail if the record is referenced by other data (e.g., deleting a Species that has Observations).")
+
+        table_to_manage = st.selectbox(
+            "Which data do you want to delete?", 
+            ["Select...", "Species", "Observers", "Locations", "Observations", "Conservation Actions"],
+            key="delete_table_select" # Add key to make it unique
+        )
+        
+        ids_to_delete = []
+        picked = False
+
+        if table_to_manage in app.PICKER_TABLES:
+            ids_to_delete = app.record_picker(table_to_manage, "Select record(s) to delete:",
+                                          key=f"delete_{table_to_manage}", multi=True)
+            picked = True
+
+        elif table_to_manage == "Observations":
+            data = app.observation_browser("delete_obs")
+            if not data.empty:
+                st.dataframe(data, use_container_width=True)
+                st.markdown("---")
+                display_options = app.observation_labels(data)
+                id_map = dict(zip(display_options.tolist(), data['obs_id'].tolist()))
+                selected_to_delete_display = st.multiselect(
+                    "Select record(s) to delete:", 
+                    options=display_options.tolist()
+                )
+                ids_to_delete = [id_map[display_val] for display_val in selected_to_delete_display]
+                picked = True
+
+        # Show delete controls if data is loaded
+        if picked:
+            if st.button("Delete Selected Records", type="primary"):
+                if not ids_to_delete:
+                    st.error("Please select at least one record to delete.")
+                else:
+                    # Map UI selection to table name and ID column
+                    table_map = {
+                        "Species": ("Species", "species_id"),
+                        "Observers": ("Observer", "observer_id"),
+                        "Locations": ("Location", "location_id"),
+                        "Observations": ("Observation", "obs_id"),
+                        "Conservation Actions": ("Conservation_Action", "action_id")
+                    }
+                    table_name, id_column = table_map[table_to_manage]
+                    
+                    ok, outcomes = app.delete_records(table_name, id_column, ids_to_delete)
+                    if not ok:
+                        st.error(f"Delete failed, nothing was deleted: {outcomes}")
+                    else:
+                        # kept across the rerun so the summary survives the refresh
+                        st.session_state["delete_outcomes"] = outcomes
+                        st.rerun() # Refresh the data on the page
+
+            outcomes = st.session_state.pop("delete_outcomes", None)
+            if outcomes:
+                summary = pd.DataFrame(
+                    [(record_id, outcome, msg) for record_id, (outcome, msg) in outcomes.items()],
+                    columns=["ID", "Outcome", "Details"]
+                )
+                counts = summary["Outcome"].value_counts()
+                st.info(f"Delete operation complete. {counts.get('deleted', 0)} succeeded, "
+                        f"{len(summary) - counts.get('deleted', 0)} failed.")
+                failed = summary[summary["Outcome"] != "deleted"]
+                if not failed.empty:
+                    st.dataframe(failed, use_container_width=True)
+        
+        elif table_to_manage != "Select...":
+            st.info("No data in this table to manage.")
@@ -0,0 +1,29 @@
+# views/reports.py
+"""Reports page: the analytics reports, answered from MySQL or the Parquet snapshot."""
+import time
+
+import streamlit as st
+
+import analytics
+import storage
+
+
+def render(app, use_snapshot):
+    """Draw the page. `app` is the running app module; `use_snapshot` is the Analytics mode toggle."""
+    st.title("Reports")
+    st.markdown("Analytical queries. In analytics mode they run on the Parquet snapshot and never touch MySQL.")
+    report_name = st.selectbox("Report", list(analytics.REPORTS),
+                               format_func=lambda name: analytics.REPORTS[name][0])
+    if st.button("Run Report"):
+        started = time.perf_counter()
+        try:
+            result = app.run_report(report_name, use_snapshot=use_snapshot)
+        except (storage.Error, RuntimeError) as e:
+            st.error(f"Report failed: {e}")
+        else:
+            source = "snapshot" if use_snapshot else "MySQL"
+            st.caption(f"{len(result)} row(s) from {source} in {(time.perf_counter() - started) * 1000:.0f} ms")
+            if result.empty:
+                st.info("No rows")
+            else:
+                st.dataframe(result, use_container_width=True)
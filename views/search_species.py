@@ -0,0 +1,32 @@
+# views/search_species.py
+"""Search Species page: find species by name and list their conservation actions."""
+import streamlit as st
+
+import lazy_import
+
+pd = lazy_import.module("pandas")
+
+
+def render(app, use_snapshot):
+    """Draw the page. `app` is the running app module; `use_snapshot` is the Analytics mode toggle."""
+    st.title("Search Species")
+    q = st.text_input("Enter species common or scientific name")
+    if st.button("Search"):
+        if not q:
+            st.error("Please enter a search term")
+        else:
+            results = app.search_species_by_name(q)
+            if results:
+                st.success(f"Found {len(results)} row(s)")
+                for r in results:
+                    with st.expander(f"{r['common_name']} ({r.get('scientific_name','')})"):
+                        st.write(f"Conservation Status: {r.get('conservation_status')}")
+                        st.write(f"Total Observations: {r.get('total_observations')}")
+                        st.markdown("### Conservation Actions")
+                        actions = r['actions']
+                        if actions:
+                            st.table(pd.DataFrame(actions))
+                        else:
+                            st.info("No actions recorded for this species")
+            else:
+                st.warning("No species found")